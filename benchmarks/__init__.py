@@ -0,0 +1,14 @@
+"""Benchmarks of the copan:CORE engine, in the format of airspeed velocity
+(asv, see asv.conf.json). They can also be run without asv by
+
+    python -m benchmarks.run [pattern]
+"""
+
+# This file is part of pycopancore.
+#
+# Copyright (C) 2016-2017 by COPAN team at Potsdam Institute for Climate
+# Impact Research
+#
+# URL: <http://www.pik-potsdam.de/copan/software>
+# Contact: core@pik-potsdam.de
+# License: BSD 2-clause license
@@ -0,0 +1,30 @@
+"""Benchmarks of the model configuration."""
+
+# This file is part of pycopancore.
+#
+# Copyright (C) 2016-2017 by COPAN team at Potsdam Institute for Climate
+# Impact Research
+#
+# URL: <http://www.pik-potsdam.de/copan/software>
+# Contact: core@pik-potsdam.de
+# License: BSD 2-clause license
+
+from .common import MModel, populate
+
+
+class Configure(object):
+    """ModelLogics.configure of the benchmark model (which does not depend
+    on the no. of instances, since configuration forgets them)"""
+
+    params = [False, True]
+    param_names = ["columnar"]
+
+    def setup(self, columnar):
+        populate(0)
+
+    def teardown(self, columnar):
+        # (leave the model as the other benchmarks expect it):
+        MModel.configure(reconfigure=True)
+
+    def time_configure(self, columnar):
+        MModel.configure(reconfigure=True, columnar=columnar)
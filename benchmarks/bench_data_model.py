@@ -0,0 +1,34 @@
+"""Benchmarks of writing Variable values."""
+
+# This file is part of pycopancore.
+#
+# Copyright (C) 2016-2017 by COPAN team at Potsdam Institute for Climate
+# Impact Research
+#
+# URL: <http://www.pik-potsdam.de/copan/software>
+# Contact: core@pik-potsdam.de
+# License: BSD 2-clause license
+
+import numpy as np
+
+from pycopancore.model_components.base import interface as B
+
+from .common import ICell, instance_counts, populate
+
+
+class FastSetValues(object):
+    """Variable.fast_set_values, with values stored in instance attributes
+    or in columns (see _ColumnStore)"""
+
+    params = [instance_counts, [False, True]]
+    param_names = ["cells", "columnar"]
+
+    def setup(self, n, columnar):
+        populate(n, columnar=columnar)
+        self.values = np.random.RandomState(0).uniform(size=n)
+
+    def time_fast_set_values(self, n, columnar):
+        B.Cell.terrestrial_carbon.fast_set_values(self.values)
+
+    def time_fast_set_scalar(self, n, columnar):
+        ICell.decay_rate.fast_set_values(self.values[:1])
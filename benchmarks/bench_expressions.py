@@ -0,0 +1,114 @@
+"""Benchmarks of the evaluation of symbolic expressions."""
+
+# This file is part of pycopancore.
+#
+# Copyright (C) 2016-2017 by COPAN team at Potsdam Institute for Climate
+# Impact Research
+#
+# URL: <http://www.pik-potsdam.de/copan/software>
+# Contact: core@pik-potsdam.de
+# License: BSD 2-clause license
+
+from itertools import count
+
+import numpy as np
+import sympy as sp
+
+from pycopancore.model_components.base import interface as B
+from pycopancore.private._expressions import _DotConstruct, _eval, \
+    name2aggregation, broadcast
+from pycopancore.private._simple_expressions import unknown
+
+from .common import ICell, IIndividual, instance_counts, populate
+
+tc = B.Cell.terrestrial_carbon
+fc = B.Cell.fossil_carbon
+
+expressions = {
+    "arithmetic": - ICell.decay_rate * tc + 0.5 * fc / (1 + tc),
+    "functions": sp.sin(fc) * sp.sqrt(tc * fc) + sp.Max(tc, fc),
+    "piecewise": sp.Piecewise((tc - fc, tc > fc), (0, True)),
+    "reference": tc / B.Cell.world.terrestrial_carbon,
+    "aggregation": B.World.sum.cells(tc ** 2) / B.World.sum.cells.fossil_carbon,
+    "nested aggregation": B.Cell.mean.individuals(IIndividual.wealth ** 2)
+    * B.Cell.world.sum.cells.terrestrial_carbon,
+}
+"""representative expression trees"""
+
+references = {
+    1: B.Individual.cell.terrestrial_carbon,
+    2: B.Individual.cell.world.terrestrial_carbon,
+    3: B.Individual.cell.social_system.world.terrestrial_carbon,
+}
+"""attribute references (_DotConstructs) by no. of references followed"""
+
+# (a new iteration for each evaluation, so that nothing is read from the
+# expression cache):
+_iterations = count(1)
+
+
+def _forget_instances(expr):
+    """clear the instance structures cached by the _DotConstructs in expr,
+    which refer to the entities of a previous populate"""
+    for node in sp.preorder_traversal(expr):
+        if isinstance(node, _DotConstruct):
+            node._target_instances = unknown
+
+
+class Eval(object):
+    """_expressions._eval of whole expression trees"""
+
+    params = [list(expressions), instance_counts]
+    param_names = ["expression", "cells"]
+    # (evaluating the nested aggregation for many cells takes seconds):
+    timeout = 300
+
+    def setup(self, name, n):
+        populate(n)
+        self.expr = expressions[name]
+        _forget_instances(self.expr)
+
+    def time_eval(self, name, n):
+        _eval(self.expr, next(_iterations))
+
+
+class DotConstructEval(object):
+    """_DotConstruct.eval across depths of the entity hierarchy"""
+
+    params = [list(references), instance_counts]
+    param_names = ["depth", "cells"]
+
+    def setup(self, depth, n):
+        populate(n)
+        self.dotconstruct = references[depth]
+        _forget_instances(self.dotconstruct)
+        # (analyse the instance structure once, as in a run):
+        self.dotconstruct.eval()
+
+    def time_eval(self, depth, n):
+        self.dotconstruct.eval()
+
+
+class Helpers(object):
+    """hierarchical aggregation and broadcasting helpers of _expressions,
+    for groups of ten values"""
+
+    params = instance_counts
+    param_names = ["groups"]
+
+    def setup(self, n):
+        self.lens = [10] * n
+        self.values = np.random.RandomState(0).uniform(size=10 * n)
+        self.group_values = self.values[:n]
+
+    def time_aggregation_sum(self, n):
+        name2aggregation["sum"](self.values, self.lens)
+
+    def time_aggregation_median(self, n):
+        name2aggregation["median"](self.values, self.lens)
+
+    def time_broadcast(self, n):
+        broadcast(self.group_values, [self.lens])
+
+    def time_broadcast_two_levels(self, n):
+        broadcast(self.group_values[:n // 10], [[10] * (n // 10), self.lens])
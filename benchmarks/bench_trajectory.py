@@ -0,0 +1,72 @@
+"""Benchmarks of recording and saving trajectories."""
+
+# This file is part of pycopancore.
+#
+# Copyright (C) 2016-2017 by COPAN team at Potsdam Institute for Climate
+# Impact Research
+#
+# URL: <http://www.pik-potsdam.de/copan/software>
+# Contact: core@pik-potsdam.de
+# License: BSD 2-clause license
+
+import os
+import shutil
+import tempfile
+
+from pycopancore.runners import Runner
+from pycopancore.private._trajectory_dictionary import _TrajectoryDictionary
+
+from .common import instance_counts, populate
+
+
+def _recording_runner(model):
+    """return a Runner whose trajectory_dict is prepared as in run"""
+    runner = Runner(model=model)
+    runner.trajectory_dict = _TrajectoryDictionary()
+    for v in model.variables:
+        runner.trajectory_dict.add_variable(v)
+    return runner
+
+
+class SaveToTraj(object):
+    """Runner.save_to_traj of all process targets at one time point"""
+
+    params = [instance_counts, [False, True]]
+    param_names = ["cells", "columnar"]
+
+    def setup(self, n, columnar):
+        model = populate(n, columnar=columnar)[0]
+        self.runner = _recording_runner(model)
+        self.targets = list(model.process_targets)
+        self.t = 0
+
+    def time_save_to_traj(self, n, columnar):
+        self.t += 1
+        self.runner.trajectory_dict.append_time(self.t)
+        self.runner.save_to_traj(self.targets, None)
+
+
+class TrajectorySave(object):
+    """_TrajectoryDictionary.save of a trajectory with 100 time points"""
+
+    params = [instance_counts, ["pickle", "json"]]
+    param_names = ["cells", "data_type"]
+    timeout = 300
+
+    def setup(self, n, data_type):
+        model = populate(n)[0]
+        runner = _recording_runner(model)
+        targets = list(model.process_targets)
+        for t in range(100):
+            runner.trajectory_dict.append_time(t)
+            runner.save_to_traj(targets, None)
+        self.trajectory_dict = runner.trajectory_dict
+        self.path = tempfile.mkdtemp()
+
+    def teardown(self, n, data_type):
+        shutil.rmtree(self.path)
+
+    def time_save(self, n, data_type):
+        self.trajectory_dict.save(filename="trajectory",
+                                  path=self.path + os.sep,
+                                  data_type=data_type)
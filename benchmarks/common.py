@@ -0,0 +1,128 @@
+"""Model shared by the benchmarks.
+
+A base model extended by a few Cell and Individual variables and processes,
+populated with one World, one SocialSystem per 100 Cells, and given numbers
+of Cells and Individuals.
+"""
+
+# This file is part of pycopancore.
+#
+# Copyright (C) 2016-2017 by COPAN team at Potsdam Institute for Climate
+# Impact Research
+#
+# URL: <http://www.pik-potsdam.de/copan/software>
+# Contact: core@pik-potsdam.de
+# License: BSD 2-clause license
+
+import numpy as np
+
+from pycopancore.data_model import Variable
+from pycopancore.model_components import base
+from pycopancore.model_components.base import interface as B
+from pycopancore.process_types import ODE, Explicit
+from pycopancore.runners import set_verbosity
+
+# (the benchmarks would otherwise be interleaved with configuration and run
+# messages):
+set_verbosity("quiet")
+
+instance_counts = [100, 1000, 10000]
+"""no. of Cells used as parameter of most benchmarks"""
+
+
+class ICell(object):
+    decay_rate = Variable("decay rate", "", default=0.1)
+    growth = Variable("growth", "", default=0.)
+
+
+class Cell(ICell):
+    processes = [
+        ODE("decay", [B.Cell.terrestrial_carbon],
+            [- ICell.decay_rate * B.Cell.terrestrial_carbon + ICell.growth]),
+        Explicit("growth", [ICell.growth],
+                 [0.5 * B.Cell.fossil_carbon / (1 + B.Cell.terrestrial_carbon)]),
+    ]
+
+
+class IIndividual(object):
+    wealth = Variable("wealth", "", default=1.)
+
+
+class Individual(IIndividual):
+    processes = [
+        ODE("earn", [IIndividual.wealth],
+            [0.01 * B.Individual.cell.terrestrial_carbon]),
+    ]
+
+
+class IModel(object):
+    name = "benchmark model"
+
+
+class Model(IModel):
+    entity_types = [Cell, Individual]
+    process_taxa = []
+
+
+class MWorld(base.World):
+    pass
+
+
+class MSocialSystem(base.SocialSystem):
+    pass
+
+
+class MCell(Cell, base.Cell):
+    pass
+
+
+class MIndividual(Individual, base.Individual):
+    pass
+
+
+class MModel(Model, base.Model):
+    entity_types = [MWorld, MSocialSystem, MCell, MIndividual]
+    process_taxa = []
+
+
+_population = None
+"""arguments and result of the latest call of populate"""
+
+
+def populate(n_cells, individuals_per_cell=1, columnar=False):
+    """Return the model with one World, n_cells Cells with random stocks,
+    one SocialSystem per 100 Cells and individuals_per_cell Individuals per
+    Cell, replacing all previous entities.
+
+    The model is (re)configured with the given value of columnar (see
+    ModelLogics.configure), unless the entities of the previous call with
+    the same arguments still exist, which are then reused.
+
+    Returns
+    -------
+    tuple
+        (model, world, social_systems, cells, individuals)
+    """
+    global _population
+    key = (n_cells, individuals_per_cell, columnar)
+    if _population is not None and _population[0] == key \
+            and MModel._configured and MModel.columnar == columnar \
+            and len(MCell.instances) == n_cells:
+        return _population[1]
+    # (reconfiguring forgets all entities, much faster than model.reset):
+    MModel.configure(reconfigure=True, columnar=columnar)
+    model = MModel()
+    rng = np.random.RandomState(0)
+    world = MWorld()
+    # (since creating an Individual takes time proportional to the no. of
+    # Individuals in its SocialSystem, these are kept small):
+    social_systems = [MSocialSystem(world=world)
+                      for _ in range(-(-n_cells // 100))]
+    cells = [MCell(social_system=social_systems[i // 100],
+                   terrestrial_carbon=rng.uniform(1, 10),
+                   fossil_carbon=rng.uniform(1, 10))
+             for i in range(n_cells)]
+    individuals = [MIndividual(cell=cell)
+                   for cell in cells for _ in range(individuals_per_cell)]
+    _population = (key, (model, world, social_systems, cells, individuals))
+    return _population[1]
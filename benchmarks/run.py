@@ -0,0 +1,87 @@
+"""Run the benchmarks without asv and print the best time per call.
+
+Usage: python -m benchmarks.run [pattern]
+
+where pattern is an optional regular expression that the names
+(module.Class.method) of the benchmarks to run must contain. Like asv, each
+benchmark is timed for all combinations of its parameters, calling setup
+before and teardown after.
+"""
+
+# This file is part of pycopancore.
+#
+# Copyright (C) 2016-2017 by COPAN team at Potsdam Institute for Climate
+# Impact Research
+#
+# URL: <http://www.pik-potsdam.de/copan/software>
+# Contact: core@pik-potsdam.de
+# License: BSD 2-clause license
+
+import importlib
+import inspect
+import itertools
+import os
+import re
+import sys
+from time import perf_counter
+
+repeat = 5
+"""no. of samples per benchmark and parameter combination"""
+min_sample_time = 0.05
+"""minimal duration in seconds of one sample (of one or more calls)"""
+
+
+def combinations(cls):
+    """return the list of parameter combinations of a benchmark class"""
+    params = getattr(cls, "params", None)
+    if params is None:
+        return [()]
+    if not any(isinstance(p, list) for p in params):
+        # a single parameter:
+        params = [params]
+    return list(itertools.product(*params))
+
+
+def measure(function, args):
+    """return the best time per call of function(*args)"""
+    start = perf_counter()
+    function(*args)
+    elapsed = perf_counter() - start
+    number = max(1, int(min_sample_time / max(elapsed, 1e-9)))
+    best = elapsed
+    for _ in range(repeat):
+        start = perf_counter()
+        for _ in range(number):
+            function(*args)
+        best = min(best, (perf_counter() - start) / number)
+    return best
+
+
+def main(pattern=""):
+    directory = os.path.dirname(os.path.abspath(__file__))
+    for filename in sorted(os.listdir(directory)):
+        if not (filename.startswith("bench_") and filename.endswith(".py")):
+            continue
+        module = importlib.import_module(__package__ + "." + filename[:-3])
+        for cls_name, cls in inspect.getmembers(module, inspect.isclass):
+            if cls.__module__ != module.__name__:
+                continue
+            methods = [name for name in dir(cls) if name.startswith("time_")]
+            for name, args in itertools.product(methods, combinations(cls)):
+                label = "{}.{}.{}".format(filename[:-3], cls_name, name)
+                if not re.search(pattern, label):
+                    continue
+                benchmark = cls()
+                if hasattr(benchmark, "setup"):
+                    benchmark.setup(*args)
+                try:
+                    seconds = measure(getattr(benchmark, name), args)
+                finally:
+                    if hasattr(benchmark, "teardown"):
+                        benchmark.teardown(*args)
+                print("{:<72} {:>10.3f} ms".format(
+                    label + str(args), 1000 * seconds), flush=True)
+
+
+if __name__ == "__main__":
+    main(*sys.argv[1:2])
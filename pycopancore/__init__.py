@@ -9,4 +9,7 @@ This is the pycopancore package.
 #
 # URL: <http://www.pik-potsdam.de/copan/software>
 # Contact: core@pik-potsdam.de
-# License: BSD 2-clause license
\ No newline at end of file
+# License: BSD 2-clause license
+
+# (installs the default handler of the logger "pycopancore"):
+from .private import _logging
@@ -41,6 +41,11 @@ class SetVariable(Variable):
             return "DUMMY"  # FIXME!
         return _DotConstruct(self, []).__getattr__(name)
 
+    def set_value(self, instance, value):
+        """Set value for some instance and note the changed references"""
+        super().set_value(instance, value)
+        instance._structure_changed()
+
     # validation:
 
     def _check_valid(self, v):
@@ -111,6 +111,10 @@ class Variable(Symbol):
     """set of Vars. in the RHS of any ODE changing this Var."""
     # TODO: similar for Step, Event. How to deal with Implicit?
 
+    _column_store = None
+    """the _ColumnStore holding this Variable's values if the model was
+    configured with columnar=True, set by Model.configure()"""
+
     _uid = None
     """unique id"""
 
@@ -516,6 +520,11 @@ class Variable(Symbol):
 
     def fast_set_values(self, values):
         """fast-track method to set values without checks and conversions"""
+        store = self._column_store
+        if store is not None:
+            # one vectorized write into the column (broadcasts size-1 values):
+            store.columns[self.codename][store.active_indices] = values
+            return
         cn = self.codename
         if values.size > 1:
             for i, inst in enumerate(self.owning_class.instances):
@@ -582,6 +591,10 @@ class Variable(Symbol):
         -------
 
         """
+        store = self._column_store
+        if store is not None and instances is None:
+            store.columns['d_' + self.codename][:] = 0
+            return
         instances = self._get_instances(instances)
         for i in instances:
             setattr(i, 'd_' + self.codename, 0)
@@ -600,10 +613,17 @@ class Variable(Symbol):
         -------
 
         """
+        store = self._column_store
+        if store is not None and instances is self.owning_class.instances:
+            return store.columns['d_' + self.codename][store.active_indices]
         return [getattr(i, 'd_' + self.codename) for i in instances]
 
     def add_derivatives(self, values):
         """adds summands to referenced attribute values"""
+        store = self._column_store
+        if store is not None:
+            store.columns["d_" + self.codename][store.active_indices] += values
+            return
         dname = "d_" + self.codename
         for pos, i in enumerate(self.target_instances):
             setattr(i, dname, getattr(i, dname) + values[pos])
@@ -648,10 +668,15 @@ class Variable(Symbol):
         Returns
         -------
         List of variable value of each entity
+        (a numpy array if the values are stored in a _ColumnStore)
         """
 #        return [self.get_value(inst, unit=unit) for inst in instances]  # too slow...
         if instances is None:
             instances = self.owning_class.instances
+        store = self._column_store
+        if store is not None and unit is None \
+                and instances is self.owning_class.instances:
+            return store.columns[self.codename][store.active_indices]
         if unit is None:
             cn = self.codename
             return [getattr(inst, cn) for inst in instances]
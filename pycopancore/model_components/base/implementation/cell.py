@@ -80,6 +80,7 @@ class Cell (I.Cell, abstract.Cell):
         assert isinstance(w, I.World), "world must be of entity type World"
         w._cells.add(self)
         self._world = w
+        self._structure_changed()
 
     @property
     def social_system(self):
@@ -106,6 +107,7 @@ class Cell (I.Cell, abstract.Cell):
         self._social_system = s
         # reset dependent caches:
         self.social_systems = unknown
+        self._structure_changed()
 
     # getters for backwards references and convenience variables:
 
@@ -9,8 +9,11 @@
 # Contact: core@pik-potsdam.de
 # License: BSD 2-clause license
 
+from collections.abc import Iterator
+
 # only used in this component, not in others:
 from pycopancore.model_components import abstract
+from pycopancore.data_model.ordered_set import OrderedSet
 from .. import interface as I
 
 
@@ -95,6 +98,7 @@ class Group (I.Group, abstract.Group):
                 "Culture must be taxon type Culture"
             c._groups.add(self)
         self._culture = c
+        self._structure_changed()
 
     @property
     def world(self):
@@ -110,6 +114,7 @@ class Group (I.Group, abstract.Group):
         assert isinstance(w, I.World), "world must be of entity type World"
         w._groups.add(self)
         self._world = w
+        self._structure_changed()
 
     # getters for backwards references and convenience variables:
 
@@ -127,7 +132,9 @@ class Group (I.Group, abstract.Group):
     def group_members(self):
         """Get the set of Individuals associated with this Group."""
         # return self.culture.group_membership_network.neighbors(self)
-        return self.culture.group_membership_network.predecessors(self) # .predecessors as network is directed from inds to groups
+        members = self.culture.group_membership_network.predecessors(self) # .predecessors as network is directed from inds to groups
+        return OrderedSet(members) if isinstance(members, Iterator) \
+            else members
 
 
     # no process-related methods
@@ -9,8 +9,11 @@
 # Contact: core@pik-potsdam.de
 # License: BSD 2-clause license
 
+from collections.abc import Iterator
+
 # only used in this component, not in others
 from pycopancore.model_components import abstract
+from pycopancore.data_model.ordered_set import OrderedSet
 # from .... import master_data_model as D
 from pycopancore.private._simple_expressions import unknown
 
@@ -106,6 +109,7 @@ class Individual (I.Individual, abstract.Individual):
             c.social_system.direct_individuals = unknown
             c.social_system.individuals = unknown
         self.world.individuals = unknown
+        self._structure_changed()
 
     # getters for backwards references and convenience variables:
 
@@ -157,12 +161,18 @@ class Individual (I.Individual, abstract.Individual):
     @property
     def acquaintances(self):
         """Get the set of Individuals the Individual is acquainted with."""
-        return self.culture.acquaintance_network.neighbors(self)
+        neighbors = self.culture.acquaintance_network.neighbors(self)
+        # (as a set, since aggregations need its length, unless there is no
+        # Culture yet):
+        return OrderedSet(neighbors) if isinstance(neighbors, Iterator) \
+            else neighbors
 
     @property
     def group_memberships(self):
         """Get the set of Groups the Individual is associated with."""
-        return self.culture.group_membership_network.neighbors(self) # .successors as network is directed from inds to groups
+        neighbors = self.culture.group_membership_network.neighbors(self) # .successors as network is directed from inds to groups
+        return OrderedSet(neighbors) if isinstance(neighbors, Iterator) \
+            else neighbors
 
     # no process-related methods
 
@@ -73,6 +73,7 @@ class SocialSystem (I.SocialSystem, abstract.SocialSystem):
         assert isinstance(w, I.World), "world must be of entity type World"
         w._social_systems.add(self)
         self._world = w
+        self._structure_changed()
 
     @property
     def next_higher_social_system(self):
@@ -95,6 +96,7 @@ class SocialSystem (I.SocialSystem, abstract.SocialSystem):
         self._next_higher_social_system = s
         # reset dependent caches:
         self.higher_social_systems = unknown
+        self._structure_changed()
 
     # getters for backwards references and convenience variables:
 
@@ -78,6 +78,7 @@ class World (I.World, abstract.World):
             assert isinstance(n, I.Environment), "Environment must be taxon type Environment"
             n._worlds.add(self)
         self._environment = n
+        self._structure_changed()
 
     @property
     def metabolism(self):
@@ -95,6 +96,7 @@ class World (I.World, abstract.World):
                 "Metabolism must be of process taxon type Metabolism"
             m._worlds.add(self)
         self._metabolism = m
+        self._structure_changed()
 
     @property  # read-only
     def social_systems(self):
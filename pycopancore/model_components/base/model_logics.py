@@ -26,12 +26,19 @@ from pycopancore.private._abstract_process_taxon_mixin \
     import _AbstractProcessTaxonMixin
 
 from pycopancore.private._simple_expressions import unknown
+from pycopancore.private._column_store import _ColumnStore
+from pycopancore.private._snapshot import _ModelSnapshot
+from pycopancore.private._expression_kernels import compile_kernels
 from pycopancore.private._expressions import get_vars
 import gc
 import inspect
+import logging
 import re
 import numpy as np
 from networkx import DiGraph, write_graphml
+from time import time
+
+logger = logging.getLogger(__name__)
 
 
 # helper function:
@@ -58,6 +65,9 @@ class ModelLogics (object):
 
     _configured = False
     """whether model was configured already"""
+    columnar = False
+    """whether Variable values are stored in numpy columns
+    (see _ColumnStore) rather than as individual instance attributes"""
 
     components = None
     """ordered set of model components in method resolution order"""
@@ -101,13 +111,14 @@ class ModelLogics (object):
     def __init__(self,
                  *,
                  reconfigure=False,
+                 columnar=False,
                  **kwargs):
         """Upon initialization of model: configure if not yet configured."""
         if not self.__class__._configured:
-            self.configure(reconfigure=reconfigure)
+            self.configure(reconfigure=reconfigure, columnar=columnar)
 
     @classmethod
-    def configure(cls, reconfigure=False, **kwargs):
+    def configure(cls, reconfigure=False, columnar=False, **kwargs):
         """Configure the model.
 
         This classmethod configures the model by analysing the model's and all
@@ -121,6 +132,11 @@ class ModelLogics (object):
         reconfigure : bool
             Flag that indicates if the model should be reconfigured even if
             it is already configured
+        columnar : bool
+            Flag that indicates if the values of all float-valued Variables
+            should be stored in one numpy array per Variable and composed
+            class (see _ColumnStore), so that the runner can read and write
+            whole columns instead of individual instance attributes
         """
         if cls._configured and not reconfigure:
             raise ConfigureError("This model is already configured. "
@@ -149,9 +165,13 @@ class ModelLogics (object):
         cls.explicit_dependencies = {}
         cls.ODE_dependencies = {}
 
-        # start the extensive log output:
-        print("\nConfiguring model", cls.name, "(", cls, ") ...")
-        print("Analysing model structure...\n")
+        cls.columnar = columnar
+
+        # start the extensive log output (most of it only at verbosity
+        # "debug"):
+        _starttime = time()
+        logger.info("Configuring model %s (%s) ...", cls.name, cls)
+        logger.debug("Analysing model structure...")
 
         variable_pool = OrderedSet()  # temp. list of all variables found
 
@@ -178,28 +198,31 @@ class ModelLogics (object):
                 component.process_taxa = []
 
             component_interface = component.__bases__[0]  # the first base class of an impl. cl. is its interface
-            print("Model component ", component_interface.name, "(", component,
-                  ")...")
+            logger.debug("Model component %s (%s)...",
+                         component_interface.name, component)
             # iterate through all entity-type and process taxon mixins this
             # model components defines:
             for mixin in component.entity_types + component.process_taxa:
                 mixin_interface = mixin.__bases__[0]  # interface of this mixin
                 if mixin in component.entity_types:
-                    print("    Entity-type ", mixin)
+                    logger.debug("    Entity-type %s", mixin)
                 else:
-                    print("    Process taxon ", mixin)
+                    logger.debug("    Process taxon %s", mixin)
                 # find and register all Variables defined directly in this
                 # mixin's interface:
                 for (k, v) in mixin_interface.__dict__.items():  # k is the attribute's name (here the variable name), v the attribute's value (here the Variable object)
                     if isinstance(v, Variable):
                         if v not in variable_pool:  # we found a new one
-                            assert v.codename is None  # since Variables are assigned their codename attribute only here
+                            # (Variables are assigned their codename attribute
+                            # only here, or already by a previous
+                            # configuration of this model):
+                            assert v.codename in (None, k)
                             # store codename in Variable object for convenience:
                             v.codename = k
                             variable_pool.add(v)
-                            print("        Variable ", v)
+                            logger.debug("        Variable %s", v)
                         else:  # same Var. has been registered in another component or mixin already:
-                            print("        Variable ", v)
+                            logger.debug("        Variable %s", v)
                             # make sure all mixins use the same codename
                             # for this Var.:
                             assert v.codename == k, \
@@ -208,14 +231,14 @@ class ModelLogics (object):
                                 "different codename."
                 # find and register all processes defined directly in this
                 # mixin's "process" attribute:
-                if "processes" not in mixin_interface.__dict__:
+                if "processes" not in mixin.__dict__:
                     mixin.processes = []
 
                 for p in mixin.processes:
                     assert isinstance(p, _AbstractProcess), \
                         "The 'processes' attribute of an implementation " \
                         "class must only contain process objects."
-                    print("        Process ", p)
+                    logger.debug("        Process %s", p)
                     # other than variables, the same process cannot be named
                     # by more than one mixin:
                     assert p not in cls.processes, \
@@ -225,14 +248,16 @@ class ModelLogics (object):
 
         # now iterate again through all composed entity-types and process taxa,
         # output all found variables and complete the composed class' logics:
-        print("\nVariables:")
+        logger.debug("Variables:")
         for composed_class in cls.entity_types + cls.process_taxa:
             if composed_class in cls.entity_types:
-                print("  Entity-type ", composed_class)
+                logger.debug("  Entity-type %s", composed_class)
             else:
-                print("  Process taxon ", composed_class)
+                logger.debug("  Process taxon %s", composed_class)
             # initialize empty list of instances:
             composed_class.instances = []
+            # remove column descriptors from a previous configuration:
+            _ColumnStore.uninstall(composed_class)
             # find all parent classes and register in dict mixin2composite:
             parents = OrderedSet(list(inspect.getmro(composed_class))) - [object]
             for mixin in parents:
@@ -254,11 +279,18 @@ class ModelLogics (object):
                     # local abbreviations for lengthy variable names in
                     # implementation classes. therefore also the following:
                     if v.codename == k:
-                        print("    Variable ", v)
+                        logger.debug("    Variable %s", v)
                         cls.variables.add(v)
                         composed_class.variables.add(v)
-                        assert v.owning_class is None  # since it is only set here!
+                        assert v.owning_class in (None, composed_class)  # since it is only set here (or when reconfiguring)!
                         v.owning_class = composed_class
+            if columnar:
+                # store float-valued Variables in columns:
+                _ColumnStore.install(
+                    composed_class,
+                    [v for (k, v) in variables
+                     if v.owning_class is composed_class and v.codename == k
+                     and _ColumnStore.is_eligible(v, parents)])
             # add an __init__ method to the composed class:
             def new__init__(inst, **kwargs):
                 """make sure all values have valid values"""
@@ -277,26 +309,26 @@ class ModelLogics (object):
             if isinstance(v, (ReferenceVariable, SetVariable)):
                 v.type = cls.mixin2composite.get(v.type, v.type)
 
-        print("\nProcesses:")
+        logger.debug("Processes:")
         # iterate again through all composed entity-types and process taxa
         # to output all processes and check process targets:
         var2process = {}  # dict needed for determining explicit evaluation order
         for composed_class in cls.entity_types + cls.process_taxa:
             if composed_class in cls.entity_types:
-                print("  Entity-type ", composed_class)
+                logger.debug("  Entity-type %s", composed_class)
             else:
-                print("  Process taxon ", composed_class)
+                logger.debug("  Process taxon %s", composed_class)
             parents = OrderedSet(list(inspect.getmro(composed_class)))
             for c in parents:
                 if "processes" in c.__dict__ and c.processes is not None:  # since some implementation classes may not define any processes
                     for p in c.processes:
-                        print("    Process ", p)
+                        logger.debug("    Process %s", p)
                         # all processes found here should have been seen
                         # already above, so we verify this:
                         assert p in cls.processes, \
                             "Process was not listed in any implementation " \
                             "class!"
-                        assert p.owning_class is None  # since it is only set here!
+                        assert p.owning_class in (None, composed_class)  # since it is only set here (or when reconfiguring)!
                         p.owning_class = composed_class
                         # depending on process type, register in correct list
                         # and analyse process targets:
@@ -328,18 +360,18 @@ class ModelLogics (object):
                                            + str(composed_class)
                                 if isinstance(p.specification, list):
                                     deps = get_vars(p.specification[i])
-                                    print("      Derivative of",
-                                          target.target_variable,
-                                          "directly depends on", deps)
+                                    logger.debug("      Derivative of %s directly "
+                                                 "depends on %s",
+                                                 target.target_variable, deps)
                                     try:
                                         cls.ODE_dependencies[target.target_variable].update(deps)
                                     except KeyError:
                                         cls.ODE_dependencies[target.target_variable] = deps
                                 else:
                                     deps = guess_deps(p.specification, variable_pool)
-                                    print("      Derivative of",
-                                          target.target_variable,
-                                          "probably directly depends on", deps)
+                                    logger.debug("      Derivative of %s probably "
+                                                 "directly depends on %s",
+                                                 target.target_variable, deps)
                                     try:
                                         cls.ODE_dependencies[target.target_variable].update(deps)
                                     except KeyError:
@@ -349,6 +381,7 @@ class ModelLogics (object):
 #                                          "has unknown dependencies")
 #                                    cls.ODE_dependencies[target.target_variable] = unknown
                             cls.ODE_targets += p.targets
+                            p._kernels = compile_kernels(p.specification)
                             cls.process_targets += p.targets
                         elif isinstance(p, Explicit):
                             # TODO: determine dependency structure among
@@ -371,18 +404,18 @@ class ModelLogics (object):
                                            "entity-type/taxon:"
                                 if isinstance(p.specification, list):
                                     deps = get_vars(p.specification[i])
-                                    print("      Target var.",
-                                          target.target_variable,
-                                          "directly depends on", deps)
+                                    logger.debug("      Target var. %s directly "
+                                                 "depends on %s",
+                                                 target.target_variable, deps)
                                     try:
                                         cls.explicit_dependencies[target.target_variable].update(deps)
                                     except KeyError:
                                         cls.explicit_dependencies[target.target_variable] = deps
                                 else:
                                     deps = guess_deps(p.specification, variable_pool)
-                                    print("      Target var.",
-                                          target.target_variable,
-                                          "probably directly depends on", deps)
+                                    logger.debug("      Target var. %s probably "
+                                                 "directly depends on %s",
+                                                 target.target_variable, deps)
                                     try:
                                         cls.explicit_dependencies[target.target_variable].update(deps)
                                     except KeyError:
@@ -393,6 +426,7 @@ class ModelLogics (object):
 #                                    cls.explicit_dependencies[target.target_variable] = unknown
                                 var2process[target.target_variable] = p
                             cls.explicit_targets += p.targets
+                            p._kernels = compile_kernels(p.specification)
                             cls.process_targets += p.targets
                         elif isinstance(p, Step):
                             cls.step_processes.add(p)
@@ -429,7 +463,8 @@ class ModelLogics (object):
                         else:
                             raise Exception("unsupported process type")
 
-        print("\nTargets affected by some process:", cls.process_targets)
+        logger.debug("Targets affected by some process: %s",
+                     cls.process_targets)
 
         # analyse dependency structure between variables to determine
         # correct order of process evaluation:
@@ -496,19 +531,19 @@ class ModelLogics (object):
                     G.remove_node(tgt.target_variable)
             cls.explicit_evaluation_order.append(bestvar)
             G.remove_node(bestvar)
-        print("\nOrder of evaluation of variables set by explicit equations:")
+        logger.debug("Order of evaluation of variables set by explicit "
+                     "equations:")
         for target in cls.explicit_evaluation_order:
-            print("  ",target)
+            logger.debug("   %s", target)
 
-        # TODO:
-        # - during ODE evaluation, only evaluate those from the evaluation
-        #   stack which at least one differential d_x depends on either
-        #   directly or indirectly, assuming that a "not nice" differential
-        #   depends on all variables
+        # (during ODE evaluation, the runner only applies those explicit
+        # processes which at least one differential d_x depends on either
+        # directly or indirectly, see Runner.get_ODE_relevant_explicits)
 
         cls._configured = True
 
-        print("\n(End of model configuration)")
+        logger.info("(End of model configuration after %s seconds)",
+                    time() - _starttime)
 
     def convert_to_standard_units(self):
         """Replace all variable values of type DimensionalQuantity to float.
@@ -528,6 +563,33 @@ class ModelLogics (object):
         for obj in obj_to_delete:
             # print(f'obj{obj} is going to be deleted:')
             obj.delete()
+        # forget the deleted instances' rows:
+        for composed_class in self.entity_types + self.process_taxa:
+            if composed_class._column_store is not None:
+                composed_class._column_store.clear()
+
+    def snapshot(self):
+        """Return a copy of the current state of the model.
+
+        The snapshot contains the values of all Variables (including
+        references, sets and networks) of all active and idle entities and
+        process taxa, which entities are active or idle, and the states of
+        numpy's and python's random number generators. Pass it to restore
+        to return to this state, e.g. to run several scenarios from the
+        same spin-up (see _ModelSnapshot).
+        """
+        return _ModelSnapshot(self)
+
+    def restore(self, snapshot):
+        """Return the model in place to the state of a snapshot.
+
+        Entities created after the snapshot are dropped, entities deleted or
+        deactivated after it are brought back. A snapshot can be restored
+        any number of times.
+        """
+        assert isinstance(snapshot, _ModelSnapshot), \
+            "snapshot must have been returned by snapshot()"
+        snapshot.restore()
 
 
 class ConfigureError(Exception):
@@ -0,0 +1,265 @@
+"""Model exercising the runner's engine, used by the tests.
+
+A base model extended by a World, Cell and Individual variable with ODEs
+(one of them with an aggregation), an Explicit process, per-instance and
+equivalent batched ODE, Explicit and Step methods, a rate Event with a
+constant rate, one with a state-dependent rate and a condition Event, and a
+World time Event that rewires the Culture's acquaintance network and edits a
+set in place. The
+latter three are inactive by default (zero rate, unreachable alarm level and
+rewiring time).
+"""
+
+# This file is part of pycopancore.
+#
+# Copyright (C) 2016-2017 by COPAN team at Potsdam Institute for Climate
+# Impact Research
+#
+# URL: <http://www.pik-potsdam.de/copan/software>
+# Contact: core@pik-potsdam.de
+# License: BSD 2-clause license
+
+import random
+
+import numpy as np
+import sympy as sp
+
+from pycopancore.data_model import SetVariable, Variable
+from pycopancore.model_components import base
+from pycopancore.model_components.base import interface as B
+from pycopancore.private._abstract_entity_mixin import _AbstractEntityMixin
+from pycopancore.private._mixin import _MixinType
+from pycopancore.process_types import ODE, Explicit, Step, Event
+
+# INTERFACE:
+
+
+class IWorld(object, metaclass=_MixinType):
+    level = Variable("level", "rises at constant speed", default=0.)
+    level_speed = Variable("level speed", "", default=1.)
+    rewiring_time = Variable("rewiring time", "", default=1e9)
+    favourites = SetVariable("favourites", "some Individuals")
+    favourite_wealth = Variable("favourite wealth",
+                                "total wealth of the favourites", default=0.)
+
+
+class ICell(object):
+    stock = Variable("stock", "", default=10.)
+    decay_rate = Variable("decay rate", "", default=0.1)
+    growth = Variable("growth", "", default=0.)
+
+
+class IIndividual(object):
+    wealth = Variable("wealth", "", default=1.)
+    interest = Variable("interest", "", default=0.05)
+    step_offset = Variable("step offset",
+                           "period of the Steps minus one", default=0.)
+    age = Variable("age", "counted by a per-instance Step", default=0.)
+    age_b = Variable("batch age", "counted by a batched Step", default=0.)
+    hits = Variable("hits", "occurrences of the rate Event", default=0.)
+    kick_rate = Variable("kick rate", "", default=0.)
+    kicks = Variable("kicks", "occurrences of the varying-rate Event",
+                     default=0.)
+    alarm_level = Variable("alarm level", "", default=1e9)
+    alarms = Variable("alarms", "occurrences of the condition Event",
+                      default=0.)
+    alarm_time = Variable("alarm time", "", default=-1.)
+    savings = Variable("savings", "changed by a per-instance ODE",
+                       default=1.)
+    savings_b = Variable("batch savings", "changed by a batched ODE",
+                         default=1.)
+    bonus = Variable("bonus", "set by a per-instance Explicit",
+                     default=0.)
+    bonus_b = Variable("batch bonus", "set by a batched Explicit",
+                       default=0.)
+    acquaintance_wealth = Variable("acquaintance wealth",
+                                   "total wealth of the acquaintances",
+                                   default=0.)
+
+
+IWorld.favourites.type = IIndividual
+
+
+class IModel(object):
+    name = "engine test component"
+    description = "only for testing the runner"
+    requires = []
+
+# IMPLEMENTATION:
+
+
+class World(IWorld):
+
+    def next_rewiring(self, t):
+        return self.rewiring_time if t < self.rewiring_time else np.inf
+
+    def rewire(self, t):
+        """connect each Individual to the next but one instead of the
+        next (in the order of their creation), and add the last one to the
+        favourites"""
+        network = self.culture.acquaintance_network
+        nodes = list(network.nodes)
+        network.remove_edges_from(list(network.edges))
+        network.add_edges_from(zip(nodes, nodes[2:] + nodes[:2]))
+        self.favourites.add(nodes[-1])
+
+    processes = [
+        ODE("rise", [IWorld.level], [IWorld.level_speed]),
+        # (the network is not declared as a target since graphs are not
+        # recorded in trajectories well):
+        Event("rewire", [IWorld.favourites],
+              ["time", next_rewiring, rewire]),
+        Explicit("favourite wealth", [IWorld.favourite_wealth],
+                 [IWorld.sum.favourites.wealth]),
+    ]
+
+
+class Cell(ICell):
+    processes = [
+        ODE("decay", [ICell.stock],
+            [- ICell.decay_rate * ICell.stock + ICell.growth
+             + 0.01 * B.Cell.sum.individuals.wealth]),
+        Explicit("growth", [ICell.growth],
+                 [0.5 * sp.sin(ICell.stock) + 1]),
+    ]
+
+
+class Individual(IIndividual):
+
+    batch_sizes = []
+    """no. of instances of each call of the batched Step"""
+
+    def save(self, t):
+        self.d_savings += self.interest * self.savings + self.bonus
+
+    def save_all(cls, t):
+        return [np.array(cls.interest.eval()) * np.array(cls.savings_b.eval())
+                + np.array(cls.bonus_b.eval())]
+
+    def pay_bonus(self, t):
+        self.bonus = 0.01 * self.wealth * np.cos(t)
+
+    def pay_bonuses(cls, t):
+        return [0.01 * np.array(cls.wealth.eval()) * np.cos(t)]
+
+    def next_birthday(self, t):
+        return t + 1 + self.step_offset
+
+    def have_birthday(self, t):
+        self.age = self.age + 1
+
+    def next_birthdays(cls, t, individuals):
+        return t + 1 + np.array(cls.step_offset.eval(individuals))
+
+    def have_birthdays(cls, t, individuals):
+        Individual.batch_sizes.append(len(individuals))
+        cls.age_b.set_values(
+            instances=individuals,
+            values=np.array(cls.age_b.eval(individuals)) + 1)
+
+    def hit(self, t):
+        self.hits = self.hits + 1
+
+    def kick(self, t):
+        self.kicks = self.kicks + 1
+
+    def raise_alarm(self, t):
+        self.alarms = self.alarms + 1
+        self.alarm_time = t
+
+    processes = [
+        ODE("interest", [IIndividual.wealth],
+            [IIndividual.interest * IIndividual.wealth]),
+        ODE("saving", [IIndividual.savings], save),
+        ODE("batch saving", [IIndividual.savings_b], save_all, batch=True),
+        Explicit("bonus", [IIndividual.bonus], pay_bonus),
+        Explicit("batch bonus", [IIndividual.bonus_b], pay_bonuses,
+                 batch=True),
+        Step("aging", [IIndividual.age], [next_birthday, have_birthday]),
+        Step("batch aging", [IIndividual.age_b],
+             [next_birthdays, have_birthdays], batch=True),
+        Event("hit", [IIndividual.hits], ["rate", 0.5, hit]),
+        Event("kick", [IIndividual.kicks],
+              ["rate", IIndividual.kick_rate * B.Individual.world.level,
+               kick]),
+        Event("alarm", [IIndividual.alarms, IIndividual.alarm_time],
+              ["condition",
+               B.Individual.world.level > IIndividual.alarm_level,
+               raise_alarm]),
+        Explicit("acquaintance wealth", [IIndividual.acquaintance_wealth],
+                 [B.Individual.sum.acquaintances.wealth]),
+    ]
+
+
+class Model(IModel):
+    entity_types = [World, Cell, Individual]
+    process_taxa = []
+
+# MODEL:
+
+
+class MWorld(World, base.World):
+    pass
+
+
+class MSocialSystem(base.SocialSystem):
+    pass
+
+
+class MCell(Cell, base.Cell):
+    pass
+
+
+class MIndividual(Individual, base.Individual):
+    pass
+
+
+class MCulture(base.Culture):
+    pass
+
+
+class MModel(Model, base.Model):
+    name = "engine test model"
+    description = "base model with processes of all types"
+    entity_types = [MWorld, MSocialSystem, MCell, MIndividual]
+    process_taxa = [MCulture]
+
+
+def populate(n_individuals=4, n_cells=2, *, columnar=False, seed=0,
+             **individual_values):
+    """(Re)configure the model and set it up with one Culture, World and
+    SocialSystem, n_cells Cells and n_individuals Individuals (assigned to
+    the Cells in turn and acquainted in a ring, the first one being the
+    World's favourite), with the same UIDs and random numbers on each
+    call.
+
+    individual_values are passed to all Individuals. By default, their
+    wealth is 1, 2, ... and every other has a step_offset of 0.5.
+
+    Returns
+    -------
+    tuple
+        (model, world, cells, individuals)
+    """
+    MModel.configure(reconfigure=True, columnar=columnar)
+    for cls in MModel.entity_types:
+        cls.idle_entities = None
+    _AbstractEntityMixin.NEXTUID = 0
+    Individual.batch_sizes.clear()
+    np.random.seed(seed)
+    random.seed(seed)
+    model = MModel()
+    culture = MCulture()
+    world = MWorld(culture=culture)
+    social_system = MSocialSystem(world=world)
+    cells = [MCell(social_system=social_system, stock=10. + i)
+             for i in range(n_cells)]
+    individuals = [
+        MIndividual(cell=cells[i % n_cells],
+                    **dict(dict(wealth=1. + i, step_offset=0.5 * (i % 2)),
+                           **individual_values))
+        for i in range(n_individuals)]
+    culture.acquaintance_network.add_edges_from(
+        zip(individuals, individuals[1:] + individuals[:1]))
+    world.favourites = set(individuals[:1])
+    return model, world, cells, individuals
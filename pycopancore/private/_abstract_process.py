@@ -38,6 +38,13 @@ class _AbstractProcess(object):
 
     owning_class = None
     """the class (entity-type or process taxon) owning the process"""
+    batch = False
+    """whether a specification method is called once for the whole owning
+    class rather than once per instance"""
+
+    _kernels = None
+    """list of compiled _ExpressionKernels of a symbolic specification,
+    set by Model.configure()"""
 
     def __init__(self, name=""):
         """Initialize an _AbstractProcess instance."""
@@ -14,6 +14,9 @@ It sets the basic structure of dynamic mixins (culture, metabolism, environment)
 
 
 from pycopancore.private._mixin import _Mixin
+import logging
+
+logger = logging.getLogger(__name__)
 
 
 class _AbstractProcessTaxonMixin(_Mixin):
@@ -33,6 +36,7 @@ class _AbstractProcessTaxonMixin(_Mixin):
 #            print('This Process Taxon is already instantiated!')
 #        else:
         self.__class__.instances = [self]
+        self._instances_changed()
 
     def delete(self):
         """Delete this Process Taxon from lists."""
@@ -44,6 +48,7 @@ class _AbstractProcessTaxonMixin(_Mixin):
         # fresh again...
         if (self.__class__.instances == []):
             self.__class__.instances = None
+        self._instances_changed()
         # Delete for good:
-        print(f'Process taxon {self} deleted')
+        logger.debug('Process taxon %s deleted', self)
         del(self)
@@ -0,0 +1,123 @@
+"""Checkpoint files.
+
+A checkpoint is a pickle file holding the state of a run at some
+discontinuity: a _ModelSnapshot of the model, the Runner's queue of future
+discontinuities, the trajectory so far, and the remaining state needed to
+continue the run (see Runner.run and Runner.resume).
+
+Since composed classes and their instances belong to a particular model
+setup, they are not pickled directly. Instead, entities are stored as
+references (class name, UID), process taxa as (class name), and composed
+classes, Variables, processes and the model as names. When reading a
+checkpoint, these references are resolved against a model that has been
+configured (and possibly set up) again in the reading process: entities
+that do not exist there are created without calling their __init__, their
+attributes then being set from the snapshot.
+"""
+
+# This file is part of pycopancore.
+#
+# Copyright (C) 2016-2017 by COPAN team at Potsdam Institute for Climate
+# Impact Research
+#
+# URL: <http://www.pik-potsdam.de/copan/software>
+# Contact: core@pik-potsdam.de
+# License: BSD 2-clause license
+
+import os
+import pickle
+
+from pycopancore.data_model import Variable
+
+from ._abstract_entity_mixin import _AbstractEntityMixin
+from ._abstract_process import _AbstractProcess
+from ._abstract_process_taxon_mixin import _AbstractProcessTaxonMixin
+
+
+class _CheckpointPickler(pickle.Pickler):
+    """Pickler storing model objects as references."""
+
+    def __init__(self, file, model):
+        super().__init__(file, pickle.HIGHEST_PROTOCOL)
+        self.model = model
+        self.classes = set(model.entity_types + model.process_taxa)
+
+    def persistent_id(self, obj):
+        if isinstance(obj, _AbstractEntityMixin):
+            return ("entity", obj.__class__.__name__, obj._uid)
+        if isinstance(obj, _AbstractProcessTaxonMixin):
+            return ("taxon", obj.__class__.__name__)
+        if isinstance(obj, type) and obj in self.classes:
+            return ("class", obj.__name__)
+        if isinstance(obj, Variable) and obj.owning_class is not None:
+            return ("variable", obj.owning_class.__name__, obj.codename)
+        if isinstance(obj, _AbstractProcess) and obj.owning_class is not None:
+            return ("process", obj.owning_class.__name__, obj.name)
+        if obj is self.model:
+            return ("model",)
+        return None
+
+
+class _CheckpointUnpickler(pickle.Unpickler):
+    """Unpickler resolving the references stored by _CheckpointPickler
+    against a model."""
+
+    def __init__(self, file, model):
+        super().__init__(file)
+        self.model = model
+        self.classes = {cls.__name__: cls
+                        for cls in model.entity_types + model.process_taxa}
+        self.entities = {}
+        for cls in model.entity_types:
+            for inst in (cls.instances or []) \
+                    + (getattr(cls, "idle_entities", None) or []):
+                self.entities[(cls.__name__, inst._uid)] = inst
+
+    def persistent_load(self, pid):
+        kind = pid[0]
+        if kind == "entity":
+            key = pid[1:]
+            try:
+                return self.entities[key]
+            except KeyError:
+                # an entity created during the run:
+                cls = self.classes[key[0]]
+                inst = object.__new__(cls)
+                self.entities[key] = inst
+                return inst
+        if kind == "taxon":
+            cls = self.classes[pid[1]]
+            if not cls.instances:
+                # (its attributes are set from the snapshot)
+                cls.instances = [object.__new__(cls)]
+            return cls.instances[0]
+        if kind == "class":
+            return self.classes[pid[1]]
+        if kind == "variable":
+            return getattr(self.classes[pid[1]], pid[2])
+        if kind == "process":
+            matches = [p for p in self.model.processes
+                       if p.owning_class is self.classes[pid[1]]
+                       and p.name == pid[2]]
+            assert len(matches) == 1, \
+                "process " + pid[2] + " of " + pid[1] + " not unique"
+            return matches[0]
+        if kind == "model":
+            return self.model
+        raise pickle.UnpicklingError("unknown reference " + repr(pid))
+
+
+def write_checkpoint(filename, model, state):
+    """write the dict state, which may refer to objects of model, to a
+    checkpoint file (replacing an existing one only when complete)"""
+    temporary = filename + ".tmp"
+    with open(temporary, "wb") as dumpfile:
+        _CheckpointPickler(dumpfile, model).dump(state)
+    os.replace(temporary, filename)
+
+
+def read_checkpoint(filename, model):
+    """read the dict stored in a checkpoint file, resolving its references
+    against model"""
+    with open(filename, "rb") as loadfile:
+        return _CheckpointUnpickler(loadfile, model).load()
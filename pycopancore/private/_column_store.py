@@ -0,0 +1,186 @@
+"""_ColumnStore class.
+
+Optional columnar storage of Variable values. If a model is configured with
+columnar=True, each composed entity-type or process taxon class owns a
+_ColumnStore that keeps one contiguous numpy array per float-valued Variable
+(plus one for its derivative "d_" attribute), indexed by the instances'
+_index attribute. The corresponding attributes of the composed class are
+replaced by _ColumnAttribute descriptors, so that ordinary attribute access
+on an instance reads and writes these arrays, while the runner can read and
+write whole columns at once.
+"""
+
+# This file is part of pycopancore.
+#
+# Copyright (C) 2016-2017 by COPAN team at Potsdam Institute for Climate
+# Impact Research
+#
+# URL: <http://www.pik-potsdam.de/copan/software>
+# Contact: core@pik-potsdam.de
+# License: BSD 2-clause license
+
+import numpy as np
+
+from pycopancore.data_model.dimensional_quantity import DimensionalQuantity
+
+
+class _ColumnStore(object):
+    """Columns of Variable values of all instances of one composed class."""
+
+    composed_class = None
+    """the entity-type or process taxon class owning the store"""
+    variables = None
+    """list of Variables stored in columns"""
+    columns = None
+    """dict mapping attribute names (codenames and "d_" + codenames)
+    to numpy arrays"""
+    size = None
+    """no. of rows allocated so far (one per instance ever created)"""
+    capacity = None
+    """current length of the column arrays"""
+
+    _is_set = None
+    """dict mapping codenames to boolean arrays marking assigned values"""
+    _active_indices = None
+    """cache of the rows of the active instances, in the order of
+    composed_class.instances"""
+
+    def __init__(self, composed_class, variables, capacity=16):
+        self.composed_class = composed_class
+        self.variables = list(variables)
+        self.size = 0
+        self.capacity = capacity
+        self.columns = {}
+        self._is_set = {}
+        for var in self.variables:
+            self.columns[var.codename] = np.full(capacity, np.nan)
+            self.columns["d_" + var.codename] = np.zeros(capacity)
+            self._is_set[var.codename] = np.zeros(capacity, dtype=bool)
+        self._active_indices = None
+
+    @staticmethod
+    def is_eligible(var, parents):
+        """whether var can be stored in a column of a composed class
+        with the given parent classes"""
+        from pycopancore.data_model import ReferenceVariable, SetVariable
+        if isinstance(var, (ReferenceVariable, SetVariable)):
+            return False
+        if var.datatype is not float or var.array_shape is not None \
+                or var.readonly or var.allow_none:
+            return False
+        # variables implemented via properties keep their own logics:
+        return not any(isinstance(c.__dict__.get(var.codename), property)
+                       for c in parents)
+
+    @classmethod
+    def install(cls, composed_class, variables):
+        """create a store for composed_class and replace the class
+        attributes of the given Variables by descriptors"""
+        store = cls(composed_class, variables)
+        for var in store.variables:
+            setattr(composed_class, var.codename, _ColumnAttribute(store, var))
+            setattr(composed_class, "d_" + var.codename,
+                    _ColumnAttribute(store, var, derivative=True))
+            var._column_store = store
+        composed_class._column_store = store
+        return store
+
+    @staticmethod
+    def uninstall(composed_class):
+        """remove a previously installed store and its descriptors"""
+        for name, attr in list(composed_class.__dict__.items()):
+            if isinstance(attr, _ColumnAttribute):
+                attr.variable._column_store = None
+                delattr(composed_class, name)
+        composed_class._column_store = None
+
+    def allocate(self, instance):
+        """assign a new row to instance and return its index"""
+        if self.size == self.capacity:
+            self._grow()
+        index = self.size
+        self.size += 1
+        # (the row may have been used by an instance forgotten by clear or
+        # by restoring a snapshot):
+        for name, column in self.columns.items():
+            column[index] = 0. if name.startswith("d_") else np.nan
+        for is_set in self._is_set.values():
+            is_set[index] = False
+        instance._index = index
+        return index
+
+    def _grow(self):
+        """double the capacity of all columns"""
+        newcapacity = 2 * self.capacity
+        for name, column in self.columns.items():
+            newcolumn = np.full(newcapacity, np.nan) \
+                if not name.startswith("d_") else np.zeros(newcapacity)
+            newcolumn[:self.capacity] = column
+            self.columns[name] = newcolumn
+        for name, is_set in self._is_set.items():
+            newis_set = np.zeros(newcapacity, dtype=bool)
+            newis_set[:self.capacity] = is_set
+            self._is_set[name] = newis_set
+        self.capacity = newcapacity
+
+    def clear(self):
+        """forget all rows, e.g. after all instances have been deleted"""
+        self.size = 0
+        for is_set in self._is_set.values():
+            is_set[:] = False
+        self._active_indices = None
+
+    def indices(self, instances):
+        """return array of the rows of the given instances"""
+        return np.fromiter((i._index for i in instances), dtype=int,
+                           count=len(instances))
+
+    @property  # read-only
+    def active_indices(self):
+        """array of the rows of the active instances,
+        in the order of composed_class.instances"""
+        if self._active_indices is None:
+            self._active_indices = self.indices(
+                self.composed_class.instances or [])
+        return self._active_indices
+
+    def invalidate(self):
+        """mark the cache of active rows as outdated"""
+        self._active_indices = None
+
+
+class _ColumnAttribute(object):
+    """Descriptor giving instances attribute access to a store's column."""
+
+    def __init__(self, store, variable, derivative=False):
+        self.store = store
+        self.variable = variable
+        self.derivative = derivative
+        self.name = ("d_" if derivative else "") + variable.codename
+
+    def __get__(self, instance, owner):
+        if instance is None:
+            if self.derivative:
+                raise AttributeError(self.name)
+            # class attribute access returns the Variable object as before:
+            return self.variable
+        # (raises AttributeError if no row was allocated yet:)
+        index = instance._index
+        value = self.store.columns[self.name].item(index)
+        if value != value and not self.derivative \
+                and not self.store._is_set[self.name][index]:
+            # NaN in an unassigned row means the value was never set:
+            raise AttributeError(self.name)
+        return value
+
+    def __set__(self, instance, value):
+        store = self.store
+        try:
+            index = instance._index
+        except AttributeError:
+            index = store.allocate(instance)
+        if isinstance(value, DimensionalQuantity):
+            value = value.number(unit=self.variable.unit)
+        store.columns[self.name][index] = value
+        if not self.derivative:
+            store._is_set[self.name][index] = True
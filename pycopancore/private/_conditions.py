@@ -0,0 +1,149 @@
+"""_ConditionTracker class.
+
+Monitors symbolic conditions on the state during ODE integration, such as
+B.World.atmospheric_carbon > 1000, which are either the conditions of
+Events of type "condition" or termination conditions of a Runner.
+
+Each condition is an inequality (>, >=, <, <=) between symbolic
+expressions, and is evaluated for all instances of the owning class of its
+expressions. It is turned into a residual (left minus right hand side, or
+vice versa) that becomes nonnegative when the condition becomes true. After
+each accepted solver step, the tracker compares the residuals with those
+after the previous step, and the Runner locates the first crossing by
+root finding (see locate_crossing) and stops the solver there. It then
+performs the Events of all residuals that have become nonnegative by that
+time (see advance), since several instances or conditions may cross
+simultaneously, or ends the run.
+
+Only crossings during integration are detected, i.e., not those caused by
+Steps or Events, and a condition that is true at the start of a smooth
+interval must become false before it can trigger again.
+"""
+
+# This file is part of pycopancore.
+#
+# Copyright (C) 2016-2017 by COPAN team at Potsdam Institute for Climate
+# Impact Research
+#
+# URL: <http://www.pik-potsdam.de/copan/software>
+# Contact: core@pik-potsdam.de
+# License: BSD 2-clause license
+
+import numpy as np
+import sympy as sp
+
+from ._expressions import eval, get_vars
+
+
+def residual_expression(condition):
+    """return a symbolic expression that is nonnegative iff condition
+    (an inequality) is true (up to the case of equality)"""
+    if isinstance(condition, (sp.StrictGreaterThan, sp.GreaterThan)):
+        return condition.lhs - condition.rhs
+    if isinstance(condition, (sp.StrictLessThan, sp.LessThan)):
+        return condition.rhs - condition.lhs
+    raise ValueError("condition must be an inequality, not "
+                     + repr(condition))
+
+
+def condition_dependencies(condition):
+    """return the set of Variables a condition depends on"""
+    return get_vars(residual_expression(condition))
+
+
+class _ConditionTracker(object):
+    """Residuals of the conditions monitored during integration."""
+
+    runner = None
+    """the Runner, which writes states into the instances"""
+    items = None
+    """list of pairs (residual expression, Event or None), where None
+    marks a termination condition"""
+    lens = None
+    """list of the no. of values of each residual expression in the latest
+    evaluation"""
+    previous = None
+    """array of the residuals at the start of the current solver step"""
+    latest = None
+    """array of the residuals at the end of the current solver step"""
+
+    def __init__(self, runner, conditions, events):
+        """Instantiate a tracker.
+
+        Parameters
+        ----------
+        runner : Runner
+        conditions : list
+            termination conditions
+        events : list
+            Events of type "condition"
+        """
+        self.runner = runner
+        self.items = [(residual_expression(condition), None)
+                      for condition in conditions] \
+            + [(residual_expression(event.specification[1]), event)
+               for event in events]
+        self.lens = []
+
+    def residuals(self, t, value_array):
+        """return the residuals of all conditions at the state value_array
+        at time t, which is written into the instances"""
+        self.runner.hold_state(t, value_array)
+        iteration = self.runner._current_iteration
+        self.lens = []
+        parts = []
+        for expr, event in self.items:
+            values = np.atleast_1d(eval(expr, iteration)).astype(float)
+            if event is not None:
+                values = np.broadcast_to(
+                    values, len(event.owning_class.instances))
+            self.lens.append(len(values))
+            parts.append(values)
+        return np.concatenate(parts)
+
+    def start(self, t, value_array):
+        """evaluate the residuals at the start of a smooth interval"""
+        self.previous = self.residuals(t, value_array)
+
+    def crossed(self, t, value_array):
+        """return the indices of the residuals that have become
+        nonnegative during the latest solver step (which becomes the
+        current step until accept is called)"""
+        self.latest = self.residuals(t, value_array)
+        return np.flatnonzero((self.previous < 0) & (self.latest >= 0))
+
+    def accept(self):
+        """note that the solver continues after the latest step, since no
+        crossing occurred during it"""
+        self.previous = self.latest
+
+    def advance(self, t, value_array):
+        """End the current solver step early at time t, where the state is
+        value_array.
+
+        Returns
+        -------
+        list
+            pairs (Event, instance), or (None, None) for termination
+            conditions, of all residuals that have become nonnegative
+            between the start of the step and t (besides the one located
+            by the Runner, e.g. those of other instances crossing at the
+            same time)
+        """
+        current = self.residuals(t, value_array)
+        due = [self.item(index) for index in
+               np.flatnonzero((self.previous < 0) & (current >= 0))]
+        self.previous = current
+        return due
+
+    def item(self, index):
+        """return the pair (Event, instance) of the residual with the
+        given index, or (None, None) if it belongs to a termination
+        condition"""
+        for (expr, event), n in zip(self.items, self.lens):
+            if index < n:
+                if event is None:
+                    return None, None
+                return event, event.owning_class.instances[index]
+            index -= n
+        raise IndexError(index)
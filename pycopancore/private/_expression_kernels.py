@@ -0,0 +1,327 @@
+"""_ExpressionKernel class.
+
+Compiles a symbolic expression from a process specification into a flat
+Python function that evaluates the expression for all instances at once
+using numpy only. This avoids the recursive interpretation of the sympy
+tree done by _expressions.eval in every right-hand side call: the tree is
+walked once per structure resolution, at which point the broadcasting index
+arrays and aggregation segment lengths are precomputed, and leaf values are
+read either directly from _ColumnStore columns or by a single getattr per
+instance.
+
+The semantics (broadcasting to the longest cardinalities, Piecewise, ITE,
+Heaviside, invalid powers set to zero) mirror those of _expressions._eval.
+
+The generated functions are not jit-compiled with numba (although it is a
+dependency, see util.seeding): each consists of a few whole-array numpy
+operations whose per-element work already runs in compiled code, while the
+remaining time is spent reading leaf values from Python objects (getattr per
+instance, or a column looked up in a dict), which numba's nopython mode
+cannot compile. Moreover, a kernel is regenerated after every change of the
+entity structure since its index arrays are constants of the code, so that
+numba's compilation time would be paid again each time.
+"""
+
+# This file is part of pycopancore.
+#
+# Copyright (C) 2016-2017 by COPAN team at Potsdam Institute for Climate
+# Impact Research
+#
+# URL: <http://www.pik-potsdam.de/copan/software>
+# Contact: core@pik-potsdam.de
+# License: BSD 2-clause license
+
+import logging
+
+import numpy as np
+import sympy as sp
+
+from pycopancore import data_model as D
+from ._simple_expressions import unknown
+from ._expressions import _DotConstruct, broadcast, func2numpy, \
+    binary2numpy, name2aggregation
+
+
+_nary_folds = {
+    sp.And: np.logical_and,
+    sp.Or: np.logical_or,
+    sp.Xor: np.logical_xor,
+    sp.Equivalent: np.logical_xor,  # negated afterwards
+    sp.Nand: np.logical_and,  # negated afterwards
+    sp.Nor: np.logical_or,  # negated afterwards
+    sp.Max: np.maximum,
+    sp.Min: np.minimum,
+}
+_negated_folds = (sp.Equivalent, sp.Nand, sp.Nor)
+
+logger = logging.getLogger(__name__)
+
+have_warned = False
+
+
+def _pow(base, exponent):
+    """power with invalid results replaced by zero, as in _expressions"""
+    vals = np.asarray(base ** exponent)
+    isn = np.isnan(vals.astype("float"))
+    if np.any(isn):
+        global have_warned
+        if not have_warned:
+            have_warned = True
+            logger.warning("invalid value encountered in power")
+        vals = np.where(isn, 0, vals)
+    return vals
+
+
+def _is_leaf(expr):
+    return isinstance(expr, (D.Variable, _DotConstruct))
+
+
+def _is_constant(expr):
+    return isinstance(expr, (bool, int, float)) \
+        or (isinstance(expr, sp.Basic) and len(expr.args) == 0
+            and not isinstance(expr, sp.Symbol))
+
+
+def check_supported(expr):
+    """raise NotImplementedError if expr contains a construct that cannot be
+    compiled into a kernel"""
+    if _is_leaf(expr):
+        if isinstance(expr, _DotConstruct) and expr._aggregation:
+            if expr._aggregation not in name2aggregation \
+                    or expr._argument is None:
+                raise NotImplementedError(str(expr))
+            check_supported(expr._argument)
+        return
+    if _is_constant(expr):
+        return
+    t = type(expr)
+    if t == sp.Piecewise:
+        if expr.args[-1][1] != sp.true:
+            raise NotImplementedError(
+                "Piecewise without final (value, True) pair: " + str(expr))
+        for arg in expr.args:
+            check_supported(arg[0])
+            check_supported(arg[1])
+        return
+    if not (t in (sp.Not, sp.ITE, sp.Add, sp.Mul, sp.Pow)
+            or t in binary2numpy or t in _nary_folds
+            or t in func2numpy):
+        raise NotImplementedError(
+            "cannot compile " + str(t) + " in " + str(expr))
+    for arg in expr.args:
+        check_supported(arg)
+
+
+def _leaf_reader(expr):
+    """return a function without arguments that returns the current array
+    of values of a non-aggregating Variable or _DotConstruct"""
+    if isinstance(expr, D.Variable):
+        var = expr
+        instances = var.owning_class.instances
+    else:
+        var = expr.target_variable
+        instances = expr.target_instances
+    codename = var.codename
+    store = var._column_store
+    if store is not None:
+        columns = store.columns
+        rows = store.indices(instances)
+        # (columns are looked up at call time since they may be regrown)
+        return lambda: columns[codename][rows]
+    return lambda: np.array([getattr(i, codename) for i in instances])
+
+
+def _segment_reduction(name, lens):
+    """return a function aggregating a values array over consecutive
+    segments of the given lengths"""
+    lens = list(lens)
+    n = len(lens)
+    if name == "sum":
+        segments = np.repeat(np.arange(n), np.array(lens, dtype=int))
+
+        def reduce(values):
+            if len(values) == 0:
+                return np.zeros(n)
+            return np.bincount(segments, weights=values, minlength=n)
+        return reduce
+    func = name2aggregation[name]
+
+    def reduce(values):
+        if len(values) == 0:
+            return np.zeros(n)
+        return np.array(func(np.asarray(values), lens))
+    return reduce
+
+
+def compile_kernels(specification):
+    """return a list of _ExpressionKernels for a process specification that
+    is a list of symbolic expressions, or None if it is a method or contains
+    constructs that cannot be compiled (then _expressions.eval is used)"""
+    if not isinstance(specification, list):
+        return None
+    try:
+        return [_ExpressionKernel(expr) for expr in specification]
+    except NotImplementedError as e:
+        logger.debug("      (not compiled: %s)", e)
+        return None
+
+
+class _ExpressionKernel(object):
+    """Vectorized evaluation function of one symbolic expression.
+
+    Calling the kernel returns the same values as _expressions.eval(expr).
+    The generated code depends on the current entity structure (which
+    instances exist and how they reference each other), so invalidate()
+    must be called whenever that might have changed. The code is then
+    regenerated at the next call.
+    """
+
+    expr = None
+    """the compiled sympy expression"""
+    source = None
+    """the generated Python source (for inspection)"""
+    cardinalities = None
+    """the cardinalities of the result, as in _expressions._eval"""
+    branchings = None
+    """the branchings of the result, as in _expressions._eval"""
+    size = None
+    """the length of the result"""
+
+    _function = None
+    """the generated function, or None if not resolved"""
+
+    def __init__(self, expr):
+        check_supported(expr)
+        self.expr = expr
+        self._function = None
+
+    def invalidate(self):
+        """mark the generated code as outdated"""
+        self._function = None
+
+    def __call__(self):
+        if self._function is None:
+            self.resolve()
+        return self._function()
+
+    def resolve(self):
+        """generate the evaluation function for the current entity
+        structure"""
+        self._namespace = {"np": np}
+        self._lines = []
+        self._leaf_names = {}
+        self._count = 0
+        code, self.cardinalities, self.branchings, self.size = \
+            self._compile(self.expr)
+        self.source = "def _kernel():\n" \
+            + "".join("    " + line + "\n" for line in self._lines) \
+            + "    return " + code + "\n"
+        exec(compile(self.source, "<kernel>", "exec"), self._namespace)
+        self._function = self._namespace["_kernel"]
+        del self._lines, self._leaf_names
+
+    def _name(self, prefix, obj=None):
+        """return a fresh local name, binding obj to it in the namespace"""
+        name = "_" + prefix + str(self._count)
+        self._count += 1
+        if obj is not None:
+            self._namespace[name] = obj
+        return name
+
+    def _compile(self, expr):
+        """return the code, cardinalities, branchings and result size of a
+        subexpression"""
+        if _is_leaf(expr):
+            return self._compile_leaf(expr)
+        if _is_constant(expr):
+            if expr is True or expr == sp.true:
+                value = True
+            elif expr is False or expr == sp.false:
+                value = False
+            else:
+                value = float(expr)
+            return self._name("c", np.array([value])), [1], [], 1
+        t = type(expr)
+        if t == sp.Piecewise:
+            operands = [a[0] for a in expr.args] \
+                + [a[1] for a in expr.args[:-1]]
+        else:
+            operands = expr.args
+        codes, cardinalities, branchings, size = \
+            self._compile_operands(operands)
+        if t == sp.Piecewise:
+            n = len(expr.args)
+            code = codes[n - 1]
+            for i in reversed(range(n - 1)):
+                # "==" is correct here, see _expressions._eval:
+                code = "np.where(" + codes[n + i] + " == True, " \
+                    + codes[i] + ", " + code + ")"
+        elif t == sp.ITE:
+            code = "np.where(" + codes[0] + " == True, " + codes[1] + ", " \
+                + codes[2] + ")"
+        elif t == sp.Not:
+            code = "np.logical_not(" + codes[0] + ")"
+        elif t == sp.Add:
+            code = "(" + " + ".join(codes) + ")"
+        elif t == sp.Mul:
+            code = "(" + " * ".join(codes) + ")"
+        elif t == sp.Pow:
+            code = self._name("f", _pow) + "(" + ", ".join(codes) + ")"
+        elif t in binary2numpy:
+            code = self._name("f", binary2numpy[t]) + "(" + ", ".join(codes) \
+                + ")"
+        elif t in _nary_folds:
+            fname = self._name("f", _nary_folds[t])
+            code = codes[0]
+            for c in codes[1:]:
+                code = fname + "(" + code + ", " + c + ")"
+            if t in _negated_folds:
+                code = "np.logical_not(" + code + ")"
+        else:
+            code = self._name("f", func2numpy[t]) + "(" + ", ".join(codes) \
+                + ")"
+        return code, cardinalities, branchings, size
+
+    def _compile_operands(self, operands):
+        """compile operands and broadcast all to the longest cardinalities"""
+        compiled = [self._compile(arg) for arg in operands]
+        longest = np.argmax([len(c[1]) for c in compiled])
+        code, cardinalities, branchings, size = compiled[longest]
+        codes = []
+        for i, (c, cards, brs, s) in enumerate(compiled):
+            if i != longest and s != 1 and s != size:
+                # (size-1 operands are broadcast by numpy itself)
+                pos = cardinalities.index(s)
+                index = broadcast(np.arange(s), branchings[pos:]).astype(int)
+                c = c + "[" + self._name("b", index) + "]"
+            codes.append(c)
+        return codes, cardinalities, branchings, size
+
+    def _compile_leaf(self, expr):
+        """compile a Variable or _DotConstruct, reading its values once into
+        a local variable"""
+        try:
+            return self._leaf_names[expr]
+        except KeyError:
+            pass
+        if isinstance(expr, _DotConstruct):
+            # reanalyse the possibly changed entity structure:
+            expr._target_instances = unknown
+        if isinstance(expr, _DotConstruct) and expr._aggregation:
+            argcode, argcards, argbrs, argsize = \
+                self._compile(expr._argument)
+            lens = expr._aggregation_lens(expr._items(), argcards, argbrs)
+            reducer = self._name("a", _segment_reduction(expr._aggregation,
+                                                         lens))
+            size = len(lens)
+            local = self._name("v")
+            self._lines.append(local + " = " + reducer + "(" + argcode + ")")
+        else:
+            reader = self._name("r", _leaf_reader(expr))
+            size = len(expr.target_instances)
+            local = self._name("v")
+            self._lines.append(local + " = " + reader + "()")
+        result = (local, expr.cardinalities, expr.branchings, size)
+        self._leaf_names[expr] = result
+        return result
+
@@ -14,6 +14,8 @@
 
 # defines logics to deal with symbolic expressions and their evaluation
 
+import logging
+
 import numpy as np
 import sympy as sp
 from sympy.functions.elementary.piecewise import ExprCondPair
@@ -143,6 +145,11 @@ class _DotConstruct(sp.AtomicExpr):
     _initialized = None
     """whether it was initialized already"""
 
+    _target_rows_cache = None
+    """cache of the target instances' rows in the target's _ColumnStore"""
+    _target_rows_instances = None
+    """the list of target instances the rows cache was computed for"""
+
     # needed to make sympy happy:
     _argset = ()
     args = ()
@@ -412,11 +419,11 @@ class _DotConstruct(sp.AtomicExpr):
 
     # TODO add a method that differentiates symbolically w.r.t. some variable?
 
-    def eval(self, instances=None):
-        """gets referenced attribute values and performs aggregations
-        where necessary.
-        """
-#        print("eval",self)
+    def _items(self, instances=None):
+        """follow the attribute sequence starting at the given instances
+        (default: all instances of the owning class) and return the list of
+        reached items. If this is an aggregation, the items are the
+        instances over which the aggregation is performed."""
         try:
             items = self.owning_class.instances if instances is None else instances
         except:
@@ -432,24 +439,39 @@ class _DotConstruct(sp.AtomicExpr):
             else:
                 items = [getattr(i, name) for i in items]
         if self._aggregation:
-            assert self._argument is not None, "aggregation without argument"
             # make sure items is list of instances not list of sets:
             if len(items) > 0 and hasattr(items[0], "__iter__"):
                 items = [i
                          for instance_set in items
                          for i in instance_set]
+        return items
+
+    def _aggregation_lens(self, items, cardinalities, branchings):
+        """return the list of segment lengths over which the argument values
+        (whose layout is given by cardinalities and branchings)
+        are aggregated, one segment for each of the items"""
+        try:
+            aggregation_level = cardinalities.index(len(items))
+        except:
+            aggregation_level = len(cardinalities) - 1
+        layout = branchings[aggregation_level:] \
+            if aggregation_level < len(cardinalities) - 1 \
+            else [[1 for i in items]]
+        return layout2lens(layout)
+
+    def eval(self, instances=None):
+        """gets referenced attribute values and performs aggregations
+        where necessary.
+        """
+#        print("eval",self)
+        items = self._items(instances)
+        if self._aggregation:
+            assert self._argument is not None, "aggregation without argument"
             # sic! (not items!):
             arg_values = eval(self._argument, instances)
             cardinalities, branchings = \
                 get_cardinalities_and_branchings(self._argument)
-            try:
-                aggregation_level = cardinalities.index(len(items))
-            except:
-                aggregation_level = len(cardinalities) - 1
-            layout = branchings[aggregation_level:] \
-                if aggregation_level < len(cardinalities) - 1 \
-                else [[1 for i in items]]
-            lens = layout2lens(layout)
+            lens = self._aggregation_lens(items, cardinalities, branchings)
             items = name2aggregation[self._aggregation](arg_values, lens) \
                         if len(arg_values) > 0 else [0 for l in lens]
 #            print("aggregation",self,items)
@@ -463,12 +485,30 @@ class _DotConstruct(sp.AtomicExpr):
             values = broadcast(values, self.branchings[value_level:])
         return values
 
+    def _target_rows(self):
+        """return the target variable's _ColumnStore and the array of the
+        target instances' rows in it, or (None, None) if the target
+        variable is not stored in columns"""
+        store = self.target_variable._column_store
+        if store is None:
+            return None, None
+        instances = self.target_instances
+        if self._target_rows_instances is not instances:
+            # target instances have been reanalysed since last call:
+            self._target_rows_cache = store.indices(instances)
+            self._target_rows_instances = instances
+        return store, self._target_rows_cache
+
     def add_values(self, values):
         """adds summands to referenced attribute values"""
         assert self._can_be_target, "cannot serve as target"
         # broadcast values if necessary:
         values = self._broadcast(values)
         name = self._attribute_sequence[-1]
+        store, rows = self._target_rows()
+        if store is not None:
+            np.add.at(store.columns[name], rows, values)
+            return
         for pos, i in enumerate(self.target_instances):
             setattr(i, name, getattr(i, name) + values[pos])
 
@@ -478,6 +518,11 @@ class _DotConstruct(sp.AtomicExpr):
         # broadcast values if necessary:
         values = self._broadcast(values)
         dname = "d_" + self._attribute_sequence[-1]
+        store, rows = self._target_rows()
+        if store is not None:
+            # (np.add.at accumulates correctly for repeated rows)
+            np.add.at(store.columns[dname], rows, values)
+            return
         for pos, i in enumerate(self.target_instances):
             setattr(i, dname, getattr(i, dname) + values[pos])
 
@@ -487,6 +532,10 @@ class _DotConstruct(sp.AtomicExpr):
         # broadcast values if necessary:
         values = self._broadcast(values)
         name = self._attribute_sequence[-1]
+        store, rows = self._target_rows()
+        if store is not None:
+            store.columns[name][rows] = values
+            return
         for pos, i in enumerate(self.target_instances):
             setattr(i, name, values[pos])
 
@@ -544,6 +593,8 @@ nary2numpy = {
     sp.Xor: np.logical_xor,
 }
 
+logger = logging.getLogger(__name__)
+
 _cached_values = {}
 _cached_iteration = None
 
@@ -676,8 +727,9 @@ def _eval(expr, iteration=None):
             global have_warned
             if not have_warned:
                 have_warned = True
-                print("Warning: invalid value encountered in power\nbase:",
-                      args[0], "=", base[wh], "\nexponent:", args[1], "=", exponent[wh])
+                logger.warning("invalid value encountered in power\n"
+                               "base: %s = %s\nexponent: %s = %s", args[0],
+                               base[wh], args[1], exponent[wh])
             vals[wh] = 0  # TODO: is this a good idea?
     # TODO: other types of expressions, including function evaluations!
     # other functions/unary operators:
@@ -0,0 +1,191 @@
+"""_HazardTracker class.
+
+Simulates rate Events whose rate varies with the state or time, i.e., whose
+rate is given by a symbolic expression or a method rather than a number.
+
+For each instance of the owning class of such an Event, the waiting time
+until its next occurrence is determined by drawing a threshold from the
+standard exponential distribution: the Event occurs as soon as its
+cumulative hazard, i.e., the integral of its rate since the previous
+occurrence, reaches the threshold. During ODE integration, the cumulative
+hazards of all instances are appended to the state array (with the rates as
+their derivatives), and the Runner stops the solver at the time at which
+the first of them reaches its threshold (see locate_crossing), which then
+is treated as the time of a discontinuity.
+
+Between two smooth intervals, the tracker keeps each instance's remaining
+hazard, i.e., its threshold minus the hazard accumulated since its previous
+occurrence, so that interrupting the integration at other discontinuities
+does not change the distribution of occurrence times.
+"""
+
+# This file is part of pycopancore.
+#
+# Copyright (C) 2016-2017 by COPAN team at Potsdam Institute for Climate
+# Impact Research
+#
+# URL: <http://www.pik-potsdam.de/copan/software>
+# Contact: core@pik-potsdam.de
+# License: BSD 2-clause license
+
+from numbers import Number
+
+import numpy as np
+import sympy as sp
+from scipy import sparse
+
+from ._expressions import eval, get_vars
+
+
+def has_varying_rate(event):
+    """return whether event is a rate Event whose rate is not a number"""
+    return event.specification[0] == "rate" \
+        and not isinstance(event.specification[1], Number)
+
+
+def rate_dependencies(event):
+    """return the set of Variables a varying rate depends on, or None if it
+    is given by a method"""
+    rate = event.specification[1]
+    if isinstance(rate, sp.Basic):
+        return get_vars(rate)
+    return None
+
+
+class _HazardTracker(object):
+    """Cumulative hazards of the instances of rate Events with varying
+    rates."""
+
+    events = None
+    """list of the Events"""
+    remaining = None
+    """dict mapping each Event to a dict mapping its instances to their
+    remaining hazards until the next occurrence"""
+    layout = None
+    """list of pairs (Event, list of instances), in the order of the
+    hazards in the state array"""
+    offset = None
+    """index of the first hazard in the state array"""
+    size = 0
+    """no. of hazards in the state array"""
+    thresholds = None
+    """array of the remaining hazards at the start of the current smooth
+    interval, in the order of the state array"""
+
+    def __init__(self, events):
+        self.events = list(events)
+        self.remaining = {event: {} for event in self.events}
+        self.layout = []
+
+    def resolve(self, offset):
+        """Determine the layout of the hazards for the current instances.
+
+        Draws thresholds for instances that are new (or active again) and
+        forgets those of instances that are no longer active.
+
+        Parameters
+        ----------
+        offset : int
+            index of the first hazard in the state array
+
+        Returns
+        -------
+        int
+            no. of hazards
+        """
+        self.layout = []
+        self.size = 0
+        for event in self.events:
+            instances = list(event.owning_class.instances or [])
+            remaining = self.remaining[event]
+            self.remaining[event] = {
+                inst: remaining[inst] if inst in remaining
+                else np.random.exponential()
+                for inst in instances}
+            self.layout.append((event, instances))
+            self.size += len(instances)
+        self.offset = offset
+        return self.size
+
+    def start(self):
+        """Prepare a smooth interval, returning the initial hazards (all
+        zero)"""
+        self.thresholds = np.array([
+            self.remaining[event][inst]
+            for event, instances in self.layout for inst in instances])
+        return np.zeros(self.size)
+
+    def rates(self, t, iteration):
+        """Return the current rates of all instances (those of symbolic
+        rates are evaluated at the state held by the instances, negative
+        ones are treated as zero)"""
+        result = np.empty(self.size)
+        pos = 0
+        for event, instances in self.layout:
+            n = len(instances)
+            rate = event.specification[1]
+            if isinstance(rate, sp.Basic):
+                values = eval(rate, iteration)
+            else:  # it's a method
+                values = [rate(inst, t) for inst in instances]
+            result[pos:pos + n] = values
+            pos += n
+        return np.maximum(result, 0)
+
+    def residuals(self, t, value_array):
+        """return the hazards in value_array minus the thresholds, which
+        become nonnegative when an Event occurs (at any time t)"""
+        return value_array[self.offset:self.offset + self.size] \
+            - self.thresholds
+
+    def crossed(self, t, value_array):
+        """return the indices of the hazards that have reached their
+        thresholds at the end of a solver step"""
+        return np.flatnonzero(self.residuals(t, value_array) >= 0)
+
+    def item(self, index):
+        """return the pair (Event, instance) of the hazard with the given
+        index"""
+        for event, instances in self.layout:
+            if index < len(instances):
+                return event, instances[index]
+            index -= len(instances)
+        raise IndexError(index)
+
+    def advance(self, value_array):
+        """Reduce the remaining hazards by those accumulated during the
+        smooth interval that ended with the state value_array.
+
+        Returns
+        -------
+        list
+            pairs (Event, instance) whose remaining hazard is used up
+            (besides the one located by the Runner, those that reached
+            their thresholds within the root finder's tolerance)
+        """
+        hazards = value_array[self.offset:self.offset + self.size]
+        due = []
+        pos = 0
+        for event, instances in self.layout:
+            remaining = self.remaining[event]
+            for inst in instances:
+                remaining[inst] -= hazards[pos]
+                if remaining[inst] <= 0:
+                    due.append((event, inst))
+                pos += 1
+        return due
+
+    def fire(self, event, inst):
+        """draw a new threshold after an occurrence of event at inst"""
+        self.remaining[event][inst] = np.random.exponential()
+
+    def sparsity(self, ode_sparsity):
+        """return the sparsity pattern of the Jacobian including the
+        hazards, given that of the ODE system (the rates may depend on
+        all ODE variables, but not on the hazards)"""
+        n = ode_sparsity.shape[0]
+        return sparse.bmat(
+            [[ode_sparsity, sparse.csr_matrix((n, self.size), dtype=bool)],
+             [sparse.csr_matrix(np.ones((self.size, n), dtype=bool)),
+              sparse.csr_matrix((self.size, self.size), dtype=bool)]],
+            format="csr")
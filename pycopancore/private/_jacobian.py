@@ -0,0 +1,309 @@
+"""_JacobianBuilder class.
+
+Derives the sparsity pattern and, if all relevant specifications are
+symbolic, the analytic Jacobian of the composite ODE system, i.e., of
+Runner.get_rhs_array, w.r.t. the state vector composed of the slices
+var._from:var._to of the ODE target variables.
+
+Each symbolic expression is linearized by differentiating it (via sympy)
+w.r.t. each of its leaves (Variables and _DotConstructs, including
+aggregations). The partial derivatives are compiled into _ExpressionKernels,
+and the chain rule is applied via sparse matrices that encode broadcasting,
+references to other entities, aggregations and the dependency of Explicit
+targets on the state. For specification methods, only the model's
+dependency sets (ODE_dependencies, explicit_dependencies) are known, so
+they contribute conservative dense blocks to the sparsity pattern and
+prevent an analytic Jacobian.
+"""
+
+# This file is part of pycopancore.
+#
+# Copyright (C) 2016-2017 by COPAN team at Potsdam Institute for Climate
+# Impact Research
+#
+# URL: <http://www.pik-potsdam.de/copan/software>
+# Contact: core@pik-potsdam.de
+# License: BSD 2-clause license
+
+import numpy as np
+import sympy as sp
+from scipy import sparse
+
+from pycopancore import data_model as D
+from ._simple_expressions import unknown
+from ._expressions import _DotConstruct, broadcast
+from ._expression_kernels import _ExpressionKernel
+
+
+class _JacobianBuilder(object):
+    """Sparsity pattern and analytic Jacobian of a model's ODE system."""
+
+    model = None
+    """the configured model"""
+    size = None
+    """length of the state vector"""
+    sparsity = None
+    """sparse boolean matrix of structurally nonzero entries"""
+    analytic = None
+    """whether an analytic Jacobian is available"""
+
+    _linearizations = None
+    """dict mapping expressions to lists of (leaf, partial derivative kernel
+    or None if not compilable)"""
+    _kernels = None
+    """dict mapping expressions to _ExpressionKernels used for their
+    layout (cardinalities, branchings, size)"""
+    _explicit = None
+    """dict mapping Explicit target variables to (process, index, target)"""
+
+    def __init__(self, model):
+        self.model = model
+        self._linearizations = {}
+        self._kernels = {}
+        self._explicit = {}
+        for p in model.explicit_processes:
+            for i, target in enumerate(p.targets):
+                # (later processes overwrite earlier ones' values)
+                self._explicit[target.target_variable] = (p, i, target)
+
+    def resolve(self, target_variables, size):
+        """adapt to the current state vector layout given by the _from and _to
+        attributes of target_variables, and compute the sparsity pattern"""
+        self.size = size
+        self._state = {var: var._from for var in target_variables}
+        self._positions = {}
+        for kernel in self._kernels.values():
+            kernel.invalidate()
+        for linearization in self._linearizations.values():
+            for leaf, partial in linearization:
+                if partial is not None:
+                    partial.invalidate()
+        self.analytic = True
+        self._memo = {}
+        self.sparsity = self._system(pattern=True) != 0
+
+    def jacobian(self):
+        """return the Jacobian at the current state as a sparse matrix
+        (the state and Explicit targets must already be set)"""
+        assert self.analytic, "no analytic Jacobian available"
+        self._memo = {}
+        return self._system(pattern=False)
+
+    # matrix construction helpers:
+
+    def _zeros(self, rows):
+        return sparse.csr_matrix((rows, self.size))
+
+    def _dense_block(self, rows, deps):
+        """conservative block: all rows depend on all state columns reachable
+        from the variables deps"""
+        self.analytic = False
+        columns = self._reachable_columns(deps, set())
+        return sparse.csr_matrix(
+            (np.ones(rows * len(columns)),
+             (np.repeat(np.arange(rows), len(columns)),
+              np.tile(columns, rows))),
+            shape=(rows, self.size))
+
+    def _reachable_columns(self, deps, seen):
+        if deps is None or deps is unknown:
+            return np.arange(self.size)
+        columns = [np.zeros(0, dtype=int)]
+        for var in deps:
+            if var in self._state:
+                columns.append(np.arange(var._from, var._to))
+            elif var in self.model.explicit_dependencies and var not in seen:
+                seen.add(var)
+                columns.append(self._reachable_columns(
+                    self.model.explicit_dependencies[var], seen))
+        return np.unique(np.concatenate(columns))
+
+    def _positions_of(self, cls, instances):
+        """return array of positions of instances in cls.instances"""
+        try:
+            positions = self._positions[cls]
+        except KeyError:
+            positions = self._positions[cls] = \
+                {id(inst): pos for pos, inst in enumerate(cls.instances)}
+        return np.fromiter((positions[id(inst)] for inst in instances),
+                           dtype=int, count=len(instances))
+
+    def _kernel(self, expr):
+        """return a resolved kernel giving expr's layout"""
+        try:
+            kernel = self._kernels[expr]
+        except KeyError:
+            kernel = self._kernels[expr] = _ExpressionKernel(expr)
+        if kernel._function is None:
+            kernel.resolve()
+        return kernel
+
+    @staticmethod
+    def _broadcast_index(cardinalities, branchings, n, size):
+        """return the array mapping each of size result positions to one of
+        n positions at a coarser level"""
+        if n == size:
+            return np.arange(size)
+        if n == 1:
+            return np.zeros(size, dtype=int)
+        pos = cardinalities.index(n)
+        return broadcast(np.arange(n), branchings[pos:]).astype(int)
+
+    def _linearization(self, expr):
+        """return list of (leaf, partial derivative kernel) of expr"""
+        try:
+            return self._linearizations[expr]
+        except KeyError:
+            pass
+        result = []
+        if isinstance(expr, sp.Basic):
+            dummies = {leaf: sp.Dummy()
+                       for leaf in expr.atoms(D.Variable, _DotConstruct)}
+            back = {dummy: leaf for leaf, dummy in dummies.items()}
+            replaced = expr.xreplace(dummies)
+            for leaf, dummy in dummies.items():
+                partial = sp.diff(replaced, dummy).xreplace(back)
+                if partial == 0:
+                    continue
+                try:
+                    kernel = _ExpressionKernel(partial)
+                except NotImplementedError:
+                    kernel = None
+                result.append((leaf, kernel))
+        self._linearizations[expr] = result
+        return result
+
+    # chain rule:
+
+    def _system(self, pattern):
+        """return Jacobian (or its pattern) of the whole ODE system"""
+        model = self.model
+        jac = self._zeros(self.size)
+        for p in model.ODE_processes:
+            for i, target in enumerate(p.targets):
+                var = target.target_variable
+                rows = var._to - var._from
+                if p._kernels is None:
+                    # specification method, only dependencies are known:
+                    block = self._dense_block(
+                        rows, model.ODE_dependencies.get(var))
+                    jac += sparse.vstack([self._zeros(var._from), block,
+                                          self._zeros(self.size - var._to)])
+                    continue
+                derivs = self._expression(p.specification[i], pattern)
+                n = derivs.shape[0]
+                if isinstance(target, D.Variable):
+                    index = np.arange(rows) if n == rows \
+                        else np.zeros(rows, dtype=int)
+                    positions = np.arange(rows)
+                else:
+                    instances = target.target_instances
+                    index = self._broadcast_index(target.cardinalities,
+                                                  target.branchings,
+                                                  n, len(instances))
+                    positions = self._positions_of(var.owning_class,
+                                                   instances)
+                # map expression values to state rows (repeated rows add up):
+                mapping = sparse.csr_matrix(
+                    (np.ones(len(index)), (var._from + positions, index)),
+                    shape=(self.size, n))
+                jac += mapping @ derivs
+        return sparse.csr_matrix(jac)
+
+    def _expression(self, expr, pattern):
+        """return derivatives of expr's values w.r.t. the state vector"""
+        key = ("e", expr)
+        if key in self._memo:
+            return self._memo[key]
+        kernel = self._kernel(expr)
+        size = kernel.size
+        jac = self._zeros(size)
+        for leaf, partial in self._linearization(expr):
+            leafjac = self._leaf(leaf, pattern)
+            if leafjac.nnz == 0:
+                continue
+            n = leafjac.shape[0]
+            index = self._broadcast_index(kernel.cardinalities,
+                                          kernel.branchings, n, size)
+            if partial is None:
+                self.analytic = False
+            if pattern or partial is None:
+                weights = np.ones(size)
+            else:
+                values = np.asarray(partial(), dtype=float)
+                weights = values[self._broadcast_index(
+                    kernel.cardinalities, kernel.branchings,
+                    len(values), size)]
+            jac += sparse.csr_matrix((weights, (np.arange(size), index)),
+                                     shape=(size, n)) @ leafjac
+        self._memo[key] = jac
+        return jac
+
+    def _leaf(self, leaf, pattern):
+        """return derivatives of a leaf's values w.r.t. the state vector"""
+        if isinstance(leaf, _DotConstruct) and leaf._aggregation:
+            argkernel = self._kernel(leaf._argument)
+            lens = np.array(leaf._aggregation_lens(
+                leaf._items(), argkernel.cardinalities, argkernel.branchings),
+                dtype=int)
+            if leaf._aggregation == "sum":
+                weights = np.ones(lens.sum())
+            elif leaf._aggregation == "mean":
+                weights = np.repeat(1. / np.maximum(lens, 1), lens)
+            else:
+                # other aggregations are not (everywhere) differentiable:
+                self.analytic = False
+                weights = np.ones(lens.sum())
+            aggregation = sparse.csr_matrix(
+                (weights, (np.repeat(np.arange(len(lens)), lens),
+                           np.arange(lens.sum()))),
+                shape=(len(lens), argkernel.size))
+            return aggregation @ self._expression(leaf._argument, pattern)
+        if isinstance(leaf, D.Variable):
+            return self._variable(leaf, pattern)
+        leaf._target_instances = unknown
+        var = leaf.target_variable
+        instances = leaf.target_instances
+        selection = sparse.csr_matrix(
+            (np.ones(len(instances)),
+             (np.arange(len(instances)),
+              self._positions_of(var.owning_class, instances))),
+            shape=(len(instances), len(var.owning_class.instances)))
+        return selection @ self._variable(var, pattern)
+
+    def _variable(self, var, pattern):
+        """return derivatives of all instances' values of a variable w.r.t.
+        the state vector"""
+        key = ("v", var)
+        if key in self._memo:
+            result = self._memo[key]
+            if result is None:  # cyclic dependency
+                return self._dense_block(
+                    len(var.owning_class.instances),
+                    self.model.explicit_dependencies.get(var))
+            return result
+        self._memo[key] = None
+        rows = len(var.owning_class.instances)
+        if var in self._state:
+            result = sparse.csr_matrix(
+                (np.ones(rows), (np.arange(rows), var._from + np.arange(rows))),
+                shape=(rows, self.size))
+        elif var in self._explicit:
+            p, i, target = self._explicit[var]
+            if p._kernels is None or not isinstance(target, D.Variable):
+                result = self._dense_block(
+                    rows, self.model.explicit_dependencies.get(var))
+            else:
+                result = self._expression(p.specification[i], pattern)
+                if result.shape[0] != rows:
+                    # broadcast a single value to all instances:
+                    result = sparse.csr_matrix(
+                        (np.ones(rows), (np.arange(rows),
+                                         np.zeros(rows, dtype=int))),
+                        shape=(rows, result.shape[0])) @ result
+        else:
+            # neither state nor Explicit target, so constant between
+            # discontinuities:
+            result = self._zeros(rows)
+        self._memo[key] = result
+        return result
@@ -0,0 +1,164 @@
+"""Logging and progress reporting.
+
+All messages of copan:CORE are emitted via the standard library's logging
+module, using the logger "pycopancore" and the children named after the
+modules (e.g. "pycopancore.runners.runner"), so that they can be filtered,
+redirected or formatted like those of any other library.
+
+Verbosity levels (see set_verbosity):
+
+- "quiet": only warnings
+- "info": one message per model configuration and run
+- "debug": also the model's variables and processes at configuration, and
+  one message per smooth interval and discontinuity of a run
+- "trace": also one message per solver step and per Step or Event
+  instance
+
+Messages of the finer levels are only formatted if their level is enabled,
+and the Runner checks these levels once per run rather than in its inner
+loops, so that the default level adds no cost there.
+
+As is the convention for libraries, importing pycopancore only gives the
+logger "pycopancore" a NullHandler, so that the logging configuration of the
+application (e.g. logging.basicConfig) decides which messages are shown and
+where. Calling set_verbosity (or Runner.run with verbosity) installs a
+default handler writing to the current sys.stdout (so that redirecting it,
+e.g. with contextlib.redirect_stdout, silences them) unless called with
+handler=False.
+
+_Progress is a rate-limited progress bar for the model time of a run.
+"""
+
+# This file is part of pycopancore.
+#
+# Copyright (C) 2016-2017 by COPAN team at Potsdam Institute for Climate
+# Impact Research
+#
+# URL: <http://www.pik-potsdam.de/copan/software>
+# Contact: core@pik-potsdam.de
+# License: BSD 2-clause license
+
+import logging
+import sys
+from time import time
+
+TRACE = 5
+"""logging level of messages per solver step or instance"""
+logging.addLevelName(TRACE, "TRACE")
+
+levels = {
+    "quiet": logging.WARNING,
+    "info": logging.INFO,
+    "debug": logging.DEBUG,
+    "trace": TRACE,
+}
+"""dict mapping verbosity names to logging levels"""
+
+logger = logging.getLogger("pycopancore")
+"""parent logger of all copan:CORE messages"""
+
+
+class _StdoutHandler(logging.StreamHandler):
+    """StreamHandler writing to the current sys.stdout, which may have been
+    redirected since the handler was created."""
+
+    @property
+    def stream(self):
+        return sys.stdout
+
+    @stream.setter
+    def stream(self, value):
+        pass
+
+
+logger.addHandler(logging.NullHandler())
+
+_handler = _StdoutHandler()
+"""default handler of logger, installed by set_verbosity"""
+_handler.setFormatter(logging.Formatter("%(message)s"))
+
+
+def set_verbosity(verbosity, *, handler=True):
+    """Set the verbosity of all copan:CORE messages.
+
+    Parameters
+    ----------
+    verbosity : str or int
+        one of "quiet", "info", "debug", "trace", or a logging level
+    handler : bool, optional
+        whether messages are written to sys.stdout by the default handler
+        (default: True). If False, they are passed on to the handlers of
+        the application's root logger instead
+    """
+    logger.setLevel(levels.get(verbosity, verbosity))
+    if handler and _handler not in logger.handlers:
+        logger.addHandler(_handler)
+        # (so that the messages are not output twice if the application
+        # configures the root logger):
+        logger.propagate = False
+    elif not handler:
+        logger.removeHandler(_handler)
+        logger.propagate = True
+
+
+class _Progress(object):
+    """Progress bar showing the model time of a run, redrawn at most once
+    per interval of wall time."""
+
+    t_0 = None
+    """start time of the run"""
+    t_1 = None
+    """end time of the run"""
+    interval = None
+    """minimal wall time in seconds between two redraws"""
+    stream = None
+    """file the bar is written to"""
+    width = 30
+    """no. of characters of the bar"""
+    _start = None
+    """wall time at the start of the run"""
+    _next = None
+    """wall time of the next redraw"""
+
+    def __init__(self, t_0, t_1, *, interval=1., stream=None):
+        self.t_0 = t_0
+        self.t_1 = t_1
+        self.interval = interval
+        self.stream = sys.stderr if stream is None else stream
+        self._start = time()
+        self._next = self._start
+
+    @staticmethod
+    def wanted(stream=None):
+        """return whether a progress bar should be shown by default, i.e.,
+        whether stream (default: sys.stderr) is a terminal"""
+        stream = sys.stderr if stream is None else stream
+        try:
+            return stream.isatty()
+        except (AttributeError, ValueError):
+            return False
+
+    def update(self, t):
+        """redraw the bar for model time t if interval has passed"""
+        now = time()
+        if now < self._next:
+            return
+        self._next = now + self.interval
+        self._draw(t, now)
+
+    def _draw(self, t, now):
+        span = self.t_1 - self.t_0
+        fraction = min(max((t - self.t_0) / span, 0.), 1.) if span > 0 \
+            else 1.
+        filled = int(round(fraction * self.width))
+        self.stream.write("\r  [" + "#" * filled
+                          + "." * (self.width - filled) + "] "
+                          + "{:5.1f}% t={:<12g} {:.1f} s".format(
+                              100 * fraction, t, now - self._start))
+        self.stream.flush()
+
+    def close(self, t):
+        """draw the final state of the bar and end its line"""
+        self._draw(t, time())
+        self.stream.write("\n")
+        self.stream.flush()
@@ -87,6 +87,20 @@ class _Mixin(object, metaclass=_MixinType):
     """Active entities of this type"""
     _composite_class = None
     """Composite class this mixin contributes to in the current model"""
+    _column_store = None
+    """_ColumnStore holding the Variable values of all instances if the
+    model was configured with columnar=True"""
+    _structure_version = 0
+    """counter shared by all mixins, increased whenever instances are added,
+    deactivated, reactivated or deleted or references between instances
+    change (see _structure_changed).
+
+    The setters of reference attributes and the set_value methods of
+    ReferenceVariable and SetVariable increase it. Edits of networks (e.g.
+    Culture.acquaintance_network, from which Individual.acquaintances is
+    derived) and of set-valued attributes in place do not, but are detected
+    by the runner via a fingerprint of their contents (see
+    Runner.structure_fingerprint)."""
 
     # needed to make sphinx happy:
     __qualname__ = "pycopancore.private._mixin._Mixin"
@@ -132,6 +146,24 @@ class _Mixin(object, metaclass=_MixinType):
         for var, val in varvals.items():
             var.set_value(self, val)
 
+    @classmethod
+    def _instances_changed(cls):
+        """invalidate caches that depend on the list of active instances"""
+        if cls._column_store is not None:
+            cls._column_store.invalidate()
+        cls._structure_changed()
+
+    @staticmethod
+    def _structure_changed():
+        """note that the set of instances or the references between them
+        have changed, so that the runner rebuilds the state layout and the
+        instance caches of expressions before it next integrates.
+
+        Called by the setters of reference attributes and by the set_value
+        methods of ReferenceVariable and SetVariable. Custom setters that
+        re-link instances via other attributes must call it as well."""
+        _Mixin._structure_version += 1
+
     def complete_values(self):
         """assign default values to all unset Variables"""
         for var in self.variables:
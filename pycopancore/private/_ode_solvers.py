@@ -0,0 +1,299 @@
+"""_ODESolver classes.
+
+Backends used by the Runner to integrate the composite ODE system over one
+smooth interval between discontinuities. Each backend calls a callback at
+the initial point and after each accepted step, which the Runner uses to
+record the trajectory, optionally passing an interpolant of the step so
+that the solution can be output at arbitrary times (dense output).
+
+Available backends (see solvers):
+
+- "dopri5", "dop853": explicit Runge-Kutta methods of scipy.integrate.ode
+  using its solout mechanism (dopri5 is the historical default)
+- "RK45", "RK23", "DOP853": explicit Runge-Kutta methods of
+  scipy.integrate.solve_ivp
+- "LSODA", "BDF", "Radau": implicit or stiffness-switching methods of
+  scipy.integrate.solve_ivp, suitable for stiff models
+
+locate_crossing finds the time within a step at which some function of the
+state becomes nonnegative, using the step's interpolant, so that the Runner
+can stop the integration exactly there.
+"""
+
+# This file is part of pycopancore.
+#
+# Copyright (C) 2016-2017 by COPAN team at Potsdam Institute for Climate
+# Impact Research
+#
+# URL: <http://www.pik-potsdam.de/copan/software>
+# Contact: core@pik-potsdam.de
+# License: BSD 2-clause license
+
+import numpy as np
+from scipy import integrate
+from scipy.optimize import brentq
+
+
+def _hermite(t0, y0, f0, t1, y1, f1):
+    """return the cubic Hermite interpolant between two points (t0, y0) and
+    (t1, y1) with derivatives f0 and f1"""
+    h = t1 - t0
+
+    def interpolant(t):
+        if h == 0:
+            return y1
+        s = (t - t0) / h
+        return ((1 + 2 * s) * (1 - s)**2 * y0 + s * (1 - s)**2 * h * f0
+                + s**2 * (3 - 2 * s) * y1 + s**2 * (s - 1) * h * f1)
+    return interpolant
+
+
+def locate_crossing(interpolant, t0, t1, function, components):
+    """Locate the earliest time during a step at which one of some
+    components of a function of the state becomes nonnegative.
+
+    Parameters
+    ----------
+    interpolant : callable
+        solution on the step from t0 to t1, as passed to the callback of
+        integrate in dense mode
+    t0, t1 : float
+        start and end time of the step
+    function : callable
+        called as function(s, y) for a time s and state y, returning an
+        array
+    components : array
+        indices of the components of function's result that are negative
+        at t0 and nonnegative at t1
+
+    Returns
+    -------
+    tuple
+        (time, component) of the earliest crossing. The component is
+        nonnegative at that time (and negative shortly before).
+    """
+    xtol = 4 * np.finfo(float).eps * max(abs(t1), 1.)
+    best_t, best_j = t1, components[0]
+    for j in components:
+        def residual(s):
+            return function(s, interpolant(s))[j]
+        if residual(best_t) < 0:
+            # (no crossing before the earliest one found so far)
+            continue
+        if residual(t0) >= 0:
+            # (only due to interpolation errors)
+            return t0, j
+        s = brentq(residual, t0, best_t, xtol=xtol)
+        # make sure the root lies on the nonnegative side:
+        while residual(s) < 0:
+            s = min(s + xtol, best_t)
+        best_t, best_j = s, j
+    return best_t, best_j
+
+
+class _ODESolver(object):
+    """Abstract ODE solver backend."""
+
+    name = None
+    """name of the integration method"""
+    rhs = None
+    """function rhs(t, y) returning the derivative array"""
+    options = None
+    """dict of method options (rtol, atol, first_step, max_step, ...)
+    that were not None"""
+    nsteps = None
+    """maximal no. of steps per call of integrate"""
+    uses_jacobian = False
+    """whether the method can make use of a Jacobian or its sparsity
+    pattern"""
+
+    def __init__(self,
+                 name,
+                 rhs,
+                 *,
+                 rtol=None,
+                 atol=None,
+                 first_step=None,
+                 max_step=None,
+                 nsteps=10000):
+        self.name = name
+        self.rhs = rhs
+        self.nsteps = nsteps
+        self.options = {key: value
+                        for key, value in (("rtol", rtol),
+                                           ("atol", atol),
+                                           ("first_step", first_step),
+                                           ("max_step", max_step))
+                        if value is not None}
+
+    def integrate(self, t0, y0, t1, callback, jac=None, jac_sparsity=None,
+                  dense=False):
+        """Integrate from (t0, y0) to t1.
+
+        Parameters
+        ----------
+        t0 : float
+            initial time
+        y0 : array
+            initial value array
+        t1 : float
+            end time
+        callback : callable
+            called as callback(t, y) at t0 and after each accepted step;
+            may return True to stop the integration at t
+        jac : callable, optional
+            function jac(t, y) returning the Jacobian as a sparse matrix
+        jac_sparsity : sparse matrix, optional
+            sparsity pattern of the Jacobian, used for finite differences if
+            jac is not given
+        dense : bool, optional
+            if True, callback is called as callback(t, y, interpolant),
+            where interpolant(s) returns the solution at any time s of the
+            step just completed (None at t0)
+
+        Returns
+        -------
+        float
+            the time at which the integration ended
+        """
+        raise NotImplementedError
+
+
+class _ScipyODESolver(_ODESolver):
+    """Backend using scipy.integrate.ode with a solout callback."""
+
+    _last_rhs = None
+    """(t, y, derivative) of the latest right-hand side evaluation, recorded
+    if dense output is requested"""
+
+    def __init__(self, name, rhs, **kwargs):
+        super().__init__(name, rhs, **kwargs)
+        self._ode = integrate.ode(self._rhs)
+        self._ode.set_integrator(name,
+                                 verbosity=1,
+                                 nsteps=self.nsteps,
+                                 **self.options)
+
+    def _rhs(self, t, y):
+        derivative = self.rhs(t, y)
+        if self._last_rhs is not None:
+            self._last_rhs = (t, y.copy(), derivative)
+        return derivative
+
+    def _derivative(self, t, y):
+        """return the derivative at (t, y), reusing the latest right-hand
+        side evaluation if possible (dopri methods evaluate it at the end
+        point of each accepted step)"""
+        last_t, last_y, derivative = self._last_rhs
+        if last_t == t and np.array_equal(last_y, y):
+            return derivative
+        return self.rhs(t, y)
+
+    def integrate(self, t0, y0, t1, callback, jac=None, jac_sparsity=None,
+                  dense=False):
+        # (explicit methods do not use the Jacobian)
+        if dense:
+            # scipy's dopri methods do not provide their dense output, so
+            # interpolate cubically between accepted steps instead:
+            self._last_rhs = (None, None, None)
+            previous = [None]
+
+            def solout(t, y):
+                point = (t, y.copy(), self._derivative(t, y))
+                interpolant = None if previous[0] is None \
+                    else _hermite(*(previous[0] + point))
+                previous[0] = point
+                # returning -1 tells the solver to stop:
+                return -1 if callback(t, y, interpolant) else 0
+        else:
+            self._last_rhs = None
+
+            def solout(t, y):
+                # returning -1 tells the solver to stop:
+                return -1 if callback(t, y) else 0
+        self._ode.set_solout(solout)
+        self._ode.set_initial_value(y0, t0)
+        self._ode.integrate(t1)
+        if not self._ode.successful():
+            raise RuntimeError("ODE solver " + self.name + " failed at t="
+                               + str(self._ode.t) + " with return code "
+                               + str(self._ode.get_return_code()))
+        return self._ode.t
+
+
+class _SolveIVPSolver(_ODESolver):
+    """Backend stepping one of the OdeSolver classes used by
+    scipy.integrate.solve_ivp."""
+
+    methods = {
+        "RK45": integrate.RK45,
+        "RK23": integrate.RK23,
+        "DOP853": integrate.DOP853,
+        "LSODA": integrate.LSODA,
+        "BDF": integrate.BDF,
+        "Radau": integrate.Radau,
+    }
+    """dict mapping method names to scipy OdeSolver classes"""
+
+    @property  # read-only
+    def uses_jacobian(self):
+        return self.name in ("LSODA", "BDF", "Radau")
+
+    def integrate(self, t0, y0, t1, callback, jac=None, jac_sparsity=None,
+                  dense=False):
+        if (callback(t0, y0, None) if dense else callback(t0, y0)) \
+                or t0 >= t1:
+            return t0
+        kwargs = dict(self.options)
+        if kwargs.get("first_step") is not None:
+            # (scipy rejects a first step longer than the interval, which
+            # may be arbitrarily short between two discontinuities):
+            kwargs["first_step"] = min(kwargs["first_step"], t1 - t0)
+        if self.uses_jacobian:
+            if jac is not None:
+                if self.name == "LSODA":
+                    # LSODA only accepts dense Jacobians:
+                    kwargs["jac"] = lambda t, y: jac(t, y).toarray()
+                else:
+                    kwargs["jac"] = jac
+            elif jac_sparsity is not None and self.name != "LSODA":
+                kwargs["jac_sparsity"] = jac_sparsity
+        solver = self.methods[self.name](
+            self.rhs, t0, y0, t1, **kwargs)
+        for step in range(self.nsteps):
+            message = solver.step()
+            if solver.status == "failed":
+                raise RuntimeError("ODE solver " + self.name + " failed at t="
+                                   + str(solver.t) + ": " + str(message))
+            # (the dense output of all methods but DOP853 comes without
+            # additional evaluations of the right-hand side):
+            stop = callback(solver.t, solver.y, solver.dense_output()) \
+                if dense else callback(solver.t, solver.y)
+            if stop or solver.status == "finished":
+                return solver.t
+        raise RuntimeError("ODE solver " + self.name + " needed more than "
+                           + str(self.nsteps) + " steps, stopped at t="
+                           + str(solver.t))
+
+
+solvers = {
+    "dopri5": _ScipyODESolver,
+    "dop853": _ScipyODESolver,
+    "RK45": _SolveIVPSolver,
+    "RK23": _SolveIVPSolver,
+    "DOP853": _SolveIVPSolver,
+    "LSODA": _SolveIVPSolver,
+    "BDF": _SolveIVPSolver,
+    "Radau": _SolveIVPSolver,
+}
+"""dict mapping solver names to backend classes"""
+
+
+def make_solver(name, rhs, **kwargs):
+    """return a backend instance for the solver of the given name"""
+    try:
+        cls = solvers[name]
+    except KeyError:
+        raise ValueError("unknown ODE solver " + repr(name) + ", choose one "
+                         "of " + ", ".join(solvers.keys()))
+    return cls(name, rhs, **kwargs)
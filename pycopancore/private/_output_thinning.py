@@ -0,0 +1,132 @@
+"""_OutputThinning class.
+
+Decides which of the time points produced by the Runner are kept in the
+trajectory. Time points are passed in consecutive blocks (once per smooth
+interval and before a block is written to an output file), and each block
+is processed in time linear in its length, so that thinning a whole run
+takes O(T) time for T time points.
+
+Policies:
+
+- "spacing": keep a time point only if it is at least a given distance
+  after the previously kept one
+- "grid": keep the first time point at or after each point of a fixed
+  grid, given as a step size (grid t_0, t_0 + step, ...) or as an array
+- "every": keep every k-th time point
+
+Regardless of the policy, the first and the last time point of the run and
+both time points at a discontinuity (which share the same time, before and
+after the Steps and Events) are kept.
+"""
+
+# This file is part of pycopancore.
+#
+# Copyright (C) 2016-2017 by COPAN team at Potsdam Institute for Climate
+# Impact Research
+#
+# URL: <http://www.pik-potsdam.de/copan/software>
+# Contact: core@pik-potsdam.de
+# License: BSD 2-clause license
+
+import numpy as np
+
+
+class _OutputThinning(object):
+    """Stateful selection of the time points to keep."""
+
+    policies = ("spacing", "grid", "every")
+    """available policies"""
+
+    policy = None
+    """name of the policy"""
+    parameter = None
+    """minimal spacing, grid step or grid array, or k"""
+
+    _last_time = None
+    """time of the last time point decided upon"""
+    _last_kept = None
+    """time of the last kept time point"""
+    _last_bin = None
+    """grid cell of the last time point decided upon"""
+    _origin = None
+    """first grid point if the grid is given by a step size"""
+    _count = None
+    """no. of time points decided upon"""
+
+    def __init__(self, policy, parameter):
+        assert policy in self.policies, \
+            "thinning policy must be one of " + ", ".join(self.policies)
+        if policy == "every":
+            assert int(parameter) >= 1, "k must be a positive integer"
+            parameter = int(parameter)
+        elif policy == "grid" and not np.isscalar(parameter):
+            parameter = np.sort(np.asarray(parameter, dtype=float))
+        else:
+            assert parameter > 0, "spacing or grid step must be positive"
+        self.policy = policy
+        self.parameter = parameter
+        self._count = 0
+
+    def select(self, times, final=False):
+        """Decide which of a block of time points to keep.
+
+        Parameters
+        ----------
+        times : array
+            the time points following those of the previous call
+        final : bool
+            whether times contains the last time point of the run. If not,
+            the last entry of times is only used to detect discontinuities
+            and remains undecided, i.e., it must be passed again as the first
+            entry in the next call.
+
+        Returns
+        -------
+        array
+            sorted indices of the time points to keep, including the
+            undecided one if final is False
+        """
+        n = len(times) if final else len(times) - 1
+        if n <= 0:
+            return np.arange(len(times))
+        decided = times[:n]
+        previous = np.concatenate((
+            [np.nan if self._last_time is None else self._last_time],
+            times[:n - 1]))
+        following = times[1:n + 1] if not final \
+            else np.append(times[1:], np.nan)
+        # time points at discontinuities, and the very first and last one:
+        keep = (decided == previous) | (decided == following)
+        if self._count == 0:
+            keep[0] = True
+        if final:
+            keep[-1] = True
+        policy = self.policy
+        if policy == "spacing":
+            spacing = self.parameter
+            last = self._last_kept
+            for i in range(n):
+                if keep[i] or last is None or decided[i] - last >= spacing:
+                    keep[i] = True
+                    last = decided[i]
+            self._last_kept = last
+        elif policy == "grid":
+            if np.isscalar(self.parameter):
+                if self._origin is None:
+                    self._origin = decided[0]
+                bins = np.floor((decided - self._origin) / self.parameter)
+            else:
+                bins = np.searchsorted(self.parameter, decided, side="right")
+            previous_bins = np.concatenate((
+                [np.nan if self._last_bin is None else self._last_bin],
+                bins[:-1]))
+            keep |= bins != previous_bins
+            self._last_bin = bins[-1]
+        else:
+            keep |= (self._count + np.arange(n)) % self.parameter == 0
+        self._count += n
+        self._last_time = decided[-1]
+        indices = np.flatnonzero(keep)
+        if not final:
+            indices = np.append(indices, n)
+        return indices
@@ -0,0 +1,175 @@
+"""_Profiler class.
+
+Optional instrumentation of a Runner (see Runner.run(profile=True)), which
+records the number of calls and the wall time spent
+
+- per process, i.e., in evaluating an ODE or Explicit process (for all its
+  instances) or in performing a Step or Event (for one instance, a group of
+  instances of a batched Step, or a whole class), and
+- per phase of the run: "rhs" (evaluations of the ODE system's right hand
+  side, whose number is that of the solver's RHS evaluations), "jacobian",
+  "explicits" (applications of Explicit processes, during RHS evaluation and
+  at output times), "output" (saving states to the trajectory),
+  "scheduler" (operations on the queue of discontinuities), "integrate"
+  (calls of the ODE solver, including RHS evaluations and output) and
+  "checkpoint".
+
+Since phases and processes nest (e.g., an Explicit process applied during
+an RHS evaluation counts towards "explicits" and "rhs"), their times are
+inclusive and do not add up to the total.
+
+If the Runner is not given a _Profiler, the instrumented code only checks
+for it, so that profiling costs nothing unless requested.
+"""
+
+# This file is part of pycopancore.
+#
+# Copyright (C) 2016-2017 by COPAN team at Potsdam Institute for Climate
+# Impact Research
+#
+# URL: <http://www.pik-potsdam.de/copan/software>
+# Contact: core@pik-potsdam.de
+# License: BSD 2-clause license
+
+import json
+from time import perf_counter
+
+
+class _Profiler(object):
+    """Call counts and wall times of a run's processes and phases."""
+
+    processes = None
+    """dict mapping processes to lists [no. of calls, seconds]"""
+    phases = None
+    """dict mapping phase names to lists [no. of calls, seconds]"""
+    _starttime = None
+    """perf_counter at the start of the run"""
+    wall_time = None
+    """total wall time of the run in seconds, once it has ended"""
+
+    def __init__(self):
+        self.processes = {}
+        self.phases = {}
+        self._starttime = perf_counter()
+
+    def add(self, process, start):
+        """record a call of process that began at perf_counter() == start"""
+        elapsed = perf_counter() - start
+        try:
+            record = self.processes[process]
+        except KeyError:
+            record = self.processes[process] = [0, 0.]
+        record[0] += 1
+        record[1] += elapsed
+
+    def add_phase(self, name, start):
+        """record a phase that began at perf_counter() == start"""
+        elapsed = perf_counter() - start
+        try:
+            record = self.phases[name]
+        except KeyError:
+            record = self.phases[name] = [0, 0.]
+        record[0] += 1
+        record[1] += elapsed
+
+    def stop(self):
+        """record the total wall time at the end of the run"""
+        self.wall_time = perf_counter() - self._starttime
+
+    @property  # read-only
+    def rhs_evaluations(self):
+        """no. of evaluations of the ODE system's right hand side"""
+        return self.phases.get("rhs", [0])[0]
+
+    def to_dict(self):
+        """Return the report as a dict of standard python types.
+
+        Returns
+        -------
+        dict
+            with keys "wall_time", "rhs_evaluations", "phases" (a dict
+            mapping phase names to dicts with keys "calls" and "seconds")
+            and "processes" (a list of dicts with keys "process", "type",
+            "owning_class", "calls" and "seconds", the most time-consuming
+            first)
+        """
+        return {
+            "wall_time": self.wall_time,
+            "rhs_evaluations": self.rhs_evaluations,
+            "phases": {
+                name: {"calls": calls, "seconds": seconds}
+                for name, (calls, seconds) in self.phases.items()},
+            "processes": [
+                {"process": process.name,
+                 "type": process.type,
+                 "owning_class": getattr(process.owning_class, "__name__",
+                                         str(process.owning_class)),
+                 "calls": calls,
+                 "seconds": seconds}
+                for process, (calls, seconds) in sorted(
+                    self.processes.items(), key=lambda item: -item[1][1])],
+        }
+
+    def to_json(self, filename=None, **kwargs):
+        """Return the report (see to_dict) as a JSON string, or write it to
+        a file if filename is given. kwargs are passed to json.dumps"""
+        text = json.dumps(self.to_dict(), **kwargs)
+        if filename is None:
+            return text
+        with open(filename, "w") as f:
+            f.write(text)
+
+    def __str__(self):
+        lines = ["Run took {:.3f} seconds with {} RHS evaluations".format(
+                     self.wall_time or 0., self.rhs_evaluations),
+                 "{:<48} {:>10} {:>10}".format("phase/process", "calls",
+                                               "seconds")]
+        for name, (calls, seconds) in sorted(self.phases.items(),
+                                             key=lambda item: -item[1][1]):
+            lines.append("{:<48} {:>10} {:>10.3f}".format(name, calls,
+                                                          seconds))
+        for item in self.to_dict()["processes"]:
+            lines.append("{:<48} {:>10} {:>10.3f}".format(
+                "  {}.{} ({})".format(item["owning_class"], item["process"],
+                                      item["type"]),
+                item["calls"], item["seconds"]))
+        return "\n".join(lines)
+
+
+class _TimedScheduler(object):
+    """Wrapper of a _Scheduler that records the time spent in its
+    operations as the phase "scheduler" of a _Profiler."""
+
+    scheduler = None
+    """the wrapped _Scheduler"""
+    profiler = None
+    """the _Profiler"""
+
+    def __init__(self, scheduler, profiler):
+        self.scheduler = scheduler
+        self.profiler = profiler
+
+    def __len__(self):
+        return len(self.scheduler)
+
+    def push(self, time, process, instance):
+        start = perf_counter()
+        self.scheduler.push(time, process, instance)
+        self.profiler.add_phase("scheduler", start)
+
+    def cancel(self, instance, process=None):
+        start = perf_counter()
+        self.scheduler.cancel(instance, process)
+        self.profiler.add_phase("scheduler", start)
+
+    def next_time(self):
+        start = perf_counter()
+        result = self.scheduler.next_time()
+        self.profiler.add_phase("scheduler", start)
+        return result
+
+    def pop(self):
+        start = perf_counter()
+        result = self.scheduler.pop()
+        self.profiler.add_phase("scheduler", start)
+        return result
@@ -0,0 +1,114 @@
+"""_Scheduler class.
+
+Priority queue of the Runner's future discontinuities, i.e., of the times
+at which Steps or Events are next executed for individual entities or
+process taxa. Based on a binary heap, so that inserting an item and removing
+the earliest ones take O(log K) time for K scheduled items.
+"""
+
+# This file is part of pycopancore.
+#
+# Copyright (C) 2016-2017 by COPAN team at Potsdam Institute for Climate
+# Impact Research
+#
+# URL: <http://www.pik-potsdam.de/copan/software>
+# Contact: core@pik-potsdam.de
+# License: BSD 2-clause license
+
+from heapq import heappush, heappop
+
+
+class _Scheduler(object):
+    """Heap of scheduled (time, process, instance) items.
+
+    Items scheduled for exactly the same time are returned together by pop,
+    in the order in which they were pushed. Cancelled items stay in the heap
+    but are skipped (lazy deletion).
+    """
+
+    _heap = None
+    """heap of entries [time, sequence no., process, instance]; the process
+    of a cancelled entry is None"""
+    _entries = None
+    """dict mapping id(instance) to the list of its live entries"""
+    _count = None
+    """no. of entries pushed so far, used as tie breaker"""
+    _size = None
+    """no. of live entries"""
+
+    def __init__(self):
+        self._heap = []
+        self._entries = {}
+        self._count = 0
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    def __getstate__(self):
+        # (_entries is keyed by object ids, which change when unpickling):
+        state = self.__dict__.copy()
+        del state["_entries"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._entries = {}
+        for entry in self._heap:
+            if entry[2] is not None:
+                self._entries.setdefault(id(entry[3]), []).append(entry)
+
+    def push(self, time, process, instance):
+        """schedule process to be executed for instance at time"""
+        entry = [time, self._count, process, instance]
+        self._count += 1
+        heappush(self._heap, entry)
+        try:
+            self._entries[id(instance)].append(entry)
+        except KeyError:
+            self._entries[id(instance)] = [entry]
+        self._size += 1
+
+    def cancel(self, instance, process=None):
+        """cancel all items of instance (only those of process if given)"""
+        entries = self._entries.get(id(instance))
+        if not entries:
+            return
+        for entry in entries:
+            if process is None or entry[2] is process:
+                entry[2] = None
+                self._size -= 1
+        entries[:] = [entry for entry in entries if entry[2] is not None]
+        if not entries:
+            del self._entries[id(instance)]
+
+    def _discard_cancelled(self):
+        heap = self._heap
+        while heap and heap[0][2] is None:
+            heappop(heap)
+
+    def next_time(self):
+        """return the earliest scheduled time, or None if nothing is
+        scheduled"""
+        self._discard_cancelled()
+        return self._heap[0][0] if self._heap else None
+
+    def pop(self):
+        """remove all items scheduled for the earliest time and return them
+        as a list of (process, instance) pairs"""
+        self._discard_cancelled()
+        heap = self._heap
+        time = heap[0][0]
+        items = []
+        while heap and heap[0][0] == time:
+            entry = heappop(heap)
+            process, instance = entry[2], entry[3]
+            if process is None:
+                continue
+            items.append((process, instance))
+            entries = self._entries[id(instance)]
+            entries.remove(entry)
+            if not entries:
+                del self._entries[id(instance)]
+        self._size -= len(items)
+        return items
@@ -0,0 +1,135 @@
+"""_ModelSnapshot class.
+
+In-memory copy of the full state of a model, taken by Model.snapshot and
+written back in place by Model.restore, so that several branches can be run
+from the same state (e.g. after a common spin-up) without rebuilding it.
+
+A snapshot comprises, for each composed entity-type and process taxon
+class, the lists of active and idle instances, a copy of the class'
+_ColumnStore columns (if the model is columnar), and a copy of every
+instance's attribute dict (Variable values outside columns, references,
+sets, networks, and other attributes set by implementation methods), plus
+the UID counter and the states of numpy's and python's random number
+generators. Instances created after the snapshot are dropped by restore,
+instances deleted or deactivated after it are brought back.
+
+Entity and taxon objects are not copied, so references to them stay
+valid; containers (lists, sets, dicts, arrays, networks) are copied at
+snapshot and again at restore, so that a snapshot can be restored any
+number of times.
+"""
+
+# This file is part of pycopancore.
+#
+# Copyright (C) 2016-2017 by COPAN team at Potsdam Institute for Climate
+# Impact Research
+#
+# URL: <http://www.pik-potsdam.de/copan/software>
+# Contact: core@pik-potsdam.de
+# License: BSD 2-clause license
+
+import copy
+import random
+from collections.abc import MutableSet
+
+import numpy as np
+from networkx import Graph
+
+from ._abstract_entity_mixin import _AbstractEntityMixin
+from ._mixin import _Mixin
+
+
+def _copied(value):
+    """return a copy of value that shares no mutable container with it,
+    but refers to the same entities and taxa"""
+    if isinstance(value, Graph):
+        return value.copy()
+    if isinstance(value, np.ndarray):
+        return value.copy()
+    if isinstance(value, list):
+        return [_copied(item) for item in value]
+    if isinstance(value, dict):
+        return copy.copy(value)
+    if isinstance(value, (set, MutableSet)):
+        # (e.g. an OrderedSet, which copy.copy would not copy deeply
+        # enough):
+        return type(value)(value)
+    return value
+
+
+class _ModelSnapshot(object):
+    """Copy of the state of all instances of a model's composed classes."""
+
+    model = None
+    """the model the snapshot was taken of"""
+    classes = None
+    """dict mapping composed classes to tuples (instances, idle entities,
+    column store state)"""
+    attributes = None
+    """list of pairs (instance, copy of its attribute dict)"""
+    next_uid = None
+    """value of the entities' UID counter"""
+    numpy_random_state = None
+    """state of numpy's global random number generator"""
+    python_random_state = None
+    """state of python's random number generator"""
+
+    def __init__(self, model):
+        self.model = model
+        self.classes = {}
+        self.attributes = []
+        for cls in model.entity_types + model.process_taxa:
+            instances = cls.instances
+            idle = getattr(cls, "idle_entities", None)
+            store = cls._column_store
+            if store is not None:
+                n = store.size
+                store_state = (n,
+                               {name: column[:n].copy()
+                                for name, column in store.columns.items()},
+                               {name: is_set[:n].copy()
+                                for name, is_set in store._is_set.items()})
+            else:
+                store_state = None
+            self.classes[cls] = (
+                None if instances is None else list(instances),
+                None if idle is None else list(idle),
+                store_state)
+            for inst in (instances or []) + (idle or []):
+                self.attributes.append(
+                    (inst, {key: _copied(value)
+                            for key, value in inst.__dict__.items()}))
+        self.next_uid = _AbstractEntityMixin.NEXTUID
+        self.numpy_random_state = np.random.get_state()
+        self.python_random_state = random.getstate()
+
+    def restore(self):
+        """write the snapshot back into the model's classes and instances"""
+        for cls, (instances, idle, store_state) in self.classes.items():
+            cls.instances = None if instances is None else list(instances)
+            if issubclass(cls, _AbstractEntityMixin):
+                cls.idle_entities = None if idle is None else list(idle)
+            if store_state is not None:
+                store = cls._column_store
+                n, columns, is_set = store_state
+                # rows allocated after the snapshot are forgotten:
+                store.size = n
+                while store.capacity < n:
+                    # (when restoring in another process)
+                    store._grow()
+                for name, column in columns.items():
+                    store.columns[name][:n] = column
+                for name, values in is_set.items():
+                    store._is_set[name][:n] = values
+                    store._is_set[name][n:] = False
+            cls._instances_changed()
+        for inst, attributes in self.attributes:
+            inst.__dict__.clear()
+            inst.__dict__.update({key: _copied(value)
+                                  for key, value in attributes.items()})
+        _AbstractEntityMixin.NEXTUID = self.next_uid
+        np.random.set_state(self.numpy_random_state)
+        random.setstate(self.python_random_state)
+        # (the structure version is increased rather than restored, so that
+        # the runner rebuilds its caches)
+        _Mixin._structure_changed()
@@ -3,7 +3,13 @@
 This class defines the trajectory dictionary class, that is used to
 save trajectories in the runner. It inherits from dictionary and its
 aim is to have an extra save and load function, so that these processes
-are easily done by the user."""
+are easily done by the user.
+
+The values of each Variable are stored in a _VariableTrajectory, a growable
+2-d numpy array with one row per output time point and one column per
+entity or taxon, together with a mask telling at which time points an
+instance was active. trajectory[var][instance] returns the column of an
+instance as an array view."""
 
 # This file is part of pycopancore.
 #
@@ -15,15 +21,328 @@ are easily done by the user."""
 # License: BSD 2-clause license
 
 import pickle, json
+from collections.abc import Mapping
+import numpy as np
 import networkx as nx
 from ._abstract_entity_mixin import _AbstractEntityMixin
 from ._abstract_process_taxon_mixin import _AbstractProcessTaxonMixin
+from ._mixin import _Mixin
+from ._trajectory_writer import _HDF5TrajectoryWriter
+
+
+def _grown(array, rows, columns, fill):
+    """return array enlarged to at least the given shape, filled with fill"""
+    new_rows = max(rows, array.shape[0])
+    new_columns = max(columns, array.shape[1])
+    if new_rows > array.shape[0]:
+        new_rows = max(new_rows, 2 * array.shape[0])
+    if new_columns > array.shape[1]:
+        new_columns = max(new_columns, 2 * array.shape[1])
+    result = np.full((new_rows, new_columns), fill, dtype=array.dtype)
+    result[:array.shape[0], :array.shape[1]] = array
+    return result
+
+
+class _VariableTrajectory(Mapping):
+    """Trajectories of one Variable for all instances.
+
+    Behaves like a read-only dict mapping instances to arrays of values,
+    one for each time point of the owning _TrajectoryDictionary. Values are
+    stored as floats if all recorded values are numbers, otherwise as
+    objects. Time points at which an instance was not active (or did not
+    exist yet) have the value NaN (floats) or None (objects).
+    """
+
+    trajectory = None
+    """the owning _TrajectoryDictionary"""
+    data = None
+    """2-d array of values, time points x instances (with spare capacity)"""
+    active = None
+    """2-d boolean array telling which values were recorded"""
+    instances = None
+    """list of instances in column order"""
+
+    _columns = None
+    """dict mapping instances to column numbers"""
+    _cached_columns = None
+    """tuple (structure version, instances list, column numbers array) of the
+    most recently recorded instances list"""
+
+    def __init__(self, trajectory):
+        self.trajectory = trajectory
+        self.data = np.full((trajectory._capacity, 0), np.nan)
+        self.active = np.zeros((trajectory._capacity, 0), dtype=bool)
+        self.instances = []
+        self._columns = {}
+
+    # dict-like access:
+
+    def __getitem__(self, instance):
+        """return the values of instance as an array view"""
+        return self.data[:len(self.trajectory['t']),
+                           self._columns[instance]]
+
+    def __iter__(self):
+        return iter(self.instances)
+
+    def __len__(self):
+        return len(self.instances)
+
+    def __contains__(self, instance):
+        return instance in self._columns
+
+    def is_active(self, instance):
+        """return the boolean array telling at which time points instance
+        was active"""
+        return self.active[:len(self.trajectory['t']),
+                           self._columns[instance]]
+
+    def as_array(self):
+        """return the values of all instances as an array view with one row
+        per time point and one column per instance (in the order of
+        self.instances)"""
+        return self.data[:len(self.trajectory['t']), :len(self.instances)]
+
+    def tolist(self, instance):
+        """return the values of instance as a list, with None at time points
+        at which it was not active"""
+        values = self[instance].tolist()
+        return [v if a else None
+                for v, a in zip(values, self.is_active(instance))]
+
+    # recording:
+
+    def _column_numbers(self, instances):
+        """return the array of column numbers of instances, adding columns
+        for new instances"""
+        cached = self._cached_columns
+        if cached is not None and cached[0] == _Mixin._structure_version \
+                and cached[1] is instances and len(cached[2]) == len(instances):
+            return cached[2]
+        columns = self._columns
+        for inst in instances:
+            if inst not in columns:
+                columns[inst] = len(self.instances)
+                self.instances.append(inst)
+        if len(self.instances) > self.data.shape[1]:
+            self._grow(self.data.shape[0], len(self.instances))
+        numbers = np.fromiter((columns[inst] for inst in instances),
+                              dtype=int, count=len(instances))
+        self._cached_columns = (_Mixin._structure_version, instances, numbers)
+        return numbers
+
+    def _grow(self, rows, columns):
+        fill = np.nan if self.data.dtype != object else None
+        self.data = _grown(self.data, rows, columns, fill)
+        self.active = _grown(self.active, rows, columns, False)
+
+    def _to_objects(self):
+        """switch to object storage"""
+        values = self.data.astype(object)
+        values[~self.active] = None
+        self.data = values
+
+    def record(self, row, instances, values):
+        """store the values of instances at time point no. row"""
+        if row >= self.data.shape[0]:
+            self._grow(row + 1, self.data.shape[1])
+        columns = self._column_numbers(instances)
+        if self.data.dtype != object:
+            if not isinstance(values, np.ndarray):
+                if all(isinstance(v, (int, float, np.number))
+                       for v in values):
+                    values = np.array(values, dtype=float)
+            if isinstance(values, np.ndarray) and values.ndim == 1 \
+                    and values.dtype.kind in "biuf":
+                self.data[row, columns] = values
+                self.active[row, columns] = True
+                return
+            self._to_objects()
+        target = self.data
+        for column, value in zip(columns, values):
+            # when handling lists, python only adds references:
+            target[row, column] = value[:] if isinstance(value, list) \
+                else value
+        self.active[row, columns] = True
+
+    def block(self, start, stop):
+        """return copies of the values and the activity mask of time points
+        start:stop for all instances"""
+        columns = len(self.instances)
+        if stop > self.data.shape[0]:
+            self._grow(stop, columns)
+        return (self.data[start:stop, :columns].copy(),
+                self.active[start:stop, :columns].copy())
+
+    def clear(self):
+        """forget all recorded values (but not the instances)"""
+        self.data[:] = np.nan if self.data.dtype != object else None
+        self.active[:] = False
+
+    def compact(self, start, rows):
+        """keep only the time points start + rows (sorted) of those from
+        start on, moving them to the front of that range"""
+        stop = len(self.trajectory['t'])  # (the old length)
+        if start >= self.data.shape[0]:
+            return
+        stop = min(stop, self.data.shape[0])
+        rows = start + rows[start + rows < stop]
+        n = len(rows)
+        self.data[start:start + n] = self.data[rows]
+        self.active[start:start + n] = self.active[rows]
+        self.data[start + n:stop] = np.nan if self.data.dtype != object \
+            else None
+        self.active[start + n:stop] = False
 
 
 class _TrajectoryDictionary(dict):
     """Trajectory Dictionary Class.
 
-    Inherits from dict"""
+    Inherits from dict. Maps 't' to the array of time points and each
+    Variable to a _VariableTrajectory."""
+
+    _times = None
+    """array of time points (with spare capacity)"""
+    _capacity = None
+    """no. of time points for which memory is allocated"""
+    writer = None
+    """optional _HDF5TrajectoryWriter that time points are streamed to"""
+    n_written = 0
+    """no. of leading time points already passed to the writer"""
+    keep = True
+    """whether time points stay in memory after they were written"""
+    thinning = None
+    """optional _OutputThinning deciding which time points to keep"""
+    n_thinned = 0
+    """no. of leading time points already passed to thinning"""
+    profile = None
+    """_Profiler of the run that produced this trajectory, if it was
+    profiled (see Runner.run)"""
+
+    def __init__(self, capacity=64):
+        super().__init__()
+        self._capacity = capacity
+        self._times = np.zeros(capacity)
+        dict.__setitem__(self, 't', self._times[:0])
+
+    @property  # read-only
+    def variables(self):
+        """list of Variables with a trajectory"""
+        return [key for key in self if key != 't']
+
+    def attach(self, writer, keep=True):
+        """stream all future time points to writer once they are complete,
+        forgetting them afterwards if keep is False"""
+        self.writer = writer
+        self.keep = keep
+        self.n_written = 0
+        writer.open(self)
+
+    def flush(self, discard=True):
+        """pass all time points not yet written to the writer (they must be
+        complete), then forget them unless self.keep or not discard"""
+        self.thin(final=not discard)
+        length = len(self['t'])
+        if discard and self.thinning is not None:
+            # the last time point is still undecided:
+            length -= 1
+        self.writer.write(self, self.n_written, length)
+        self.n_written = length
+        if discard and not self.keep:
+            self._discard(length)
+
+    def _discard(self, length):
+        """forget the first length time points"""
+        rest = len(self['t']) - length
+        for item in self.values():
+            if isinstance(item, _VariableTrajectory):
+                item.compact(0, np.arange(length, length + rest))
+        self._times[:rest] = self._times[length:length + rest]
+        dict.__setitem__(self, 't', self._times[:rest])
+        self.n_written = 0
+        self.n_thinned = max(0, self.n_thinned - length)
+
+    def close(self):
+        """thin and write all remaining time points (keeping them in memory)
+        and close the writer"""
+        if self.writer is None:
+            self.thin(final=True)
+        else:
+            self.flush(discard=False)
+            self.writer.close()
+            self.writer = None
+
+    def add_variable(self, var):
+        """start an empty trajectory for a Variable"""
+        self[var] = _VariableTrajectory(self)
+
+    def append_time(self, t):
+        """add a time point, at which values can then be recorded"""
+        if self.writer is not None \
+                and len(self['t']) - self.n_written >= self.writer.chunk_size:
+            # all time points so far are complete:
+            self.flush()
+        length = len(self['t'])
+        if length == self._capacity:
+            self._capacity *= 2
+            times = np.zeros(self._capacity)
+            times[:length] = self._times[:length]
+            self._times = times
+        self._times[length] = t
+        dict.__setitem__(self, 't', self._times[:length + 1])
+
+    def record(self, var, instances, values):
+        """store the values of a Variable for some instances at the latest
+        time point"""
+        self[var].record(len(self['t']) - 1, instances, values)
+
+    def thin(self, final=False):
+        """apply self.thinning to the time points added since the last call
+        (all of which must be complete)"""
+        if self.thinning is None:
+            return
+        start = self.n_thinned
+        times = self['t'][start:]
+        rows = self.thinning.select(times, final=final)
+        if len(rows) < len(times):
+            for item in self.values():
+                if isinstance(item, _VariableTrajectory):
+                    item.compact(start, rows)
+            self._times[start:start + len(rows)] = times[rows]
+            dict.__setitem__(self, 't', self._times[:start + len(rows)])
+        # (unless final, the last time point is decided upon next time):
+        self.n_thinned = start + len(rows) if final \
+            else max(start, start + len(rows) - 1)
+
+    def to_arrays(self):
+        """Return a copy of the trajectory that does not refer to any model
+        objects, so that it can be pickled and passed between processes.
+
+        Returns
+        -------
+        dict
+            maps 't' to the array of time points and str(var) of each
+            Variable with recorded values to a dict with entries
+            'instances' (list of str() of the instances), 'values' (2-d
+            array, time points x instances; str() of the values for
+            non-numeric Variables) and 'active' (2-d boolean array)
+        """
+        arrays = {'t': self['t'].copy()}
+        for var, item in self.items():
+            if not isinstance(item, _VariableTrajectory) \
+                    or len(item) == 0:
+                continue
+            values, active = item.block(0, len(self['t']))
+            if values.dtype == object:
+                values = np.array([[str(v) if a else "" for v, a in zip(
+                    row, arow)] for row, arow in zip(values, active)],
+                    dtype=str).reshape(values.shape)
+            arrays[str(var)] = {
+                'instances': [str(inst) for inst in item.instances],
+                'values': values,
+                'active': active,
+            }
+        return arrays
 
     def save(self,
              *,
@@ -55,11 +374,12 @@ class _TrajectoryDictionary(dict):
                 # Go to lower level, if item is indeed another dictionary. This
                 # is the case for all Variables except the time 't'!
                 # One could also check for isinstance(item, Variable)
-                if isinstance(item, dict):
+                if isinstance(item, _VariableTrajectory):
                     new_key = str(key)
                     # print('new_key',  new_key, type(new_key))
                     dict_to_save[new_key] = {}
-                    for key_2, value in item.items():
+                    for key_2 in item:
+                        value = item.tolist(key_2)
                         # Here, key_2 are entities or taxa. Value are lists with
                         # the values the variable took during the run.
 
@@ -134,7 +454,7 @@ class _TrajectoryDictionary(dict):
                             raise Exception('neither taxon nor entity')
                 elif key == 't':
                     # here we don't need to do anyhing
-                    dict_to_save['t'] = item
+                    dict_to_save['t'] = item.tolist()
                 else:
                     raise Exception('neither variable nor time!')
 
@@ -164,14 +484,15 @@ class _TrajectoryDictionary(dict):
                     json.dump(dict_to_save, dumpfile)
 
         else:
-            # HDF5 mode
-            # If we want to implement this, we need to solve the following
-            # problem: HDF5 and Pytables only support same datatype entries in
-            # a table. If, however, an entity is deactivated during a run, all
-            # its values when being idel are None (dtype:None)! Earlier values
-            # might include floats, booleans, or integers. This is not possible
-            # with HDF5 at all.
-            raise Exception('Not implemented yet')
+            # HDF5 mode. Entries at which an entity was idle are marked
+            # in the dataset "active" instead of being None, and values that
+            # are not numbers are stored as strings, see
+            # _HDF5TrajectoryWriter:
+            save_path = path + "/" if not path.endswith("/") else path
+            writer = _HDF5TrajectoryWriter(save_path + filename + '.hdf5')
+            writer.open(self)
+            writer.write(self, 0, len(self['t']))
+            writer.close()
 
     # Helping function to save lists and tuples
     def traverse(self, item, tree_types=(list, tuple)):
@@ -0,0 +1,168 @@
+"""_HDF5TrajectoryWriter class.
+
+Output sink that writes a _TrajectoryDictionary to an HDF5 file
+incrementally while a model runs, so that trajectories need not fit into
+memory and can be read (e.g. with h5py's single-writer-multiple-reader mode)
+before the run has finished. Requires the optional package h5py.
+
+File layout, with one group per Variable named like str(var), e.g.
+"Individual.age":
+
+- /t: time points
+- /<var>/instances: entity index table, str() of the instance of each
+  column
+- /<var>/values: float values, one row per time point and one column per
+  instance, NaN where the instance was inactive or the value is not a number
+- /<var>/active: whether the instance was active at that time point
+- /<var>/strings: str() of the values of non-numeric Variables
+  (e.g. networks), empty where not applicable
+
+All datasets are chunked along the time axis and compressed.
+"""
+
+# This file is part of pycopancore.
+#
+# Copyright (C) 2016-2017 by COPAN team at Potsdam Institute for Climate
+# Impact Research
+#
+# URL: <http://www.pik-potsdam.de/copan/software>
+# Contact: core@pik-potsdam.de
+# License: BSD 2-clause license
+
+import numpy as np
+
+
+class _HDF5TrajectoryWriter(object):
+    """Writes rows of a _TrajectoryDictionary to an HDF5 file."""
+
+    filename = None
+    """name of the HDF5 file"""
+    chunk_size = None
+    """no. of time points per chunk, also the no. of complete time points
+    collected in memory before they are written"""
+    compression = None
+    """HDF5 compression filter"""
+
+    rows = None
+    """no. of time points in the file when the writer was pickled (e.g. in
+    a checkpoint)"""
+
+    _file = None
+    """the open h5py.File"""
+    _groups = None
+    """dict mapping Variables to their h5py groups"""
+
+    def __init__(self, filename, *, chunk_size=256, compression="gzip"):
+        try:
+            import h5py
+        except ImportError:
+            raise ImportError("writing HDF5 output requires the package "
+                              "h5py (pip install h5py)")
+        self._h5py = h5py
+        self.filename = filename
+        self.chunk_size = chunk_size
+        self.compression = compression
+
+    def open(self, trajectory):
+        """create the file with (empty) datasets for all Variables of
+        trajectory and switch to single-writer-multiple-reader mode"""
+        h5py = self._h5py
+        self._file = f = h5py.File(self.filename, "w", libver="latest")
+        f.attrs["file-version"] = 0.1
+        options = dict(compression=self.compression)
+        f.create_dataset("t", shape=(0,), maxshape=(None,), dtype=float,
+                         chunks=(self.chunk_size,), **options)
+        self._groups = {}
+        string_type = h5py.string_dtype()
+        for var in trajectory.variables:
+            group = f.create_group(str(var))
+            group.create_dataset("instances", shape=(0,), maxshape=(None,),
+                                 dtype=string_type, chunks=(256,), **options)
+            chunks = (self.chunk_size, 64)
+            group.create_dataset("values", shape=(0, 0),
+                                 maxshape=(None, None), dtype=float,
+                                 chunks=chunks, fillvalue=np.nan, **options)
+            group.create_dataset("active", shape=(0, 0),
+                                 maxshape=(None, None), dtype=bool,
+                                 chunks=chunks, fillvalue=False, **options)
+            group.create_dataset("strings", shape=(0, 0),
+                                 maxshape=(None, None), dtype=string_type,
+                                 chunks=chunks, **options)
+            self._groups[var] = group
+        # from now on, readers may open the file with swmr=True:
+        f.swmr_mode = True
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["rows"] = self._file["t"].shape[0] \
+            if self._file is not None else 0
+        for key in ("_h5py", "_file", "_groups"):
+            state.pop(key, None)
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        import h5py
+        self._h5py = h5py
+
+    def reopen(self, trajectory):
+        """reopen the file of an unpickled writer to continue writing
+        trajectory, dropping all time points written after the writer was
+        pickled"""
+        self._file = f = self._h5py.File(self.filename, "a", libver="latest")
+        rows = self.rows
+        f["t"].resize((rows,))
+        self._groups = {}
+        for var in trajectory.variables:
+            group = f[str(var)]
+            table = group["instances"]
+            table.resize((min(table.shape[0],
+                              len(trajectory[var].instances)),))
+            for name in ("values", "active", "strings"):
+                dataset = group[name]
+                dataset.resize((rows, dataset.shape[1]))
+            self._groups[var] = group
+        f.swmr_mode = True
+
+    def flush(self):
+        """make sure everything written so far is on disk"""
+        self._file.flush()
+
+    def write(self, trajectory, start, stop):
+        """append the time points start:stop of trajectory to the file"""
+        times = trajectory['t'][start:stop]
+        if len(times) == 0:
+            return
+        tset = self._file["t"]
+        n = tset.shape[0]
+        tset.resize((n + len(times),))
+        tset[n:] = times
+        for var, group in self._groups.items():
+            item = trajectory[var]
+            instances = item.instances
+            m = len(instances)
+            table = group["instances"]
+            k = table.shape[0]
+            if m > k:
+                table.resize((m,))
+                table[k:] = [str(inst) for inst in instances[k:]]
+            values, active = item.block(start, stop)
+            for name in ("values", "active", "strings"):
+                dataset = group[name]
+                dataset.resize((n + len(times), max(m, dataset.shape[1])))
+            if m == 0:
+                continue
+            group["active"][n:, :m] = active
+            if values.dtype != object:
+                group["values"][n:, :m] = values
+            else:
+                group["strings"][n:, :m] = np.array(
+                    [[str(v) if a else "" for v, a in zip(row, arow)]
+                     for row, arow in zip(values, active)], dtype=object)
+        self._file.flush()
+
+    def close(self):
+        """close the file"""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
@@ -37,7 +37,8 @@ class ODE(_AbstractProcess):
                  targets,
                  specification,
                  *,
-                 smoothness=1
+                 smoothness=1,
+                 batch=False
                 ):
         """Instantiate an instance of an ODE process.
 
@@ -52,9 +53,17 @@ class ODE(_AbstractProcess):
             attributes d_varname, or list of sympy expressions giving the
             RHS of the equation(s)
         smoothness
+        batch : bool
+            if True, specification is a function(cls, t) that is called
+            once with the owning class instead of once per instance, and
+            returns a list of arrays (or scalars) of derivative terms, one
+            for each target, in the same format as the values of symbolic
+            expressions (values can be read vectorized via Variable.eval()
+            and _DotConstruct.eval())
         """
         super().__init__(name)
 
         self.targets = targets
         self.specification = specification
         self.smoothness = smoothness
+        self.batch = batch
@@ -22,6 +22,8 @@ An event might be something like a birth or death, catastrophes of all sorts.
 # Definition of class Event
 #
 
+from numbers import Number
+
 from pycopancore.private._abstract_process import _AbstractProcess
 
 
@@ -31,11 +33,22 @@ class Event(_AbstractProcess):
     type = "Event"
     timetype = "discrete"
 
+    engines = ("instance", "gillespie", "tau-leaping")
+    """available ways of simulating rate events"""
+
+    engine = "instance"
+    """how the runner simulates a rate event (see __init__)"""
+    tau = None
+    """leap interval, used by engine tau-leaping"""
+
     def __init__(self,
                  name,
                  variables,
                  specification,
-                 smoothness=0
+                 smoothness=0,
+                 *,
+                 engine="instance",
+                 tau=None
                  ):
         """Instantiate an instance of an Event process.
 
@@ -44,12 +57,50 @@ class Event(_AbstractProcess):
         name
         variables
         specification : list
-            Structured as followed: [eventtype ("rate" or "time"), rate
-            or time-function, method/function of variable(s)]
+            Structured as followed: [eventtype ("rate", "time" or
+            "condition"), rate or time-function or condition,
+            method/function of variable(s)].
+            The rate may be a positive number or vary with the state and
+            time: a symbolic expression in Variables of the owning class
+            (e.g. 0.1 * B.Individual.age), or a method rate(inst, t). In
+            the latter cases, the runner integrates each instance's
+            cumulative hazard along with the ODEs and stops the integration
+            when it reaches a randomly drawn threshold.
+            A condition is a symbolic inequality in Variables of the owning
+            class (e.g. B.World.atmospheric_carbon > 1000). The runner then
+            calls the method for an instance at the exact time at which the
+            condition becomes true for it during ODE integration (located
+            by root finding).
         smoothness
+        engine : str
+            how the runner simulates a rate event:
+            "instance" (default): one waiting time per instance, each
+            occurrence being a separate discontinuity.
+            "gillespie": one aggregated waiting time for all instances of
+            the owning class (with total rate no. of instances times rate),
+            the occurring instance being drawn at random (exact, but with
+            one scheduled item instead of one per instance).
+            "tau-leaping": every tau time units, each instance experiences a
+            Poisson-distributed no. of occurrences (with mean rate times
+            tau), all at the same discontinuity (approximate, but with far
+            fewer discontinuities).
+            Only "instance" is available for varying rates.
+        tau : float
+            leap interval, required for engine "tau-leaping"
         """
         super().__init__(name)
 
+        assert engine in self.engines, \
+            "engine must be one of " + ", ".join(self.engines)
+        assert engine != "tau-leaping" or (tau is not None and tau > 0), \
+            "tau-leaping requires a positive tau"
+        assert specification[0] in ("rate", "time", "condition"), \
+            "unsupported type of Event"
+        assert engine == "instance" or specification[0] != "rate" \
+            or isinstance(specification[1], Number), \
+            "varying rates require engine instance"
         self.variables = variables
         self.specification = specification
         self.smoothness = smoothness
+        self.engine = engine
+        self.tau = tau
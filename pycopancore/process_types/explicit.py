@@ -35,7 +35,9 @@ class Explicit(_AbstractProcess):
                  name,
                  targets,
                  specification,
-                 smoothness=0
+                 smoothness=0,
+                 *,
+                 batch=False
                  ):
         """Instantiate an instance of an explicit process.
 
@@ -46,9 +48,15 @@ class Explicit(_AbstractProcess):
         specification : func
             function(self,t)
         smoothness :
+        batch : bool
+            if True, specification is a function(cls, t) that is called
+            once with the owning class instead of once per instance, and
+            returns a list of arrays (or scalars) of values, one for each
+            target
         """
         super().__init__(name)
 
         self.targets = targets
         self.specification = specification
         self.smoothness = smoothness
+        self.batch = batch
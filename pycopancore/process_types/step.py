@@ -35,7 +35,9 @@ class Step(_AbstractProcess):
     def __init__(self,
                  name,
                  variables,
-                 specification
+                 specification,
+                 *,
+                 batch=False
                  ):
         """Instantiate a process of type step.
 
@@ -47,8 +49,18 @@ class Step(_AbstractProcess):
             Structured as followed: [function to
              return next_time (function(self, t)), function to calculate
              variables of each entity (function(self, t)]
+        batch : bool
+            if True, both functions are called as function(cls, t,
+            instances) once for all instances of the owning class cls that
+            are due at the same time t (a list). The first returns either
+            one next time for all of them or an array of next times, one
+            for each instance, the second performs the step for all of them
+            at once (values can be read and set vectorized via
+            Variable.eval(instances) and Variable.set_values(instances,
+            values))
         """
         super().__init__(name)
 
         self.variables = variables
         self.specification = specification
+        self.batch = batch
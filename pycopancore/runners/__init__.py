@@ -15,3 +15,7 @@ Created on Mar 10, 2017
 
 from .runner import Runner
 from .hooks import Hooks
+from .ensemble_runner import EnsembleRunner
+from .reducers import Moments, Quantiles
+from .replica_runner import ReplicaRunner
+from ..private._logging import set_verbosity
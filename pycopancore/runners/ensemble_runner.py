@@ -0,0 +1,368 @@
+"""EnsembleRunner class.
+
+Runs many instances of a model (ensemble members), differing in parameters
+and random seeds, on a pool of worker processes and collects their
+trajectories in one EnsembleResults store, and/or streams them into online
+reducers (see reducers) computing summary statistics over the members.
+
+Since the composite classes of a model hold global state (their instances,
+the owning classes of Variables, ...), two model instances cannot share a
+process. Each member is therefore built and run in a fresh worker process by
+a user-supplied builder function, and only a copy of its trajectory that
+does not refer to model objects (see _TrajectoryDictionary.to_arrays) is
+sent back. Likewise, Variables and _DotConstructs in the keyword arguments
+for Runner.run (e.g. add_to_output) are sent to the workers as references
+that are resolved there, as in checkpoint files (see _checkpoint).
+"""
+
+# This file is part of pycopancore.
+#
+# Copyright (C) 2016-2017 by COPAN team at Potsdam Institute for Climate
+# Impact Research
+#
+# URL: <http://www.pik-potsdam.de/copan/software>
+# Contact: core@pik-potsdam.de
+# License: BSD 2-clause license
+
+import importlib
+import io
+import logging
+import multiprocessing
+import os
+import pickle
+import random
+import sys
+import traceback
+from contextlib import nullcontext, redirect_stdout
+from time import time
+
+import numpy as np
+
+from pycopancore.data_model import Variable
+from pycopancore.private._abstract_entity_mixin import _AbstractEntityMixin
+from pycopancore.private._abstract_process_taxon_mixin import \
+    _AbstractProcessTaxonMixin
+from pycopancore.private._expressions import _DotConstruct
+from pycopancore.runners.runner import Runner
+
+logger = logging.getLogger(__name__)
+
+
+class _RunKwargsPickler(pickle.Pickler):
+    """Pickler storing Variables as references (module, class, attribute
+    name) to the class defining them, and _DotConstructs as their parts.
+
+    Variables must be found via their defining class since the model need
+    not be configured in the parent process, so that owning_class and
+    codename may not be set there.
+    """
+
+    _references = None
+    """dict mapping Variables to their references"""
+
+    def __init__(self, file):
+        super().__init__(file, pickle.HIGHEST_PROTOCOL)
+        self._references = {}
+        # visit all mixin classes of entity types and process taxa and the
+        # classes they inherit from (e.g. interface classes):
+        todo = [_AbstractEntityMixin, _AbstractProcessTaxonMixin]
+        visited, scanned = set(todo), set()
+        while todo:
+            cls = todo.pop()
+            for sub in cls.__subclasses__():
+                if sub not in visited:
+                    visited.add(sub)
+                    todo.append(sub)
+            for base in cls.__mro__:
+                if base in scanned:
+                    continue
+                scanned.add(base)
+                # (only classes that can be imported by their name):
+                module = sys.modules.get(base.__module__)
+                if getattr(module, base.__name__, None) is not base:
+                    continue
+                for name, value in base.__dict__.items():
+                    if isinstance(value, Variable):
+                        self._references.setdefault(
+                            value, (base.__module__, base.__name__, name))
+
+    def persistent_id(self, obj):
+        if isinstance(obj, Variable):
+            try:
+                return ("variable",) + self._references[obj]
+            except KeyError:
+                raise pickle.PicklingError(
+                    "no class defining Variable " + repr(obj) + " found")
+        if isinstance(obj, _DotConstruct):
+            return ("dotconstruct", obj._start,
+                    list(obj._attribute_sequence), obj._aggregation,
+                    obj._argument)
+        return None
+
+
+class _RunKwargsUnpickler(pickle.Unpickler):
+    """Unpickler resolving the references stored by _RunKwargsPickler
+    (in the worker process, after the model has been built)."""
+
+    def persistent_load(self, pid):
+        kind = pid[0]
+        if kind == "variable":
+            module, classname, name = pid[1:]
+            cls = getattr(importlib.import_module(module), classname)
+            return cls.__dict__[name]
+        if kind == "dotconstruct":
+            start, attribute_sequence, aggregation, argument = pid[1:]
+            return _DotConstruct(start, attribute_sequence,
+                                 aggregation=aggregation, argument=argument)
+        raise pickle.UnpicklingError("unknown reference " + repr(pid))
+
+
+def _dump_run_kwargs(run_kwargs):
+    """return run_kwargs pickled by _RunKwargsPickler"""
+    with io.BytesIO() as dumpfile:
+        _RunKwargsPickler(dumpfile).dump(run_kwargs)
+        return dumpfile.getvalue()
+
+
+def _load_run_kwargs(data):
+    """return the run_kwargs pickled by _dump_run_kwargs"""
+    with io.BytesIO(data) as loadfile:
+        return _RunKwargsUnpickler(loadfile).load()
+
+
+def _run_member(task):
+    """build and run one ensemble member (called in a worker process)"""
+    build, index, member, run_kwargs, quiet, reducers, keep = task
+    params = dict(member)
+    seed = params.pop("seed", None)
+    starttime = time()
+    try:
+        with open(os.devnull, "w") as devnull, \
+                (redirect_stdout(devnull) if quiet else nullcontext()):
+            if seed is not None:
+                np.random.seed(seed)
+                random.seed(seed)
+            model = build(**params)
+            run_kwargs = _load_run_kwargs(run_kwargs)
+            runner = Runner(model=model)
+            # (the members' progress bars would overwrite each other):
+            trajectory = runner.run(**dict({"progress": False},
+                                           **run_kwargs))
+            arrays = trajectory.to_arrays()
+            # map the run onto the reducers' time grids here, so that only
+            # these samples need to be sent back if arrays is not kept:
+            samples = [reducer.extract(arrays) for reducer in reducers]
+        error = None
+    except Exception:
+        arrays = samples = None
+        error = traceback.format_exc()
+    return (index, arrays if keep else None, samples, error,
+            time() - starttime)
+
+
+class EnsembleResults(object):
+    """Indexed store of the trajectories of an ensemble.
+
+    results[i] is the trajectory of member no. i in the format of
+    _TrajectoryDictionary.to_arrays, or None if that run failed or
+    trajectories were not kept.
+    """
+
+    members = None
+    """list of the members' parameter dicts, in the order given"""
+    trajectories = None
+    """list of the members' trajectories (None for failed runs)"""
+    errors = None
+    """list of the members' error tracebacks (None for successful runs)"""
+    runtimes = None
+    """list of the members' runtimes in seconds"""
+    reducers = None
+    """list of the reducers that all successful runs were added to"""
+
+    def __init__(self, members, reducers=()):
+        self.members = [dict(member) for member in members]
+        self.reducers = list(reducers)
+        n = len(self.members)
+        self.trajectories = [None] * n
+        self.errors = [None] * n
+        self.runtimes = [None] * n
+
+    def __len__(self):
+        return len(self.members)
+
+    def __getitem__(self, index):
+        return self.trajectories[index]
+
+    @property  # read-only
+    def failed(self):
+        """list of indices of the members whose run failed"""
+        return [i for i, error in enumerate(self.errors) if error is not None]
+
+    def select(self, **params):
+        """return the list of indices of the members whose parameters have
+        the given values, e.g. results.select(updates=0.1)"""
+        return [i for i, member in enumerate(self.members)
+                if all(key in member and member[key] == value
+                       for key, value in params.items())]
+
+    def values(self, var, instance=None, indices=None):
+        """Return the values of a Variable in several members.
+
+        Parameters
+        ----------
+        var : str
+            name of the Variable as in the trajectories, e.g.
+            "World.atmospheric_carbon"
+        instance : str, optional
+            name of the instance, e.g. "World[UID=3]". If not given, all
+            columns are returned.
+        indices : list, optional
+            indices of the members (default: all successful ones)
+
+        Returns
+        -------
+        dict
+            maps member indices to pairs (time points, values)
+        """
+        if indices is None:
+            indices = [i for i, traj in enumerate(self.trajectories)
+                       if traj is not None]
+        result = {}
+        for i in indices:
+            traj = self.trajectories[i]
+            item = traj[var]
+            values = item['values']
+            if instance is not None:
+                values = values[:, item['instances'].index(instance)]
+            result[i] = (traj['t'], values)
+        return result
+
+    def save(self, filename):
+        """pickle the store to a file"""
+        with open(filename, "wb") as dumpfile:
+            pickle.dump(self, dumpfile, pickle.HIGHEST_PROTOCOL)
+
+    @staticmethod
+    def load(filename):
+        """load a store pickled by save"""
+        with open(filename, "rb") as loadfile:
+            return pickle.load(loadfile)
+
+
+class EnsembleRunner(object):
+    """Runs an ensemble of model instances on a process pool.
+
+    Example::
+
+        def build(p_env_friendly):
+            M.Model()
+            ...  # instantiate entities and taxa as for a single run
+            return model
+
+        ensemble = EnsembleRunner(build, processes=8)
+        results = ensemble.run(
+            [{"seed": s, "p_env_friendly": p}
+             for s in range(100) for p in (0.1, 0.2)],
+            t_1=100, dt=1)
+        results.select(p_env_friendly=0.1)
+    """
+
+    build = None
+    """function building a member's model"""
+    processes = None
+    """no. of worker processes (None: no. of CPUs)"""
+    start_method = None
+    """multiprocessing start method ("fork", "spawn", ...; None: platform
+    default)"""
+    quiet = True
+    """whether the workers' output is suppressed"""
+
+    def __init__(self,
+                 build,
+                 *,
+                 processes=None,
+                 start_method=None,
+                 quiet=True
+                 ):
+        """Instantiate an EnsembleRunner.
+
+        Parameters
+        ----------
+        build : callable
+            Function called as build(**params) in a worker process with the
+            parameters of one member (without "seed"). It must configure the
+            model, create all entities and taxa, and return the model
+            object. Must be picklable (defined at module level) unless the
+            start method is "fork".
+        processes : int, optional
+            No. of worker processes (default: no. of CPUs)
+        start_method : str, optional
+            multiprocessing start method (default: platform default). The
+            parent process must not configure a model itself if "fork" is
+            used.
+        quiet : bool, optional
+            Suppress the workers' output (default: True)
+        """
+        assert callable(build), "build must be callable"
+        self.build = build
+        self.processes = processes
+        self.start_method = start_method
+        self.quiet = quiet
+
+    def run(self, members, *, reducers=None, keep_trajectories=True,
+            **run_kwargs):
+        """Run all ensemble members.
+
+        Parameters
+        ----------
+        members : list of dict
+            One dict of parameters for build per member. The optional entry
+            "seed" is used to seed numpy's and python's random number
+            generators before build is called.
+        reducers : list, optional
+            Reducers (Moments, Quantiles, ...) that each successful run is
+            added to as soon as it has finished
+        keep_trajectories : bool, optional
+            Whether the members' trajectories are kept in the result
+            (default: True). For large ensembles, use reducers and False so
+            that memory does not grow with the no. of members.
+        **run_kwargs
+            Keyword arguments passed to Runner.run in each member, e.g.
+            t_1 and dt. output_file may not be given.
+
+        Returns
+        -------
+        EnsembleResults
+            store of all members' trajectories, in the order of members
+        """
+        assert "output_file" not in run_kwargs, \
+            "members cannot share an output file"
+        reducers = [] if reducers is None else list(reducers)
+        results = EnsembleResults(members, reducers)
+        # (Variables cannot be pickled as they are):
+        run_kwargs = _dump_run_kwargs(run_kwargs)
+        tasks = [(self.build, index, member, run_kwargs, self.quiet,
+                  reducers, keep_trajectories)
+                 for index, member in enumerate(results.members)]
+        context = multiprocessing.get_context(self.start_method)
+        starttime = time()
+        # each worker process runs exactly one member, so that no model
+        # state survives from one member to the next:
+        with context.Pool(self.processes, maxtasksperchild=1) as pool:
+            for count, (index, arrays, samples, error, runtime) \
+                    in enumerate(pool.imap_unordered(_run_member, tasks,
+                                                     chunksize=1)):
+                results.trajectories[index] = arrays
+                if error is None:
+                    for reducer, sample in zip(reducers, samples):
+                        reducer.add(sample)
+                results.errors[index] = error
+                results.runtimes[index] = runtime
+                logger.info("member %d %s after %s seconds (%d of %d)",
+                            index, "failed" if error else "finished",
+                            runtime, count + 1, len(tasks))
+                if error:
+                    logger.warning("%s", error)
+        logger.info("ensemble of %d members took %s seconds, %d failed",
+                    len(tasks), time() - starttime, len(results.failed))
+        return results
@@ -0,0 +1,342 @@
+"""Online reducers for ensembles.
+
+A reducer accumulates summary statistics of one Variable over the members
+of an ensemble, run by run, so that memory stays constant in the number of
+runs and the members' trajectories need not be kept (see EnsembleRunner).
+
+Each run is first mapped onto a common grid of time points (by linear
+interpolation between the run's output time points, or exactly if the runs
+use these times as output_times) and optionally aggregated over instances
+at each time point, giving one value per time point and column. Columns are
+either the instances (identified by their str(), e.g. "World[UID=3]") or,
+if aggregated, a single column named like the aggregate.
+
+Available reducers:
+
+- Moments: running count, mean and variance (Welford's algorithm)
+- Quantiles: approximate quantiles, using one P-square sketch (Jain and
+  Chlamtac 1985) of five markers per quantile, time point and column
+"""
+
+# This file is part of pycopancore.
+#
+# Copyright (C) 2016-2017 by COPAN team at Potsdam Institute for Climate
+# Impact Research
+#
+# URL: <http://www.pik-potsdam.de/copan/software>
+# Contact: core@pik-potsdam.de
+# License: BSD 2-clause license
+
+import numpy as np
+
+
+def _on_grid(t, values, times):
+    """return values (time points t x columns) linearly interpolated onto
+    times, NaN outside the range of t; at duplicate time points
+    (discontinuities), the later value is used"""
+    result = np.full((len(times), values.shape[1]), np.nan)
+    if len(t) == 0:
+        return result
+    inside = (times >= t[0]) & (times <= t[-1])
+    grid = times[inside]
+    if len(t) == 1:
+        result[inside] = values[0]
+        return result
+    i = np.clip(np.searchsorted(t, grid, side="right") - 1, 0, len(t) - 2)
+    t0, t1 = t[i], t[i + 1]
+    # (t0 == t1 only at a discontinuity at the end of t):
+    weight = np.where(t1 > t0, (grid - t0) / np.where(t1 > t0, t1 - t0, 1),
+                      1)[:, None]
+    # (avoid 0 * NaN where the weight is zero):
+    later = np.where(weight > 0, values[i + 1], 0)
+    result[inside] = np.where(weight < 1, values[i], 0) * (1 - weight) \
+        + later * weight
+    return result
+
+
+class _Reducer(object):
+    """Abstract reducer of one Variable."""
+
+    aggregates = (None, "mean", "sum", "min", "max", "count")
+    """available aggregations over instances"""
+
+    var = None
+    """name of the Variable, e.g. "World.atmospheric_carbon\""""
+    times = None
+    """array of time points at which the statistics are computed"""
+    aggregate = None
+    """aggregation over instances at each time point, or None"""
+    columns = None
+    """list of column names"""
+    _column_numbers = None
+    """dict mapping column names to column numbers"""
+
+    def __init__(self, var, times, *, aggregate=None):
+        """Instantiate a reducer.
+
+        Parameters
+        ----------
+        var : Variable or str
+            the Variable (or its name, e.g. "World.atmospheric_carbon")
+        times : array
+            time points at which the statistics are computed
+        aggregate : str, optional
+            if given, the values of all instances active at a time point are
+            aggregated into one value before the statistics are computed:
+            "mean", "sum", "min", "max", or "count" (no. of active instances)
+        """
+        assert aggregate in self.aggregates, \
+            "aggregate must be one of " + str(self.aggregates)
+        self.var = str(var)
+        self.times = np.asarray(times, dtype=float)
+        self.aggregate = aggregate
+        self.columns = []
+        self._column_numbers = {}
+
+    def extract(self, arrays):
+        """Map one run onto the time grid.
+
+        Parameters
+        ----------
+        arrays : dict
+            trajectory in the format of _TrajectoryDictionary.to_arrays
+
+        Returns
+        -------
+        tuple
+            (column names, array of values, time points x columns)
+        """
+        item = arrays.get(self.var)
+        if item is None:
+            values = np.zeros((len(arrays['t']), 0))
+            instances = []
+        else:
+            assert item['values'].dtype.kind in "biuf", \
+                "can only reduce numeric Variables, not " + self.var
+            values = np.where(item['active'], item['values'], np.nan)
+            instances = item['instances']
+        values = _on_grid(arrays['t'], values, self.times)
+        if self.aggregate is None:
+            return instances, values
+        active = ~np.isnan(values)
+        count = active.sum(axis=1)
+        if self.aggregate == "count":
+            value = count.astype(float)
+        elif self.aggregate in ("sum", "mean"):
+            value = np.where(active, values, 0).sum(axis=1)
+            if self.aggregate == "mean":
+                value = np.where(count > 0, value / np.maximum(count, 1),
+                                 np.nan)
+        else:
+            fill = np.inf if self.aggregate == "min" else -np.inf
+            value = getattr(np, self.aggregate)(
+                np.where(active, values, fill), axis=1, initial=fill)
+            value = np.where(count > 0, value, np.nan)
+        return [self.aggregate], value[:, None]
+
+    def _align(self, columns, values):
+        """return values rearranged into the reducer's columns (NaN where
+        missing), adding columns for new names"""
+        numbers = self._column_numbers
+        new = [name for name in columns if name not in numbers]
+        for name in new:
+            numbers[name] = len(self.columns)
+            self.columns.append(name)
+        if new:
+            self._add_columns(len(new))
+        aligned = np.full((len(self.times), len(self.columns)), np.nan)
+        aligned[:, [numbers[name] for name in columns]] = values
+        return aligned
+
+    def _add_columns(self, n):
+        """extend the state by n columns"""
+        raise NotImplementedError
+
+    def add(self, sample):
+        """add one run, given as returned by extract"""
+        raise NotImplementedError
+
+    def update(self, arrays):
+        """add one run, given in the format of
+        _TrajectoryDictionary.to_arrays. Each run may be added only once:
+        adding it again, e.g. after it has been continued, counts it
+        twice."""
+        self.add(self.extract(arrays))
+
+    def result(self):
+        """return a dict of the statistics, each an array of time points x
+        columns"""
+        raise NotImplementedError
+
+
+class Moments(_Reducer):
+    """Running count, mean and variance of a Variable over runs, at each
+    time point and column (Welford's algorithm). NaN values (instance not
+    active or time point not covered) are skipped."""
+
+    count = None
+    """array of the no. of runs with a value"""
+    mean = None
+    """array of means"""
+    _m2 = None
+    """array of sums of squared deviations from the mean"""
+
+    def __init__(self, var, times, **kwargs):
+        super().__init__(var, times, **kwargs)
+        shape = (len(self.times), 0)
+        self.count = np.zeros(shape, dtype=int)
+        self.mean = np.full(shape, np.nan)
+        self._m2 = np.zeros(shape)
+
+    def _add_columns(self, n):
+        rows = len(self.times)
+        self.count = np.hstack((self.count, np.zeros((rows, n), dtype=int)))
+        self.mean = np.hstack((self.mean, np.full((rows, n), np.nan)))
+        self._m2 = np.hstack((self._m2, np.zeros((rows, n))))
+
+    def add(self, sample):
+        x = self._align(*sample)
+        valid = ~np.isnan(x)
+        self.count += valid
+        mean = np.where(self.count > 0, np.nan_to_num(self.mean), np.nan)
+        delta = np.where(valid, x - mean, 0)
+        mean = np.where(valid, mean + delta / np.maximum(self.count, 1),
+                        mean)
+        self._m2 += np.where(valid, delta * (x - mean), 0)
+        self.mean = mean
+
+    @property  # read-only
+    def variance(self):
+        """array of sample variances (NaN where there are less than two
+        values)"""
+        return np.where(self.count > 1,
+                        self._m2 / np.maximum(self.count - 1, 1), np.nan)
+
+    @property  # read-only
+    def std(self):
+        """array of sample standard deviations"""
+        return np.sqrt(self.variance)
+
+    def result(self):
+        return {"count": self.count.copy(), "mean": self.mean.copy(),
+                "variance": self.variance, "std": self.std}
+
+
+class Quantiles(_Reducer):
+    """Approximate quantiles of a Variable over runs, at each time point and
+    column, using the P-square algorithm: for each quantile, five markers
+    track the minimum, the quantile, two intermediate quantiles, and the
+    maximum, and are adjusted by piecewise-parabolic interpolation as runs
+    are added. NaN values are skipped. Exact for up to five values."""
+
+    probabilities = None
+    """array of the probabilities of the quantiles"""
+    count = None
+    """array of the no. of runs with a value, time points x columns"""
+    _heights = None
+    """marker heights, quantiles x time points x columns x 5"""
+    _positions = None
+    """actual marker positions (0-based), same shape"""
+    _desired = None
+    """desired marker positions, same shape"""
+    _increments = None
+    """increments of the desired marker positions per value, quantiles x
+    5"""
+
+    def __init__(self, var, times, probabilities=(0.05, 0.5, 0.95),
+                 **kwargs):
+        super().__init__(var, times, **kwargs)
+        p = np.asarray(probabilities, dtype=float)
+        assert np.all((p > 0) & (p < 1)), \
+            "probabilities must be strictly between 0 and 1"
+        self.probabilities = p
+        self._increments = np.stack(
+            [0 * p, p / 2, p, (1 + p) / 2, 1 + 0 * p], axis=-1)
+        self.count = np.zeros((len(self.times), 0), dtype=int)
+        shape = (len(p), len(self.times), 0, 5)
+        self._heights = np.full(shape, np.nan)
+        self._positions = np.zeros(shape)
+        self._desired = np.zeros(shape)
+
+    def _add_columns(self, n):
+        self.count = np.concatenate(
+            (self.count, np.zeros((len(self.times), n), dtype=int)), axis=1)
+        shape = self._heights.shape[:2] + (n, 5)
+        self._heights = np.concatenate(
+            (self._heights, np.full(shape, np.nan)), axis=2)
+        self._positions = np.concatenate(
+            (self._positions, np.zeros(shape)), axis=2)
+        self._desired = np.concatenate(
+            (self._desired, np.zeros(shape)), axis=2)
+
+    def add(self, sample):
+        x = self._align(*sample)
+        valid = ~np.isnan(x)
+        q, n, desired = self._heights, self._positions, self._desired
+        xs = np.broadcast_to(x, q.shape[:3])
+        # the first five values are stored, then sorted to give the markers:
+        filling = valid & (self.count < 5)
+        if np.any(filling):
+            qi, ti, ci = np.nonzero(np.broadcast_to(filling, q.shape[:3]))
+            q[qi, ti, ci, self.count[ti, ci]] = xs[qi, ti, ci]
+            starting = filling & (self.count == 4)
+            if np.any(starting):
+                qi, ti, ci = np.nonzero(
+                    np.broadcast_to(starting, q.shape[:3]))
+                q[qi, ti, ci] = np.sort(q[qi, ti, ci], axis=-1)
+                n[qi, ti, ci] = np.arange(5)
+                desired[qi, ti, ci] = 4 * self._increments[qi]
+        updating = np.broadcast_to(valid & (self.count >= 5), q.shape[:3])
+        self.count += valid
+        if not np.any(updating):
+            return
+        qi, ti, ci = np.nonzero(updating)
+        qq, nn, dd = q[qi, ti, ci], n[qi, ti, ci], desired[qi, ti, ci]
+        xx = xs[qi, ti, ci]
+        # cell of the new value, extending the extreme markers if necessary:
+        qq[:, 0] = np.minimum(qq[:, 0], xx)
+        qq[:, 4] = np.maximum(qq[:, 4], xx)
+        k = np.clip((qq[:, 1:4] <= xx[:, None]).sum(axis=1), 0, 3)
+        nn += np.arange(5) > k[:, None]
+        dd += self._increments[qi]
+        # adjust the three middle markers:
+        for i in (1, 2, 3):
+            d = dd[:, i] - nn[:, i]
+            move = ((d >= 1) & (nn[:, i + 1] - nn[:, i] > 1)) \
+                | ((d <= -1) & (nn[:, i - 1] - nn[:, i] < -1))
+            if not np.any(move):
+                continue
+            d = np.sign(d[move])
+            qm, nm = qq[move], nn[move]
+            below, here, above = qm[:, i - 1], qm[:, i], qm[:, i + 1]
+            n_below, n_here, n_above = nm[:, i - 1], nm[:, i], nm[:, i + 1]
+            parabolic = here + d / (n_above - n_below) * (
+                (n_here - n_below + d) * (above - here) / (n_above - n_here)
+                + (n_above - n_here - d) * (here - below)
+                / (n_here - n_below))
+            neighbour = np.where(d > 0, above, below)
+            n_neighbour = np.where(d > 0, n_above, n_below)
+            linear = here + d * (neighbour - here) / (n_neighbour - n_here)
+            qm[:, i] = np.where((below < parabolic) & (parabolic < above),
+                                parabolic, linear)
+            nm[:, i] += d
+            qq[move], nn[move] = qm, nm
+        q[qi, ti, ci], n[qi, ti, ci], desired[qi, ti, ci] = qq, nn, dd
+
+    @property  # read-only
+    def quantiles(self):
+        """array of the quantile estimates, quantiles x time points x
+        columns (NaN where there is no value)"""
+        estimates = self._heights[..., 2].copy()
+        # (while there are at most five values, the markers are the values
+        # themselves):
+        few = (self.count > 0) & (self.count <= 5)
+        for ti, ci in zip(*np.nonzero(few)):
+            values = self._heights[0, ti, ci, :self.count[ti, ci]]
+            estimates[:, ti, ci] = np.quantile(values, self.probabilities)
+        estimates[:, self.count == 0] = np.nan
+        return estimates
+
+    def result(self):
+        return {"count": self.count.copy(), "quantiles": self.quantiles,
+                "probabilities": self.probabilities.copy()}
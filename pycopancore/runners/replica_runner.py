@@ -0,0 +1,164 @@
+"""ReplicaRunner class.
+
+Runs several parameter variants (replicas) of a model in one process and
+one Runner.run call: each replica is a separate set of entities of the same
+composite classes, so that all replicas share one ODE state vector and every
+Explicit, ODE and Jacobian evaluation is vectorized over all replicas at
+once. For models with cheap dynamics per entity, this amortizes the
+interpretive overhead of expression evaluation over the replicas without
+multiprocessing.
+
+Since a model has only one instance of each process taxon, the replicas
+share the process taxa. Their Variables can thus not differ between
+replicas, and the process taxa must not have processes of their own.
+The ODE solver uses one step size for all replicas (so results agree with
+single runs only up to the solver's tolerances), every Step or Event of a
+replica ends the smooth interval of all replicas, and all replicas draw from
+the same random number stream during the run.
+"""
+
+# This file is part of pycopancore.
+#
+# Copyright (C) 2016-2017 by COPAN team at Potsdam Institute for Climate
+# Impact Research
+#
+# URL: <http://www.pik-potsdam.de/copan/software>
+# Contact: core@pik-potsdam.de
+# License: BSD 2-clause license
+
+import logging
+import random
+from time import time
+
+import numpy as np
+
+from pycopancore.runners.runner import Runner
+from pycopancore.runners.ensemble_runner import EnsembleResults
+
+logger = logging.getLogger(__name__)
+
+
+class ReplicaRunner(object):
+    """Runs replicas of a model with different parameters as one large
+    model.
+
+    Example::
+
+        model = M.Model()
+        culture = M.Culture()
+
+        def build(eating_parameter):
+            world = M.World(culture=culture)
+            ...  # instantiate the entities of one replica
+
+        results = ReplicaRunner(model, build).run(
+            [{"eating_parameter": p} for p in np.linspace(.1, 1, 50)],
+            t_1=100, dt=1)
+    """
+
+    model = None
+    """the configured model"""
+    build = None
+    """function creating the entities of one replica"""
+    termination_calls = None
+    """termination calls passed to the Runner"""
+
+    def __init__(self,
+                 model,
+                 build,
+                 *,
+                 termination_calls=None
+                 ):
+        """Instantiate a ReplicaRunner.
+
+        Parameters
+        ----------
+        model : Model
+            The configured model, with all process taxa instantiated.
+        build : callable
+            Function called as build(**params) for each replica. It must
+            create all entities of the replica (without changing the
+            process taxa), e.g. a World with its Cells and Individuals.
+        termination_calls : list, optional
+            As for Runner.
+        """
+        assert callable(build), "build must be callable"
+        for process in model.processes:
+            assert process.owning_class not in model.process_taxa, \
+                "replicas would share the process " + str(process) \
+                + " of process taxon " + str(process.owning_class)
+        self.model = model
+        self.build = build
+        self.termination_calls = termination_calls
+
+    def run(self, members, *, reducers=None, keep_trajectories=True,
+            **run_kwargs):
+        """Build all replicas, run them together, and split the trajectory.
+
+        Parameters
+        ----------
+        members : list of dict
+            One dict of parameters for build per replica. The optional entry
+            "seed" is used to seed numpy's and python's random number
+            generators before build is called; during the run, all replicas
+            draw from the same stream.
+        reducers : list, optional
+            Reducers (Moments, Quantiles, ...) that each replica is added to
+        keep_trajectories : bool, optional
+            Whether the replicas' trajectories are kept in the result
+            (default: True)
+        **run_kwargs
+            Keyword arguments passed to Runner.run, e.g. t_1 and dt.
+
+        Returns
+        -------
+        EnsembleResults
+            store of all replicas' trajectories, in the order of members.
+            Each contains the columns of the replica's entities and of the
+            (shared) process taxa. Entities created during the run are not
+            attributed to any replica and are thus missing.
+        """
+        reducers = [] if reducers is None else list(reducers)
+        results = EnsembleResults(members, reducers)
+        model = self.model
+        starttime = time()
+        # names of the entities of each replica:
+        names = []
+        for member in results.members:
+            params = dict(member)
+            seed = params.pop("seed", None)
+            if seed is not None:
+                np.random.seed(seed)
+                random.seed(seed)
+            before = set(inst for cls in model.entity_types
+                         for inst in cls.instances)
+            self.build(**params)
+            names.append(set(
+                str(inst) for cls in model.entity_types
+                for inst in cls.instances if inst not in before))
+        logger.info("built %d replicas in %s seconds", len(names),
+                    time() - starttime)
+        runner = Runner(model=model, termination_calls=self.termination_calls)
+        arrays = runner.run(**run_kwargs).to_arrays()
+        runtime = time() - starttime
+        taxa = set(str(inst) for cls in model.process_taxa
+                   for inst in cls.instances)
+        for index, replica in enumerate(names):
+            split = {'t': arrays['t']}
+            for var, item in arrays.items():
+                if var == 't':
+                    continue
+                columns = [i for i, name in enumerate(item['instances'])
+                           if name in replica or name in taxa]
+                split[var] = {
+                    'instances': [item['instances'][i] for i in columns],
+                    'values': item['values'][:, columns],
+                    'active': item['active'][:, columns],
+                }
+            for reducer in reducers:
+                reducer.update(split)
+            if keep_trajectories:
+                results.trajectories[index] = split
+            results.runtimes[index] = runtime / len(names)
+        logger.info("%d replicas took %s seconds", len(names), runtime)
+        return results
@@ -12,22 +12,40 @@
 
 # TODOs: 
 # - rename to ScipyODERunner
-# - enable verbosity level, use proper logger
 
 from pycopancore.process_types import Event, Step
-from pycopancore.data_model import Variable
+from pycopancore.data_model import SetVariable, Variable
 from pycopancore.private._abstract_runner import _AbstractRunner
 from pycopancore.private._expressions import eval
+from pycopancore.private._ode_solvers import make_solver, locate_crossing
+from pycopancore.private._jacobian import _JacobianBuilder
+from pycopancore.private._scheduler import _Scheduler
 from pycopancore.private._simple_expressions import unknown
 from pycopancore.private._abstract_entity_mixin import _AbstractEntityMixin
+from pycopancore.private._mixin import _Mixin
 from pycopancore.private._trajectory_dictionary import _TrajectoryDictionary
+from pycopancore.private._trajectory_writer import _HDF5TrajectoryWriter
+from pycopancore.private._output_thinning import _OutputThinning
+from pycopancore.private._snapshot import _ModelSnapshot
+from pycopancore.private._checkpoint import write_checkpoint, \
+    read_checkpoint
+from pycopancore.private._hazards import _HazardTracker, has_varying_rate, \
+    rate_dependencies
+from pycopancore.private._logging import TRACE, _Progress, set_verbosity
+from pycopancore.private._profiler import _Profiler, _TimedScheduler
+from pycopancore.private._conditions import _ConditionTracker, \
+    condition_dependencies
 # TODO: discuss whether this makes sense or leads to problems:
 from pycopancore.runners.hooks import Hooks
 
-from scipy import integrate
+import logging
 import numpy as np
+from collections.abc import Set
+from networkx import Graph
 
-from time import time
+from time import time, perf_counter
+
+logger = logging.getLogger(__name__)
 # import sys
 
 # from profilehooks import coverage, profile
@@ -42,11 +60,45 @@ class Runner(_AbstractRunner):
 
     _current_iteration = None
     """counter for expression evaluation cache"""
+    _jacobian_builder = None
+    """_JacobianBuilder of the current run"""
+    _state_t = None
+    """time of the state most recently written into the instances by
+    get_rhs_array or set_state"""
+    _state_array = None
+    """copy of the value array most recently written into the instances"""
+    _rhs_explicit_processes = None
+    """Explicit processes whose targets the ODE derivatives depend on,
+    applied in get_rhs_array"""
+    _output_explicit_processes = None
+    """remaining Explicit processes, applied only at output times"""
+    _structure_version = None
+    """value of _Mixin._structure_version for which the structure-dependent
+    caches (kernels, target instances, state layout) were last built"""
+    _structure_fingerprint = None
+    """value of structure_fingerprint() when these caches were last built"""
+    _structure_attributes = None
+    """list of pairs (composed class, codename) of the networks and stored
+    set-valued attributes covered by structure_fingerprint"""
+    _resume_state = None
+    """state read from a checkpoint by resume, for the next call of run"""
+    _event_engines = None
+    """dict mapping rate Events to the pairs (engine, tau) used in the
+    current run (see Event)"""
+    _hazards = None
+    """_HazardTracker of the rate Events with varying rates in the current
+    run, or None if there are none"""
+    termination_conditions = None
+    """list of symbolic conditions that end the run when they become
+    true"""
+    _profiler = None
+    """_Profiler of the current run, or None if it is not profiled"""
 
     def __init__(self,
                  model,
                  *,
-                 termination_calls=None
+                 termination_calls=None,
+                 termination_conditions=None
                  ):
         """Instantiate a Runner.
 
@@ -57,7 +109,13 @@ class Runner(_AbstractRunner):
         termination_calls : list, optional
             List of lists of callables and instances on which they are to be
             called to determine if the runner should terminate in special
-            cases prior to the time limit.
+            cases prior to the time limit. They are checked after each
+            solver step and at each discontinuity.
+        termination_conditions : list, optional
+            List of symbolic inequalities on the state, e.g.
+            [B.World.atmospheric_carbon > 1000]. The run ends at the time
+            at which one of them becomes true for some instance, which is
+            located precisely by root finding during integration.
         kwargs
         """
         super(Runner, self).__init__()
@@ -75,28 +133,198 @@ class Runner(_AbstractRunner):
         self.trajectory_dict = _TrajectoryDictionary()
 
         self.termination_calls = termination_calls
+        self.termination_conditions = list(termination_conditions or [])
 
         # initialize counter:
         self._current_iteration = 0
 
+        # split Explicit processes into those needed during integration
+        # and those only needed for output:
+        self._rhs_explicit_processes = self.get_ODE_relevant_explicits()
+        self._output_explicit_processes = [
+            p for p in self.explicit_processes
+            if p not in self._rhs_explicit_processes]
+
+    def get_ODE_relevant_explicits(self):
+        """Return the Explicit processes whose targets the ODE derivatives
+        depend on directly or indirectly.
+
+        Uses the model's ODE_dependencies and explicit_dependencies. Since
+        the cumulative hazards of rate Events with varying rates are
+        integrated as well, their rates count as derivatives, and so do
+        the conditions monitored during integration (see hold_state). If
+        some dependencies are unknown, all Explicit processes are returned.
+
+        Returns
+        -------
+        list
+            Explicit processes in the same order as in the model
+        """
+        model = self.model
+        needed = set()
+        stack = []
+        for deps in model.ODE_dependencies.values():
+            if deps in (None, unknown):
+                return list(self.explicit_processes)
+            stack += list(deps)
+        for event in self.event_processes:
+            if has_varying_rate(event):
+                deps = rate_dependencies(event)
+                if deps is None:
+                    return list(self.explicit_processes)
+                stack += list(deps)
+            elif event.specification[0] == "condition":
+                stack += list(condition_dependencies(event.specification[1]))
+        for condition in self.termination_conditions:
+            stack += list(condition_dependencies(condition))
+        while stack:
+            var = stack.pop()
+            if var in needed:
+                continue
+            needed.add(var)
+            if var in model.explicit_dependencies:
+                deps = model.explicit_dependencies[var]
+                if deps in (None, unknown):
+                    return list(self.explicit_processes)
+                stack += list(deps)
+        return [p for p in self.explicit_processes
+                if any(target.target_variable in needed
+                       for target in p.targets)]
+
+    def invalidate_kernels(self):
+        """Mark the compiled expression kernels of all ODE and Explicit
+        processes as outdated.
+
+        Must be called whenever steps or events may have changed which
+        instances exist or how they reference each other, since the kernels
+        contain precomputed broadcasting and aggregation layouts.
+        """
+        for p in self.ode_processes + self.explicit_processes:
+            if p._kernels is not None:
+                for kernel in p._kernels:
+                    kernel.invalidate()
+
+    def refresh_structure(self):
+        """Rebuild structure-dependent caches if necessary.
+
+        Clears the cached target instances of all ODE and Explicit targets and
+        invalidates the compiled kernels, but only if entities were added,
+        (de)activated or re-linked, or networks or sets were edited (see
+        structure_fingerprint), since the last call.
+
+        Returns
+        -------
+        bool
+            whether the caches were rebuilt
+        """
+        fingerprint = self.structure_fingerprint()
+        if self._structure_version == _Mixin._structure_version:
+            if fingerprint == self._structure_fingerprint:
+                return False
+            # a network or set was edited in place, which is now noted for
+            # all other caches depending on the structure:
+            _Mixin._structure_changed()
+        for target in self.model.ODE_targets + self.model.explicit_targets:
+            target._target_instances = unknown
+        self.invalidate_kernels()
+        self._structure_version = _Mixin._structure_version
+        self._structure_fingerprint = fingerprint
+        return True
+
+    def structure_fingerprint(self):
+        """Return a hash of the contents of all networks and stored
+        set-valued attributes of the active instances.
+
+        Unlike creating entities or assigning references, adding or removing
+        network edges (e.g. of Culture.acquaintance_network, from which
+        Individual.acquaintances is derived) or set elements in place does
+        not call _structure_changed, so refresh_structure compares this
+        fingerprint as well.
+
+        Returns
+        -------
+        int
+            the hash
+        """
+        if self._structure_attributes is None:
+
+            def is_property(cls, codename):
+                # (the composite class itself returns the Variable):
+                for c in cls.__mro__:
+                    if codename in c.__dict__:
+                        return isinstance(c.__dict__[codename], property)
+                return False
+
+            self._structure_attributes = [
+                (cls, var.codename)
+                for cls in self.model.entity_types + self.model.process_taxa
+                for var in cls.variables
+                if (isinstance(var.datatype, type)
+                    and issubclass(var.datatype, Graph))
+                # (sets derived via properties are covered by the networks
+                # or by _structure_changed):
+                or (isinstance(var, SetVariable)
+                    and not is_property(cls, var.codename))]
+        items = []
+        for cls, codename in self._structure_attributes:
+            for inst in cls.instances or ():
+                value = getattr(inst, codename, None)
+                if isinstance(value, Graph):
+                    items.append((id(value), len(value),
+                                  frozenset(value.edges)))
+                # (unset ones give None, unknown or the Variable itself):
+                elif isinstance(value, Set):
+                    items.append(frozenset(value))
+        return hash(tuple(items))
+
+    def evaluate(self, process, i):
+        """Evaluate the i-th expression of a process' symbolic specification.
+
+        Uses the compiled kernel if there is one, otherwise interprets the
+        expression via _expressions.eval.
+
+        Parameters
+        ----------
+        process : _AbstractProcess
+            ODE or Explicit process with a list specification
+        i : int
+            position of the expression in the specification
+
+        Returns
+        -------
+        array
+            values, one for each target instance
+        """
+        if process._kernels is not None:
+            return process._kernels[i]()
+        return eval(process.specification[i], self._current_iteration)
+
 #    @profile  # generates time profiling information
-    def apply_explicits(self, t):
-        """Apply all Explicit processes.
+    def apply_explicits(self, t, processes=None):
+        """Apply all (or some) Explicit processes.
 
         Parameters
         ----------
         t : float
             Model time
+        processes : list, optional
+            Explicit processes to apply, in this order (default: all)
         """
         # TODO: apply them in an order that respects dependencies among
         # variables! for this, determine dependency structure in
         # modellogics.configure!
-        # TODO: use a numpy array to store values of explicitly calculated
-        # variables just as for ode variables, to avoid reading and writing
-        # entities' attributes all the time (profiling has shown that this
-        # takes a significant portion of the time).
-        for p in self.explicit_processes:
+        # Note: if the model was configured with columnar=True, values of
+        # float-valued variables are stored in numpy arrays (see
+        # _ColumnStore), so that target.fast_set_values and expression
+        # evaluation read and write whole columns rather than individual
+        # entities' attributes.
+        profiler = self._profiler
+        if profiler is not None:
+            _starttime = perf_counter()
+        for p in self.explicit_processes if processes is None else processes:
 #            print(t,"Process",p)
+            if profiler is not None:
+                start = perf_counter()
             spec = p.specification  # either a list of symbolic expressions or a method
             if isinstance(spec, list):
                 # it's a list of symbolic expressions, one for each target in
@@ -106,19 +334,31 @@ class Runner(_AbstractRunner):
                     # evaluate corresponding expression,
                     # giving a list of values, one for each instance,
                     # in an order determined by the target:
-                    values = eval(spec[i],
-                                  self._current_iteration)
+                    values = self.evaluate(p, i)
                     # note that values may have different length than
                     # p.owning_class.instances due to broadcasting effects
                     # if the target is a dotconstruct.
                     # store values in these target instances:
                     target.fast_set_values(values)
+            elif p.batch:
+                # it's a method that computes all instances' values at once,
+                # returning one array of values for each target:
+                for target, values in zip(p.targets,
+                                          spec(p.owning_class, t)):
+                    if np.isscalar(values):
+                        # same value for all instances:
+                        values = np.array([values])
+                    target.fast_set_values(values)
             else:  # it's a method
                 # call process' implementation method for each of its
                 # owning class' (!) instances. This will store values in
                 # the target (!) instances' attributes directly:
                 for inst in p.owning_class.instances:
                     spec(inst, t)
+            if profiler is not None:
+                profiler.add(p, start)
+        if profiler is not None:
+            profiler.add_phase("explicits", _starttime)
 
 #    @profile  # generates time profiling information
     def get_rhs_array(self,
@@ -141,7 +381,12 @@ class Runner(_AbstractRunner):
         array
             array of derivatives in same order as value_array
         """
+        profiler = self._profiler
+        if profiler is not None:
+            _starttime = perf_counter()
         self._current_iteration += 1  # marks current evaluation caches as outdated
+        self._state_t = t
+        self._state_array = value_array.copy()
 
         # copy values from value_array into instance attributes,
         # and clear target instances' derivative attributes:
@@ -152,21 +397,28 @@ class Runner(_AbstractRunner):
             var.fast_set_values(values=value_array[target._from:target._to])
             var.clear_derivatives()
 
-        # Execute all explicit processes (3.1.2 in runner scheme):
-        self.apply_explicits(t)
-        # TODO: for speedup, only do this for those explicits whose targets
-        # are needed during ODE integration, and execute all others ex post.
+        # Execute those explicit processes the derivatives depend on
+        # (3.1.2 in runner scheme). All others are executed only at output
+        # times (see set_state):
+        self.apply_explicits(t, self._rhs_explicit_processes)
 
         # let all processes calculate their derivative terms:
         summands_array = np.zeros(value_array.size)
         for p in self.ode_processes:
+            if profiler is not None:
+                start = perf_counter()
             spec = p.specification
-            if isinstance(spec, list):
-                # its a list of symbolic expressions, one for each target:
+            if isinstance(spec, list) or p.batch:
+                if p.batch:
+                    # it's a method computing derivative terms for all
+                    # instances at once, one array for each target:
+                    batch_summands = spec(p.owning_class, t)
+                # else its a list of symbolic expressions, one for each target:
                 for i, target in enumerate(p.targets):
                     # evaluate symbolic expression for each target instance,
                     # giving a list:
-                    summands = eval(spec[i], self._current_iteration)
+                    summands = np.atleast_1d(batch_summands[i]) if p.batch \
+                        else self.evaluate(p, i)
                     if isinstance(target, Variable):
                         # add result directly to output array
                         # (rather than in instances' derivative attributes):
@@ -196,6 +448,8 @@ class Runner(_AbstractRunner):
 #                print("calling spec for",p,"with targets",p.targets)
                 for inst in p.owning_class.instances:
                     spec(inst, t)
+            if profiler is not None:
+                profiler.add(p, start)
 
         # compose complete derivative array:
         derivative_array = np.zeros(value_array.size)
@@ -214,25 +468,133 @@ class Runner(_AbstractRunner):
             derivative_array[target._from:target._to] = \
                 target.target_variable.get_derivatives(
                             instances=target.target_class.instances)
+        if self._hazards is not None:
+            # the derivatives of the cumulative hazards are the rates:
+            hazards = self._hazards
+            derivative_array[hazards.offset:hazards.offset + hazards.size] = \
+                hazards.rates(t, self._current_iteration)
 #        print("derivs:",derivative_array)
+        if profiler is not None:
+            profiler.add_phase("rhs", _starttime)
         return derivative_array
 
+    def get_jacobian(self, t, value_array):
+        """Return the Jacobian of get_rhs_array as a sparse matrix.
+
+        Only available if all ODE processes and the Explicit processes they
+        depend on have symbolic specifications.
+
+        Parameters
+        ----------
+        t : float
+            Model time
+        value_array : array
+            array of variable values
+
+        Returns
+        -------
+        sparse matrix
+            Jacobian w.r.t. value_array
+        """
+        profiler = self._profiler
+        if profiler is not None:
+            _starttime = perf_counter()
+        self.set_state(t, value_array)
+        jacobian = self._jacobian_builder.jacobian()
+        if profiler is not None:
+            profiler.add_phase("jacobian", _starttime)
+        return jacobian
+
+    def hold_state(self, t, value_array):
+        """Write an ODE state into the instances and apply only the
+        Explicit processes the derivatives and monitored conditions depend
+        on.
+
+        Parameters
+        ----------
+        t : float
+            Model time
+        value_array : array
+            array of variable values in same order as for get_rhs_array
+        """
+        if t == self._state_t and np.array_equal(value_array,
+                                                 self._state_array):
+            return
+        self._current_iteration += 1  # marks current evaluation caches as outdated
+        self._state_t = t
+        self._state_array = value_array.copy()
+        for target in self.model.ODE_targets:
+            target.target_variable.fast_set_values(
+                values=value_array[target._from:target._to])
+        self.apply_explicits(t, self._rhs_explicit_processes)
+
+    def set_state(self, t, value_array):
+        """Write an ODE state into the instances and apply all Explicit
+        processes.
+
+        If the instances already hold this state since the last call of
+        get_rhs_array or hold_state, only the Explicit processes not applied
+        there are applied.
+
+        Parameters
+        ----------
+        t : float
+            Model time
+        value_array : array
+            array of variable values in same order as for get_rhs_array
+        """
+        if t == self._state_t and np.array_equal(value_array,
+                                                 self._state_array):
+            # e.g. since the solver's last RHS evaluation was at this state,
+            # so only the Explicit processes not needed there are missing:
+            self.apply_explicits(t, self._output_explicit_processes)
+            return
+        self._current_iteration += 1  # marks current evaluation caches as outdated
+        self._state_t = t
+        self._state_array = value_array.copy()
+        for target in self.model.ODE_targets:
+            target.target_variable.fast_set_values(
+                values=value_array[target._from:target._to])
+        self.apply_explicits(t)
+
     # @profile
     def run(self,
             *,
             t_0=0,
             t_1,
-            dt,  # TODO: rename to "resolution" since it is only an upper bound?
+            dt=None,  # TODO: rename to "resolution" since it is only an upper bound?
+            output_times=None,
             exclusions=None,
-            # TODO: add some kwargs for choosing solver and setting its params
             max_resolution=False,
-            add_to_output=None  # optional list of variables to include in output
+            thinning=None,
+            add_to_output=None,  # optional list of variables to include in output
+            solver="dopri5",
+            rtol=None,
+            atol=None,
+            first_step=None,
+            max_step=None,
+            nsteps=10000,
+            jacobian=True,
+            output_file=None,
+            keep_trajectory=True,
+            checkpoint_file=None,
+            checkpoint_interval=None,
+            event_engine=None,
+            tau=None,
+            progress=None,
+            profile=False,
+            verbosity=None
             ):
         """Run the model for a specified time interval.
 
         Run the model by simulating all processes in the right order in a way
         depending on process type (ODE integration, time stepping, etc.).
 
+        The layout of the ODE state vector and the instances of aggregations
+        and references are cached and only rebuilt after entities were
+        created, (de)activated or deleted, reference attributes assigned, or
+        networks or set-valued attributes edited (see refresh_structure).
+
         Parameters
         ----------
         t_0 : float, optional
@@ -240,23 +602,123 @@ class Runner(_AbstractRunner):
         t_1 : float
             End time
         dt : float
-            Maximal interval between output time points
+            Maximal interval between output time points (required unless
+            output_times is given)
+        output_times : array, optional
+            If given, output is produced exactly at these times (those in
+            [t_0, t_1]) rather than at the solver's steps, by interpolating
+            the solver's dense output, and the solver's step size is not
+            limited by dt. At the time of a discontinuity, the output shows
+            the state after the Steps and Events.
         exclusions: list
             List with Variables, that shan't be included into the output
             trajectory_dict
+        max_resolution : bool, optional
+            If True, keep only output time points at least dt apart
+            (same as thinning=("spacing", dt)). Default: False
+        thinning : tuple, optional
+            Policy for thinning the output time points, applied once per
+            smooth interval (see _OutputThinning): ("spacing", d) keeps
+            time points at least d apart, ("grid", step_or_array) keeps the
+            first time point at or after each grid point, ("every", k) keeps
+            every k-th time point. Time points at discontinuities and the
+            first and last one are always kept. Default: None (keep all)
+        solver : str, optional
+            ODE integration method: "dopri5" (default) or "dop853" from
+            scipy.integrate.ode, or "RK45", "RK23", "DOP853", "LSODA", "BDF",
+            "Radau" from scipy.integrate.solve_ivp. For stiff models, choose
+            one of the latter three.
+        rtol, atol : float or array, optional
+            Relative and absolute error tolerances of the solver
+            (default: the solver's own defaults)
+        first_step : float, optional
+            Initial step size (default: chosen by the solver)
+        max_step : float, optional
+            Maximal step size (default: dt, or unlimited if output_times is
+            given)
+        nsteps : int, optional
+            Maximal no. of solver steps between two discontinuities
+            (default: 10000)
+        jacobian : bool, optional
+            Whether to pass the Jacobian's sparsity pattern and, if all
+            relevant specifications are symbolic, the analytic Jacobian to
+            solvers that use it ("LSODA", "BDF", "Radau"). If the model has
+            any Event with a state-dependent rate, only the sparsity pattern
+            is passed, since the cumulative hazards integrated along with
+            the ODEs have no analytic Jacobian. Default: True
+        output_file : str, optional
+            Name of an HDF5 file to which the trajectory is written in
+            chunks while running (requires h5py, see _HDF5TrajectoryWriter)
+        keep_trajectory : bool, optional
+            If False and output_file is given, time points are removed from
+            the returned trajectory_dict once they have been written, so that
+            memory use does not grow with the length of the run.
+            Default: True
+        checkpoint_file : str, optional
+            Name of a file to which the state of the run is written at
+            discontinuities (Steps and Events), so that the run can be
+            continued from there by resume, e.g. after a crash
+        checkpoint_interval : float, optional
+            Minimal model time between two checkpoints (default: write one
+            at every discontinuity)
+        event_engine : str, optional
+            If given, simulate all rate Events with this engine ("instance",
+            "gillespie" or "tau-leaping", see Event) rather than with their
+            own
+        tau : float, optional
+            Leap interval if event_engine is "tau-leaping"
+        progress : bool, optional
+            Whether to show a progress bar on sys.stderr, redrawn at most
+            once per second (default: only if sys.stderr is a terminal)
+        profile : bool, optional
+            Whether to record the no. of calls and the wall time of each
+            process and of the phases of the run (see _Profiler), which is
+            then available as the attribute profile of the returned
+            trajectory_dict (default: False). If the run is resumed from a
+            checkpoint, only the resumed part is recorded.
+        verbosity : str, optional
+            If given, set_verbosity(verbosity) is called first, so that
+            messages of this level ("quiet", "info", "debug" or "trace") are
+            written to sys.stdout. Otherwise, the application's logging
+            configuration decides which messages are shown
 
         Returns
         -------
         trajectory_dict: dict
             Model trajectory in requested time interval.
-            Keys: 't' (contains the list of time points)
+            Keys: 't' (contains the array of time points)
                 and each Variable object simulated.
-            Value of trajectory_dict[var]: dict with
-                key: entity or taxon,
-                value: list of variable values in same order as time points.
+            Value of trajectory_dict[var]: dict-like _VariableTrajectory
+                with key: entity or taxon,
+                value: array of variable values in same order as time
+                points (NaN or None where the entity was not active).
         """
-        print("\nRunning from", t_0, "to", t_1, "with output at least every",
-              dt, "...")
+        # (arguments stored in checkpoints, to be passed again by resume:)
+        run_kwargs = dict(locals())
+        del run_kwargs["self"]
+
+        _runstarttime = time()  # for performance reporting
+        if verbosity is not None:
+            set_verbosity(verbosity)
+        # (the levels are checked once here rather than for each message in
+        # the loops below):
+        trace = logger.isEnabledFor(TRACE)
+
+        self._profiler = profiler = _Profiler() if profile else None
+
+        if output_times is None:
+            assert dt is not None, "either dt or output_times must be given"
+            logger.info("Running from %s to %s with output at least every "
+                        "%s ...", t_0, t_1, dt)
+        else:
+            output_times = np.sort(np.asarray(output_times, dtype=float))
+            output_times = output_times[(output_times >= t_0)
+                                        & (output_times <= t_1)]
+            logger.info("Running from %s to %s with output at %d given "
+                        "times ...", t_0, t_1, len(output_times))
+        if progress is None:
+            progress = _Progress.wanted()
+        progress = _Progress(t_0, t_1) if progress else None
 
         # Initialize running time variable to starting time:
         t = t_0
@@ -265,337 +727,572 @@ class Runner(_AbstractRunner):
         # units, so that no DimensionalQuantities are left in variable values:
         self.model.convert_to_standard_units()
 
-        # Create output dictionary:
-        self.trajectory_dict = _TrajectoryDictionary()
-        for v in self.model.variables:
-            self.trajectory_dict[v] = {}
+        # engines used for rate Events:
+        assert event_engine in (None,) + Event.engines, \
+            "event_engine must be one of " + ", ".join(Event.engines)
+        assert event_engine != "tau-leaping" or (tau is not None and tau > 0), \
+            "tau-leaping requires a positive tau"
+        # (rate Events with varying rates are always simulated per
+        # instance, see below)
+        self._event_engines = {
+            event: (event.engine, event.tau)
+            if event_engine is None or has_varying_rate(event)
+            else (event_engine, tau)
+            for event in self.event_processes
+            if event.specification[0] == "rate"}
+        # rate Events simulated for whole classes by a single waiting time,
+        # which is redrawn whenever the no. of instances may have changed:
+        gillespie_events = [event for event, (engine, _)
+                            in self._event_engines.items()
+                            if engine == "gillespie"]
+
+        # state to continue from if called by resume:
+        resumed = self._resume_state
+        self._resume_state = None
+
+        # rate Events whose rate is a symbolic expression or method are
+        # simulated by integrating their cumulative hazards along with the
+        # ODEs until one reaches a randomly drawn threshold:
+        varying_events = [event for event in self.event_processes
+                          if has_varying_rate(event)]
+        if not varying_events:
+            self._hazards = None
+        elif resumed is None:
+            self._hazards = _HazardTracker(varying_events)
+        else:
+            self._hazards = resumed["hazards"]
+        hazards = self._hazards
+
+        # Events of type "condition" and termination conditions are
+        # monitored during integration:
+        condition_events = [event for event in self.event_processes
+                            if event.specification[0] == "condition"]
+        conditions = _ConditionTracker(
+            self, self.termination_conditions, condition_events) \
+            if condition_events or self.termination_conditions else None
+        # trackers whose residuals stop the solver when they become
+        # nonnegative:
+        trackers = [tracker for tracker in (hazards, conditions)
+                    if tracker is not None]
+
+        if resumed is None:
+            # Create output dictionary:
+            self.trajectory_dict = _TrajectoryDictionary()
+            for v in self.model.variables:
+                self.trajectory_dict.add_variable(v)
+            if max_resolution and thinning is None:
+                thinning = ("spacing", dt)
+            if thinning is not None:
+                self.trajectory_dict.thinning = _OutputThinning(*thinning)
+            if output_file is not None:
+                self.trajectory_dict.attach(
+                    _HDF5TrajectoryWriter(output_file), keep=keep_trajectory)
+        else:
+            self.trajectory_dict = resumed["trajectory"]
+            if self.trajectory_dict.writer is not None:
+                self.trajectory_dict.writer.reopen(self.trajectory_dict)
+            t = resumed["t"]
 
         # Remove exclusions from being saved:
-        targets_to_save = self.model.process_targets
+        targets_to_save = list(self.model.process_targets)
         # print(self.model.process_targets)
         if exclusions is not None:
             for var in exclusions:
                 targets_to_save.remove(var)
 
-        # Save initial state to output dict:
-        self.trajectory_dict['t'] = [t]
+        # index of the next output time to be saved, and latest state array
+        # passed by the solver (only used if output_times is given):
+        next_output = [0] if resumed is None else resumed["next_output"]
+        last_array = [None]
 
-        self.save_to_traj(targets_to_save,
-                          add_to_output,
-                          max_resolution,
-                          dt)
-        # TODO: have save_to_traj() save t as well to have this cleaner.
+        def save_output_times(until, inclusive, prepare=None):
+            """Save the state at all output times before until (or at until
+            if inclusive) not yet saved.
 
-        # Create dictionary containing discontinuities:
-        next_discontinuities = {}
-
-        # Apply all Explicit processes (2.2 in runner scheme)
-        print("  Initial application of Explicit processes...")
-        self.apply_explicits(t_0)
-
-        # Only now save initial state to output dict:
-        self.trajectory_dict['t'] = [t]
-        self.save_to_traj(targets_to_save,
-                          add_to_output,
-                          max_resolution,
-                          dt)
-        # TODO: have save_to_traj() save t as well to have this cleaner.
-
-        # TODO: discuss whether hooks make sense, then maybe:
-        # TODO: add hooks to runner scheme
-        # apply all pre-hooks
-        if Hooks._pre_hooks:
-            print("  Executing pre-hooks ...")
-            Hooks.execute_hooks(Hooks.Types.pre, self.model, t_0)
+            Parameters
+            ----------
+            until : float
+                Model time
+            inclusive : bool
+                whether to save an output time equal to until
+            prepare : callable, optional
+                called as prepare(s) for each output time s to make the
+                instances hold the state at s
+            """
+            i = next_output[0]
+            while i < len(output_times) and (
+                    output_times[i] < until
+                    or (inclusive and output_times[i] == until)):
+                if prepare is not None:
+                    prepare(output_times[i])
+                self.trajectory_dict.append_time(output_times[i])
+                self.save_to_traj(targets_to_save, add_to_output)
+                i += 1
+            next_output[0] = i
+
+        if resumed is None:
+            # Create priority queue of discontinuities:
+            scheduler = _Scheduler()
+        else:
+            scheduler = resumed["scheduler"]
+        # (its operations are timed when profiling, but checkpoints store
+        # the scheduler itself):
+        next_discontinuities = scheduler if profiler is None \
+            else _TimedScheduler(scheduler, profiler)
+
+        if resumed is None:
+            # Apply all Explicit processes (2.2 in runner scheme)
+            logger.debug("  Initial application of Explicit processes...")
+            self._structure_version = self._structure_attributes = None
+            self.refresh_structure()
+            self.apply_explicits(t_0)
+
+            # Only now save initial state to output dict:
+            if output_times is None:
+                self.trajectory_dict.append_time(t)
+                self.save_to_traj(targets_to_save, add_to_output)
+            else:
+                save_output_times(t_0, inclusive=True)
+            # TODO: have save_to_traj() save t as well to have this cleaner.
 
-        # Find first occurrence times of events (2.3 in runner scheme):
-        print("  Finding times of first occurrence of Events...")
-        for event in self.event_processes:
-            print("    Event process", event, "...")
-            eventtype = event.specification[0]
-            rate_or_timefunc = event.specification[1]
-            # TODO: Check if the following loop is correct:
-            for inst in event.owning_class.instances:
-                # inst is a process taxon or entity
-                assert eventtype in ("rate", "time"), \
-                    "unsupported type of Event"
-                if eventtype == "rate":
-                    assert rate_or_timefunc > 0, \
-                        "zero, negative, or varying rates not supported yet."
-                    next_time = t_0 + np.random.exponential(1. / rate_or_timefunc)
-                    # TODO: if rate_or_timefunc is a function or symbolic expression in this case,
-                    # it returns a potentially time-varying rate that depends on state,
-                    # hence it must be used in ode integration to integrate
-                    # its cumulative distribution function, and when the
-                    # latter crosses a threshold that we randomly draw
-                    # here, solout must terminate (see below).
-                elif eventtype == "time":
-                    # in this case, rate_or_timefunc directly returns a time:
-                    next_time = rate_or_timefunc(inst, t)
-                    assert next_time > t_0, "next time must be > t"
-                try:
-                    next_discontinuities[next_time].append((event, inst))
-                except KeyError:
-                    next_discontinuities[next_time] = [(event, inst)]
-                print("      time", next_time, ":", inst)
-
-        # Fill next_discontinuities with times of next steps and perform
-        # a step if necessary (still 2.3 in runner scheme):
-        print("  Executing Steps and finding times of next execution...")
-        for step in self.step_processes:
-            print("    Step process", step, "...")
-            next_time_func = step.specification[0]
-            method = step.specification[1]
-            for inst in step.owning_class.instances:
-                # inst is a process taxon or entity
-                # FIXME: it seems inconsistent how we currently deal with the
-                # question whether a step exectutes at t_0 since it is unclear
-                # how the step would indicate that it is so.
-                # if next_time_func(inst, t) gives the smallest stepping time
-                # AFTER t, the following check would be incorrect:
-                if next_time_func(inst, t_0) == t_0:
-                    # so this step occurs right at the beginning
-                    method(inst, t)
-                    # ask process when it steps next:
-                    next_time = next_time_func(inst, t)
-                    assert next_time > t_0, "next time must be > t"
-                # TODO: Same time for all instances? self. necessary?
-                else:
-                    # ask process when it steps next:
-                    next_time = next_time_func(inst, t)
-                    assert next_time > t_0, "next time must be > t"
-                # register next stepping time in dict:
-                try:
-                    next_discontinuities[next_time].append((step, inst))
-                    # so there were already events at the same time
-                except KeyError:
-                    # so there was no event yet at that time
-                    next_discontinuities[next_time] = [(step, inst)]
-                print("      time", next_time, ":", inst)
+            # TODO: discuss whether hooks make sense, then maybe:
+            # TODO: add hooks to runner scheme
+            # apply all pre-hooks
+            if Hooks._pre_hooks:
+                logger.debug("  Executing pre-hooks ...")
+                Hooks.execute_hooks(Hooks.Types.pre, self.model, t_0)
+
+            # Find first occurrence times of events (2.3 in runner scheme):
+            logger.debug("  Finding times of first occurrence of "
+                         "Events...")
+            for event in self.event_processes:
+                logger.debug("    Event process %s ...", event)
+                eventtype = event.specification[0]
+                rate_or_timefunc = event.specification[1]
+                if eventtype == "rate" \
+                        and self._event_engines[event][0] != "instance":
+                    self.schedule_class_event(next_discontinuities, event,
+                                              t_0)
+                    continue
+                if has_varying_rate(event) or eventtype == "condition":
+                    # (its occurrences are found during integration)
+                    continue
+                # TODO: Check if the following loop is correct:
+                for inst in event.owning_class.instances:
+                    # inst is a process taxon or entity
+                    assert eventtype in ("rate", "time"), \
+                        "unsupported type of Event"
+                    if eventtype == "rate":
+                        # (varying rates are dealt with by hazards)
+                        assert rate_or_timefunc > 0, \
+                            "zero or negative rates not supported"
+                        next_time = t_0 + np.random.exponential(1. / rate_or_timefunc)
+                    elif eventtype == "time":
+                        # in this case, rate_or_timefunc directly returns a time:
+                        next_time = rate_or_timefunc(inst, t)
+                        assert next_time > t_0, "next time must be > t"
+                    next_discontinuities.push(next_time, event, inst)
+                    if trace:
+                        logger.log(TRACE, "      time %s : %s", next_time,
+                                   inst)
+
+            # Fill next_discontinuities with times of next steps and perform
+            # a step if necessary (still 2.3 in runner scheme):
+            logger.debug("  Executing Steps and finding times of next "
+                         "execution...")
+            for step in self.step_processes:
+                logger.debug("    Step process %s ...", step)
+                next_time_func = step.specification[0]
+                method = step.specification[1]
+                if step.batch:
+                    # ask for all instances' first times at once, perform
+                    # the step for those occurring right at the beginning,
+                    # and schedule the instances in groups:
+                    cls = step.owning_class
+                    instances = list(cls.instances or [])
+                    if not instances:
+                        continue
+                    next_times = np.array(np.broadcast_to(
+                        next_time_func(cls, t_0, instances),
+                        (len(instances),)), dtype=float)
+                    due = np.flatnonzero(next_times == t_0)
+                    if len(due) > 0:
+                        due_instances = [instances[i] for i in due]
+                        if profiler is not None:
+                            start = perf_counter()
+                        method(cls, t_0, due_instances)
+                        if profiler is not None:
+                            profiler.add(step, start)
+                        next_times[due] = next_time_func(cls, t_0,
+                                                         due_instances)
+                    self.schedule_step_batch(next_discontinuities, step,
+                                             instances, next_times, t_0)
+                    continue
+                for inst in step.owning_class.instances:
+                    # inst is a process taxon or entity
+                    # FIXME: it seems inconsistent how we currently deal with the
+                    # question whether a step exectutes at t_0 since it is unclear
+                    # how the step would indicate that it is so.
+                    # if next_time_func(inst, t) gives the smallest stepping time
+                    # AFTER t, the following check would be incorrect:
+                    if next_time_func(inst, t_0) == t_0:
+                        # so this step occurs right at the beginning
+                        if profiler is not None:
+                            start = perf_counter()
+                        method(inst, t)
+                        if profiler is not None:
+                            profiler.add(step, start)
+                        # ask process when it steps next:
+                        next_time = next_time_func(inst, t)
+                        assert next_time > t_0, "next time must be > t"
+                    # TODO: Same time for all instances? self. necessary?
+                    else:
+                        # ask process when it steps next:
+                        next_time = next_time_func(inst, t)
+                        assert next_time > t_0, "next time must be > t"
+                    # register next stepping time:
+                    next_discontinuities.push(next_time, step, inst)
+                    if trace:
+                        logger.log(TRACE, "      time %s : %s", next_time,
+                                   inst)
+        else:
+            # continue from the checkpoint's state, which the model holds
+            # already:
+            logger.info("  Resuming at time %s ...", t)
+            self._current_iteration = resumed["current_iteration"]
+            self._structure_version = self._structure_attributes = None
+            self.refresh_structure()
 
         # At this point, no application of Explicit processes is necessary
         # since that is done during ODE integration
 
-        # prepare ODE solver:
-        solver = integrate.ode(self.get_rhs_array)
-        # apparently dopri5 is faster than vode, so we use dopri5.
-        # in vode, choosing bdf or adams doesn't seem to make any difference
-        # solver.set_integrator("vode", max_step=dt, method="bdf")
-        solver.set_integrator("dopri5",  # TODO: make this a parameter?
-                              max_step=dt,
-                              verbosity=1,
-                              nsteps=10000  # TODO: make this a parameter?
-                              )
-
-        # running lists of times and solutions:
-        times = []
-        sol = []
+        # prepare ODE solver.
+        # apparently dopri5 is faster than vode, so it is the default.
+        # for stiff models, the implicit solvers BDF or Radau may be much
+        # faster:
+        ode_solver = make_solver(solver,
+                                 self.get_rhs_array,
+                                 rtol=rtol,
+                                 atol=atol,
+                                 first_step=first_step,
+                                 max_step=max_step if max_step is not None
+                                 or output_times is not None else dt,
+                                 nsteps=nsteps)
+        use_jacobian = jacobian and ode_solver.uses_jacobian
+        if use_jacobian:
+            self._jacobian_builder = _JacobianBuilder(self.model)
+
+        # no. of time points output by the solver in the current interval:
+        n_outputs = [0]
+        # end time of the solver's previous step, (time, state, tracker,
+        # index) of the crossing at which a cumulative hazard reached its
+        # threshold or a monitored condition became true, and whether a
+        # termination call stopped the solver:
+        step_start = [None]
+        crossing = [None]
+        terminated = [False]
 
         # callback function the solver calls to output solutions:
-        def solout(sol_t, sol_valuearray):
+        def solout(sol_t, sol_valuearray, interpolant=None):
             """Save solution of solver at one time point.
 
+            Stores the values of all targets, including those of Explicit
+            processes, in the output dict.
+
             Parameters
             ----------
             sol_t : float
                 Model time
             sol_valuearray : array
                 array of variable values in same order as for get_rhs_array
+            interpolant : callable, optional
+                solution on the solver's last step (only if output_times
+                was given or there are varying rates or monitored
+                conditions)
+
+            Returns
+            -------
+            bool
+                True if a cumulative hazard reached its threshold or a
+                monitored condition became true during the last step, or
+                a termination call returned True, which stops the solver
             """
-            # save solution to lists:
-            times.append(sol_t)
-            sol.append(sol_valuearray.copy())
-            # TODO: ALSO output values of non-dynamical variables, like those
-            # from Explicit processes, so that they don't need to be
-            # calculated again after ode finished!
-            # TODO: this is the place to implement termination
-            # due to events without a priori known occurrence
-            # time! if solout returns 0 (or -1?), solver will
-            # terminate. Similarly for solver "vode" above
-            print("      t =", sol_t, "            ", end='\r')
-            # TODO: return value??
-        solver.set_solout(solout)
+            if interpolant is not None:
+                for tracker in trackers:
+                    components = tracker.crossed(sol_t, sol_valuearray)
+                    if len(components) > 0:
+                        # an Event occurs (or the run ends) during the last
+                        # step. find the earliest such time and end the
+                        # interval there:
+                        cross_t, index = locate_crossing(
+                            interpolant, step_start[0], sol_t,
+                            tracker.residuals, components)
+                        if crossing[0] is None or cross_t < crossing[0][0]:
+                            crossing[0] = (cross_t, interpolant(cross_t),
+                                           tracker, index)
+                if crossing[0] is not None:
+                    sol_t, sol_valuearray = crossing[0][:2]
+                elif conditions is not None:
+                    conditions.accept()
+            step_start[0] = sol_t
+            last_array[0] = sol_valuearray
+            if progress is not None:
+                progress.update(sol_t)
+            if output_times is not None:
+                # save output times passed during the last step, except for
+                # one at a discontinuity, which is saved after it:
+                if interpolant is not None:
+                    save_output_times(
+                        sol_t,
+                        inclusive=crossing[0] is None
+                        and (sol_t < next_time or next_time == t_1),
+                        prepare=lambda s: self.set_state(s, interpolant(s)))
+                n_outputs[0] += 1
+                if crossing[0] is None and self.termination_calls:
+                    # (termination calls may read any variable)
+                    self.set_state(sol_t, sol_valuearray)
+                    terminated[0] = self.terminate()
+                return crossing[0] is not None or terminated[0]
+            # make sure the instances hold this state and the corresponding
+            # values of Explicit targets. For solvers that evaluate the RHS at
+            # the end point of each accepted step (like dopri5), this is
+            # already the case, so nothing needs to be recomputed:
+            self.set_state(sol_t, sol_valuearray)
+            self.trajectory_dict.append_time(sol_t)
+            self.save_to_traj(targets_to_save, add_to_output)
+            n_outputs[0] += 1
+            if trace:
+                logger.log(TRACE, "      t = %s", sol_t)
+            if crossing[0] is None and self.termination_calls:
+                terminated[0] = self.terminate()
+            return crossing[0] is not None or terminated[0]
+
+        # version of the entity structure for which the current array
+        # layout was determined:
+        layout_version = None
+
+        # time of the latest checkpoint:
+        last_checkpoint = t
+
+        # structure version for which the waiting times of class-wide rate
+        # Events were drawn:
+        gillespie_version = _Mixin._structure_version
 
         # Now loop until end time or early termination is reached:
         while t < t_1:
             # check whether to terminate early:
             if self.terminate():
-                print('Terminating run early at time ', t)
+                logger.info("Terminating run early at time %s", t)
                 break
             # Get next discontinuity to find the next timestep where something
             # happens.
-            # If there are no discontinuities, the next_discontinuities
-            # dict is empty, therefore try is necessary:
-            try:
-                next_time = min(t_1, min(next_discontinuities.keys()))  # TODO: speed-up by using different data type for next_discontinuities, something like OrderedDict?
-            except ValueError:
+            # If there are no discontinuities, next_time() returns None:
+            next_time = next_discontinuities.next_time()
+            if next_time is None or next_time > t_1:
                 next_time = t_1
 
-            # Call ode solver if there are any ODE processes:
-            if self.model.ODE_processes:
+            # Call ode solver if there are any ODE processes or cumulative
+            # hazards to integrate:
+            if self.model.ODE_processes or hazards is not None:
 
-                print("  Running smoothly from", t, "to", next_time, "...")
+                logger.debug("  Running smoothly from %s to %s ...", t,
+                             next_time)
 
                 # clear all targets _DotConstructs' caches of target instances
-                # since events and steps may have changed instance references:
-                for target in self.model.ODE_targets \
-                        + self.model.explicit_targets:
-                    target._target_instances = unknown
-
-                # determine array layouts (froms and tos of slices)
-                # and compose initial value-array:
-                print("    Composing initial value array...")
-                # list of target variables:
-                target_variables = list(set(
-                        [target.target_variable
-                         for target in self.model.ODE_targets]))
-                # list of array slice lengths, one for each target variable,
-                # length equalling number of target instances:
-                lens = [len(var.owning_class.instances)
-                        for var in target_variables]
-                # upper slice index is given by cumulative sum of lens:
-                tos = np.cumsum(lens)
-                # lower slice index is previous slice's upper index:
-                froms = np.concatenate(([0], tos[:-1]))
-                # total array length:
-                arraylen = sum(lens)
-                # init the array:
+                # if events and steps have changed instances or references:
+                self.refresh_structure()
+
+                if layout_version != self._structure_version:
+                    # determine array layouts (froms and tos of slices):
+                    logger.debug("    Determining array layout...")
+                    # list of target variables:
+                    # (in the order of the model's ODE targets, so that the
+                    # layout does not depend on the process, e.g. when
+                    # resuming from a checkpoint):
+                    target_variables = list(dict.fromkeys(
+                            target.target_variable
+                            for target in self.model.ODE_targets))
+                    # list of array slice lengths, one for each target
+                    # variable, length equalling number of target instances:
+                    lens = [len(var.owning_class.instances)
+                            for var in target_variables]
+                    # upper slice index is given by cumulative sum of lens:
+                    tos = np.cumsum(lens)
+                    # lower slice index is previous slice's upper index:
+                    froms = np.concatenate(([0], tos[:-1]))
+                    # total array length, including the cumulative
+                    # hazards appended after the ODE variables:
+                    arraylen = sum(lens)
+                    if hazards is not None:
+                        arraylen += hazards.resolve(arraylen)
+                    for i, var in enumerate(target_variables):
+                        # store slice indices in target variables:
+                        var._from = froms[i]
+                        var._to = tos[i]
+                    # store slice indices also in targets:
+                    for target in self.model.ODE_targets:
+                        var = target.target_variable
+                        target._from = var._from
+                        target._to = var._to
+
+                    # derive the Jacobian's structure for the current layout:
+                    jac = jac_sparsity = None
+                    if use_jacobian:
+                        self._jacobian_builder.resolve(target_variables,
+                                                       sum(lens))
+                        jac_sparsity = self._jacobian_builder.sparsity
+                        if hazards is not None:
+                            # (no analytic Jacobian for the hazards)
+                            jac_sparsity = hazards.sparsity(jac_sparsity)
+                        elif self._jacobian_builder.analytic:
+                            jac = self.get_jacobian
+                        logger.debug("    Jacobian has %d structurally nonzero "
+                                     "entries%s", jac_sparsity.nnz,
+                                     " (analytic)" if jac is not None
+                                     else "")
+                    layout_version = self._structure_version
+
+                # compose initial value-array from the instances' values,
+                # which steps and events may have changed:
+                logger.debug("    Composing initial value array...")
                 initial_array_ode = np.zeros(arraylen)
-                for i, var in enumerate(target_variables):
-                    # store slice indices in target variables:
-                    var._from = froms[i]
-                    var._to = tos[i]
-                    # get initial values from instances and store in array:
-                    initial_array_ode[froms[i]:tos[i]] = \
+                for var in target_variables:
+                    initial_array_ode[var._from:var._to] = \
                         var.eval(instances=var.owning_class.instances)
-                # store slice indices also in targets:
-                for target in self.model.ODE_targets:
-                    var = target.target_variable
-                    target._from = var._from
-                    target._to = var._to
+                if hazards is not None:
+                    initial_array_ode[hazards.offset:] = hazards.start()
 
                 # In Odeint, call get_rhs_array to get the RHS of the ODE
                 # system as an array (step 3.1 in runner scheme) then return
                 # the trajectory (3.2 in runner scheme):
 
-                print("    Calling ODE solver...")
+                logger.debug("    Calling ODE solver...")
 
-                _starttime = time()  # for performance reporting
+                _starttime = perf_counter()  # for performance reporting
 
-                times = []
-                sol = []
-                solver.set_initial_value(initial_array_ode, t)
+                n_outputs[0] = 0
+                step_start[0] = t
+                crossing[0] = None
+                self._state_t = None  # since steps may have changed the state
+                if conditions is not None:
+                    conditions.start(t, initial_array_ode)
                 # now tell the solver to integrate from current time to
-                # next_time. it will call solout at least every dt:
-                solver.integrate(next_time)
-                # now solout has filled the times and sol with the integration
-                # result, so we can process them:
-                ts = np.array(times)
-                ode_trajectory = np.array(sol)
-
-                # TODO: capture solver failures and report any errors!
-
-                print("      ...took", time()-_starttime, "seconds and",
-                      len(times), "time steps")
-
-                # Save t values to output dict:
-                self.trajectory_dict['t'] += list(ts)
-
-                print("    Saving results to output dict...")
-                # save trajectory of ODE variables to output dict:
-                tlen = len(self.trajectory_dict['t'])  # no. of simulated time points
-                for i, target in enumerate(self.model.ODE_targets):
-                    # from this target's slice starting at column target._from,
-                    # read results column by column and store in corresponding
-                    # target instances:
-                    for pos, inst in enumerate(target.target_class.instances):
-                        # get this instance's value column as a list,
-                        # containing the values for all time points:
-                        values = list(
-                                ode_trajectory[:, target._from + pos])
-                        try:
-                            if len(self.trajectory_dict[
-                                       target.target_variable][inst]) < tlen:
-                                # append to existing list:
-                                self.trajectory_dict[
-                                    target.target_variable][inst] += values
-                        except KeyError:
-                            # store as new list:
-                            self.trajectory_dict[
-                                target.target_variable][inst] = values
-
-                # Take the time steps output by the ODE solver and apply
-                # Explicit processes a posteriori (step 3.3 in runner scheme).
-                # Save them to the trajectory_dict
-                # This is only done if there are any Explicit processes.
-
-                # TODO: in principle, this is inefficient since these processes
-                # were applied already during ODE integration, only their
-                # results were not stored. Can this be improved? Sadly, depen-
-                # ding on the solver method, we might not be sure that when
-                # solout is called, the previous call to apply_explicits was
-                # for the same time point and state, so we cannot simply use
-                # its result... (is this really true?)
-
-                if len(self.explicit_processes) > 0:
-                    print("    Applying Explicit processes to simulated "
-                          "time points...")
-                    for pos, t in enumerate(ts):
-                        self._current_iteration += 1  # marks current evaluation caches as outdated
-                        # copy values from returned matrix to instances'
-                        # attributes:
-                        ode_values = ode_trajectory[pos, :]
-                        # read values from result vector in same order as
-                        # written into it:
-                        for i, var in enumerate(target_variables):
-                            var.fast_set_values(ode_values[var._from:var._to])
-                        self.apply_explicits(t)
-                        # complete the output dictionary:
-                        self.save_to_traj(targets_to_save,
-                                          add_to_output,
-                                          max_resolution,
-                                          dt)
+                # next_time. it will call solout at least every max_step,
+                # which saves the results to the output dict:
+                t_end = ode_solver.integrate(t, initial_array_ode, next_time,
+                                             solout, jac=jac,
+                                             jac_sparsity=jac_sparsity,
+                                             dense=output_times is not None
+                                             or len(trackers) > 0)
+                if profiler is not None:
+                    profiler.add_phase("integrate", _starttime)
+                # (Event, instance) of a located hazard crossing:
+                located = None
+                if crossing[0] is not None:
+                    # the interval ends early with an occurrence of an
+                    # Event or because a termination condition became true:
+                    t_end, _, tracker, index = crossing[0]
+                    next_time = t_end
+                    if tracker is hazards:
+                        located = hazards.item(index)
+                        next_discontinuities.push(t_end, *located)
+                    if conditions is not None:
+                        # all conditions that have become true by t_end,
+                        # including the located one if it is a condition:
+                        for event, inst in conditions.advance(
+                                t_end, last_array[0]):
+                            if event is None:
+                                terminated[0] = True
+                            else:
+                                next_discontinuities.push(t_end, event, inst)
+                if output_times is not None:
+                    # the instances may hold an interpolated state, so
+                    # restore the one at the end of the interval:
+                    self.set_state(t_end, last_array[0])
+                if hazards is not None:
+                    for event, inst in hazards.advance(last_array[0]):
+                        if (event, inst) != located:
+                            next_discontinuities.push(t_end, event, inst)
+
+                logger.debug("      ...took %s seconds and %d time steps",
+                             perf_counter()-_starttime, n_outputs[0])
+
+                if terminated[0]:
+                    # a termination call or condition stopped the solver:
+                    t = t_end
+                    logger.info("Terminating run early at time %s", t)
+                    break
+
+            elif output_times is not None:
+                # the state is constant until next_time, only Explicit
+                # targets may depend on time:
+                save_output_times(next_time, inclusive=next_time == t_1,
+                                  prepare=self.apply_explicits)
 
             # set current model time to end of previous ODE integration:
             t = next_time
 
             # After all that is done, determine what happens at the
             # discontinuity (step 3.4 in runner scheme)
-            # Delete the discontinuity from the dictionary and determine when
+            # Remove the discontinuity from the scheduler and determine when
             # the next one happens:
             if t < t_1 and len(next_discontinuities) > 0:
 
                 # set current model time to end of previous ODE integration:
                 t = next_time
-                self.trajectory_dict['t'].append(t)
+                if output_times is None:
+                    self.trajectory_dict.append_time(t)
 
-                print("  Executing Steps and/or Events at", t, "...")
+                logger.debug("  Executing Steps and/or Events at %s ...", t)
 
                 # loop over all co-occurring steps/events.
                 # TODO: determine a "correct" order of steps/events or deal
                 # in some other way with the problem of co-occurrence and
                 # potential mutual dependences, including the potential
                 # (de)activation of entities.
-                for discontinuity in next_discontinuities.pop(t):
+                for process, inst in next_discontinuities.pop():
                     # print('        Entering the dicontinuity loop, t=', t)
-                    # discontinuity is a tuple (event/step, entity/taxon)
-                    process = discontinuity[0]
-                    inst = discontinuity[1]
+                    # each discontinuity is a pair (event/step, entity/taxon)
                     # Test if the instance is active in case of it being an
                     # entity:
                     if isinstance(inst, _AbstractEntityMixin):
                         if not inst.is_active:
-                            # If it is not active, break.
+                            # If it is not active, drop this item (its other
+                            # items remain scheduled in case it is
+                            # reactivated before they are due):
                             continue
-                    if isinstance(process, Event):
-                        print("    Event", process, "@", inst, "...")
+                    if isinstance(inst, type):
+                        # a rate Event simulated for the whole class:
+                        self.execute_class_event(process, t)
+                        self.schedule_class_event(next_discontinuities,
+                                                  process, t)
+                    elif isinstance(inst, tuple):
+                        # a group of instances of a batched Step:
+                        self.execute_step_batch(next_discontinuities,
+                                                process, inst, t)
+                    elif isinstance(process, Event):
+                        if trace:
+                            logger.log(TRACE, "    Event %s @ %s ...",
+                                       process, inst)
                         eventtype = process.specification[0]
                         rate_or_timefunc = process.specification[1]
                         method = process.specification[2]
                         # Perform the event by calling its implementation method:
+                        if profiler is not None:
+                            start = perf_counter()
                         method(inst, t)
+                        if profiler is not None:
+                            profiler.add(process, start)
                         # determine this event's next occurrence:
-                        if eventtype == "rate":
+                        if eventtype == "rate" and has_varying_rate(process):
+                            # it is found during integration:
+                            hazards.fire(process, inst)
+                            continue
+                        elif eventtype == "condition":
+                            # it occurs again when its condition next
+                            # becomes true during integration:
+                            continue
+                        elif eventtype == "rate":
                             # draw time from exponential distribution:
                             next_time = t + \
                                         np.random.exponential(1. /
@@ -605,78 +1302,303 @@ class Runner(_AbstractRunner):
                             next_time = rate_or_timefunc(inst, t)
                             assert next_time > t, "next time must be > t"
                         # register it:
-                        try:
-                            next_discontinuities[next_time].append((process,
-                                                                    inst))
-                        except KeyError:
-                            next_discontinuities[next_time] = [(process,
-                                                                inst)]
-                        print("      next time", next_time)
+                        next_discontinuities.push(next_time, process, inst)
+                        if trace:
+                            logger.log(TRACE, "      next time %s", next_time)
                     elif isinstance(process, Step):
-                        print("    Step", process, "@", inst, "...")
+                        if trace:
+                            logger.log(TRACE, "    Step %s @ %s ...",
+                                       process, inst)
                         timefunc = process.specification[0]
                         method = process.specification[1]
                         # Perform the step by calling its implementation method:
+                        if profiler is not None:
+                            start = perf_counter()
                         method(inst, t)
+                        if profiler is not None:
+                            profiler.add(process, start)
                         # determine this event's next occurrence:
                         next_time = timefunc(inst, t)
                         assert next_time > t, "next time must be > t"
                         # register it:
-                        try:
-                            next_discontinuities[next_time].append((process,
-                                                                    inst))
-                        except KeyError:
-                            next_discontinuities[next_time] = [(process,
-                                                                inst)]
-                        print("      next time", next_time)
+                        next_discontinuities.push(next_time, process, inst)
+                        if trace:
+                            logger.log(TRACE, "      next time %s", next_time)
+
+                # redraw the waiting times of class-wide rate Events if the
+                # no. of instances may have changed (which is correct since
+                # waiting times are memoryless):
+                if gillespie_events \
+                        and gillespie_version != _Mixin._structure_version:
+                    for event in gillespie_events:
+                        next_discontinuities.cancel(event.owning_class, event)
+                        self.schedule_class_event(next_discontinuities,
+                                                  event, t)
+                    gillespie_version = _Mixin._structure_version
 
                 # Complete the new state by applying all explicit processes
                 # (3.5 in runner scheme):
-                print("    Applying Explicit processes to changed state...")
+                logger.debug("    Applying Explicit processes to changed "
+                             "state...")
                 if self.model.explicit_processes:
+                    self.refresh_structure()
                     self.apply_explicits(t)
 
                 # Store all information that has been calculated at time t:
-                print("    Completing output dict...")
+                logger.debug("    Completing output dict...")
 
-                self.save_to_traj(targets_to_save, add_to_output,
-                                  max_resolution, dt)
+                if output_times is None:
+                    self.save_to_traj(targets_to_save, add_to_output)
+                else:
+                    save_output_times(t, inclusive=True)
+
+            # thin the output of this interval:
+            self.trajectory_dict.thin()
 
             # TODO: discuss whether hooks make sense, then maybe:
             # TODO: add hooks to runner scheme
             # apply all mid-hooks
             if Hooks._mid_hooks:
-                print("  Executing mid-hooks ...")
+                logger.debug("  Executing mid-hooks ...")
                 Hooks.execute_hooks(Hooks.Types.mid, self.model, t_0)
 
+            # write a checkpoint at this discontinuity:
+            if checkpoint_file is not None and t < t_1 and (
+                    checkpoint_interval is None
+                    or t >= last_checkpoint + checkpoint_interval):
+                logger.debug("  Writing checkpoint at %s ...", t)
+                if profiler is not None:
+                    start = perf_counter()
+                self.write_checkpoint(checkpoint_file, {
+                    "t": t,
+                    "scheduler": scheduler,
+                    "next_output": next_output,
+                    "hazards": hazards,
+                    "run_kwargs": run_kwargs,
+                })
+                if profiler is not None:
+                    profiler.add_phase("checkpoint", start)
+                last_checkpoint = t
+
         # TODO: discuss whether hooks make sense, then maybe:
         # TODO: add hooks to runner scheme
         # apply all post-hooks
         if Hooks._post_hooks:
-            print("  Executing post-hooks ...")
+            logger.debug("  Executing post-hooks ...")
             Hooks.execute_hooks(Hooks.Types.post, self.model, t_0)
 
-        # Assert every list still has the same lenght:
-        print('asserting same lenghts of all entries')
-        tlen = len(self.trajectory_dict['t'])
-        for target in targets_to_save:
-            var = target.target_variable
-            instances = target.target_class.instances
-            for inst in instances:
-                assert len(self.trajectory_dict[var][inst]) == tlen, (
-                    len(self.trajectory_dict[var][inst]), tlen,
-                    self.trajectory_dict[var][inst],
-                    self.trajectory_dict['t'],
-                    var
-                )
+        if progress is not None:
+            progress.close(t)
+        logger.info("Run ended at time %s after %s seconds", t,
+                    time()-_runstarttime)
+        if profiler is not None:
+            profiler.stop()
+            logger.debug("%s", profiler)
+        self.trajectory_dict.profile = profiler
+
+        # thin and write remaining time points to output_file:
+        self.trajectory_dict.close()
 
         return self.trajectory_dict
 
+    def schedule_class_event(self, scheduler, event, t):
+        """Schedule the next occurrence of a rate Event that is simulated
+        for the whole owning class (engines "gillespie" and "tau-leaping").
+
+        Parameters
+        ----------
+        scheduler : _Scheduler
+            queue of discontinuities
+        event : Event
+            the rate Event
+        t : float
+            current model time
+        """
+        engine, tau = self._event_engines[event]
+        cls = event.owning_class
+        if engine == "tau-leaping":
+            next_time = t + tau
+        else:
+            n = len(cls.instances or [])
+            if n == 0:
+                # (rescheduled when instances are added)
+                return
+            next_time = t + np.random.exponential(
+                1. / (n * event.specification[1]))
+        scheduler.push(next_time, event, cls)
+        logger.log(TRACE, "      next time %s : %s", next_time, cls.__name__)
+
+    def execute_class_event(self, event, t):
+        """Perform a rate Event that is simulated for the whole owning
+        class: for one random instance (engine "gillespie"), or for each
+        instance a Poisson-distributed no. of times (engine
+        "tau-leaping").
+
+        Parameters
+        ----------
+        event : Event
+            the rate Event
+        t : float
+            current model time
+        """
+        profiler = self._profiler
+        engine, tau = self._event_engines[event]
+        rate = event.specification[1]
+        method = event.specification[2]
+        instances = list(event.owning_class.instances or [])
+        if not instances:
+            return
+        if engine == "gillespie":
+            inst = instances[np.random.randint(len(instances))]
+            logger.log(TRACE, "    Event %s @ %s ...", event, inst)
+            if profiler is not None:
+                start = perf_counter()
+            method(inst, t)
+            if profiler is not None:
+                profiler.add(event, start)
+            return
+        counts = np.random.poisson(rate * tau, size=len(instances))
+        logger.log(TRACE, "    Event %s occurs %d times ...", event,
+                   counts.sum())
+        for i in np.flatnonzero(counts):
+            inst = instances[i]
+            for _ in range(counts[i]):
+                # (an earlier occurrence may have deactivated inst)
+                if isinstance(inst, _AbstractEntityMixin) \
+                        and not inst.is_active:
+                    break
+                if profiler is not None:
+                    start = perf_counter()
+                method(inst, t)
+                if profiler is not None:
+                    profiler.add(event, start)
+
+    def schedule_step_batch(self, scheduler, step, instances, next_times,
+                            t):
+        """Schedule the next executions of a batched Step for some
+        instances, as one item per group of instances with the same next
+        time.
+
+        Parameters
+        ----------
+        scheduler : _Scheduler
+            queue of discontinuities
+        step : Step
+            the batched Step
+        instances : list
+            instances of the Step's owning class
+        next_times : float or array
+            next time of all instances, or one for each instance
+        t : float
+            current model time
+        """
+        next_times = np.asarray(next_times, dtype=float)
+        assert np.all(next_times > t), "next time must be > t"
+        if next_times.ndim == 0 or np.all(next_times == next_times[0]):
+            scheduler.push(float(next_times.flat[0]), step, tuple(instances))
+            logger.log(TRACE, "      next time %s : %d instances",
+                       next_times.flat[0], len(instances))
+            return
+        assert len(next_times) == len(instances), \
+            "need one next time for each instance"
+        times, inverse = np.unique(next_times, return_inverse=True)
+        order = np.argsort(inverse, kind="stable")
+        for time, group in zip(times, np.split(
+                order, np.cumsum(np.bincount(inverse))[:-1])):
+            scheduler.push(time, step,
+                           tuple(instances[i] for i in group))
+        logger.log(TRACE, "      next times %s ... %s : %d instances in %d "
+                   "groups", times[0], times[-1], len(instances), len(times))
+
+    def execute_step_batch(self, scheduler, step, group, t):
+        """Perform a batched Step for a group of instances and schedule
+        their next executions.
+
+        Parameters
+        ----------
+        scheduler : _Scheduler
+            queue of discontinuities
+        step : Step
+            the batched Step
+        group : tuple
+            instances scheduled for time t, inactive ones are dropped
+        t : float
+            current model time
+        """
+        cls = step.owning_class
+        # (rather than asking each instance's is_active, which searches the
+        # list of instances):
+        active = set(cls.instances or [])
+        instances = [inst for inst in group if inst in active]
+        if not instances:
+            return
+        logger.log(TRACE, "    Step %s @ %d instances ...", step,
+                   len(instances))
+        timefunc = step.specification[0]
+        method = step.specification[1]
+        profiler = self._profiler
+        if profiler is not None:
+            start = perf_counter()
+        method(cls, t, instances)
+        if profiler is not None:
+            profiler.add(step, start)
+        self.schedule_step_batch(scheduler, step, instances,
+                                 timefunc(cls, t, instances), t)
+
+    def write_checkpoint(self, filename, state):
+        """Write a checkpoint file.
+
+        Parameters
+        ----------
+        filename : str
+            name of the file, which is replaced only once the new checkpoint
+            is complete
+        state : dict
+            state of run at the current discontinuity, to which a snapshot
+            of the model, the trajectory and the expression cache counter
+            are added
+        """
+        state = dict(state,
+                     snapshot=_ModelSnapshot(self.model),
+                     trajectory=self.trajectory_dict,
+                     current_iteration=self._current_iteration)
+        if self.trajectory_dict.writer is not None:
+            # make sure all rows referred to by the checkpoint are on disk:
+            self.trajectory_dict.writer.flush()
+        write_checkpoint(filename, self.model, state)
+
+    def resume(self, checkpoint_file, **kwargs):
+        """Continue a run from a checkpoint written by run.
+
+        The model must have been configured and set up in the same way as
+        for the original run (the entities existing at its start are
+        matched by their UIDs, the state of all entities is then taken from
+        the checkpoint). Continues writing the checkpoint file and the
+        output file (if any) of the original run.
+
+        Parameters
+        ----------
+        checkpoint_file : str
+            name of the checkpoint file
+        kwargs
+            arguments of run to override those of the original run, e.g.
+            t_1 to run longer
+
+        Returns
+        -------
+        trajectory_dict
+            trajectory of the whole run, including the part before the
+            checkpoint (unless it was only kept in the output file)
+        """
+        state = read_checkpoint(checkpoint_file, self.model)
+        state["snapshot"].restore()
+        self._resume_state = state
+        run_kwargs = dict(state["run_kwargs"], **kwargs)
+        return self.run(**run_kwargs)
+
     def save_to_traj(self,
                      targets,
-                     add_to_output,
-                     max_resolution,
-                     dt):
+                     add_to_output):
         """Save simulation results to output dictionary.
 
         Update self.trajectory_dict for some targets.
@@ -688,101 +1610,22 @@ class Runner(_AbstractRunner):
         add_to_output : list or None
             optional additional list
         """
+        profiler = self._profiler
+        if profiler is not None:
+            _starttime = perf_counter()
         if add_to_output is not None:
-            targets += add_to_output
-        # determine no. of simulated time points:
-        tlen = len(self.trajectory_dict["t"])
+            targets = targets + add_to_output
         for target in targets:
             # target is a variable or a dotconstruct
             var = target.target_variable
             instances = target.target_class.instances
-            idle_instances = None
-            # Check for deactivated instances. The following check is
-            # necessary, since Process Taxa cannot be inactive:
-            if issubclass(target.target_class,
-                          _AbstractEntityMixin):
-                idle_instances = target.target_class.idle_entities
-            # get values to store from instance attributes:
-            values = var.eval(instances)
-
-            # write values into all active Instances:
-            for i, inst in enumerate(instances):
-                try:
-                    # check whether value needs to be stored by comparing
-                    # existing list length with no. of time points:
-                    if len(self.trajectory_dict[var][inst]) < tlen:
-                        if isinstance(values[i], list):
-                            # when handling lists, python only add references!
-                            self.trajectory_dict[var][inst].append(values[i][:])
-                        else:
-                            self.trajectory_dict[var][inst].append(values[i])
-                    # else do nothing since value was already stored.
-                    # assert len(self.trajectory_dict[var][inst]) == tlen
-                except KeyError:
-                    # This branch is active if the entity has not been
-                    # activated before.
-                    # create new list with Nones for time that has passed:
-                    value_strip = [None] * (tlen - 1)
-                    value_strip.append(values[i])
-                    self.trajectory_dict[var][inst] = value_strip
-                    assert len(self.trajectory_dict[var][inst]) == tlen
-
-            # check if there are any idle instances and fill their trajectory
-            # with None to fit the length of 't':
-            if idle_instances:
-                for i, inst in enumerate(idle_instances):
-                    try:  # already in trajectory_dict
-                        # Check for length of list:
-                        if len(self.trajectory_dict[var][inst]) < tlen:
-                            len_of_none = (
-                                tlen - len(self.trajectory_dict[var][inst]))
-                            none_list = [None]*len_of_none
-                            # Make list as long as 't' in trajectory_dict:
-                            for j in none_list:
-                                self.trajectory_dict[var][inst].append(j)
-                            # And make sure it has the length of 't'
-                            assert len(self.trajectory_dict[var][inst]) == tlen
-                    except KeyError:  # Not yet in trajectory_dict
-                        # create new list:
-                        none_list = [None]*tlen
-                        self.trajectory_dict[var][inst] = [none_list]
-                        assert len(self.trajectory_dict[var][inst]) == tlen
-        if max_resolution:
-            print('    Reducing resolution')
-            for i, val in enumerate(self.trajectory_dict['t']):
-                # See if 3 timesteps are closer than dt:
-                if (i > 1) and i < (len(self.trajectory_dict['t']) - 10):
-                    diff = (self.trajectory_dict['t'][i + 1]
-                            - self.trajectory_dict['t'][i - 1])
-                    if diff < dt:
-                        del self.trajectory_dict['t'][i]
-                        # print(f'deleting, diff={diff}')
-                        # delete this value from all trajectories
-                        for target in targets:
-                            var = target.target_variable
-                            instances = target.target_class.instances
-                            for inst in instances:
-                                # all active entities/taxa
-                                if (len(self.trajectory_dict[var][inst])
-                                        > len(self.trajectory_dict['t'])):
-                                    del self.trajectory_dict[var][inst][i]
-                                assert len(self.trajectory_dict[var][
-                                               inst]) == len(
-                                    self.trajectory_dict['t'])
-                            if issubclass(target.target_class,
-                                          _AbstractEntityMixin):
-                                # check for inactivie entities
-                                idle_instances = target.target_class.idle_entities
-                                if idle_instances:
-                                    for inst in idle_instances:
-                                        if (len(self.trajectory_dict[var][inst])
-                                                > len(
-                                                self.trajectory_dict['t'])):
-                                            del self.trajectory_dict[var][inst][
-                                                i]
-                                        assert len(self.trajectory_dict[var][
-                                                       inst]) == len(
-                                            self.trajectory_dict['t'])
+            # get values to store from instance attributes and write them
+            # into the row of the latest time point. Deactivated instances
+            # and those not yet activated keep their NaN (or None) entries
+            # there, which the trajectory marks as inactive:
+            self.trajectory_dict.record(var, instances, var.eval(instances))
+        if profiler is not None:
+            profiler.add_phase("output", _starttime)
 
     def terminate(self):
         """Determine if the runner should stop.
@@ -37,6 +37,10 @@ setup(name="pycopancore",
           "pylama_pylint",
           "numba",
       ],
+      extras_require={
+          # for writing trajectories to HDF5 files:
+          "hdf5": ["h5py"],
+      },
       zip_safe=False # see http://stackoverflow.com/questions/15869473/what-is-the-advantage-of-setting-zip-safe-to-true-when-packaging-a-python-projec
       )
 
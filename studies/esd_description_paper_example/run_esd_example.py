@@ -5,7 +5,7 @@ import pickle
 import numpy as np
 import pycopancore.models.example2 as M
 from pycopancore import master_data_model as D
-from pycopancore.runners import Runner
+from pycopancore.runners import Runner, EnsembleRunner
 
 NUMBER_SOCIAL_SYSTEMS = 2
 NUMBER_CELLS = 4
@@ -13,15 +13,8 @@ NUMBER_INDIVIDUALS = 400
 RENEWABLE_SCALING = 2500000
 FINAL_TIME = 2120
 
-def run(seed, updates, with_social, p_env_friendly):
-    """Run the model."""
-
-    np.random.seed(seed)
-
-    if with_social:
-        filename = "esd_example_with_social_update_rate_{0}_seed_{1}.p".format(updates, seed)
-    else:
-        filename = "esd_example_without_social_seed_{0}.p".format(seed)
+def build(updates, with_social, p_env_friendly):
+    """Build the model (after the random seed has been set)."""
 
     model = M.Model()
 
@@ -113,6 +106,21 @@ def run(seed, updates, with_social, p_env_friendly):
     s_0 = 2e11 * D.gigajoules * np.array([1, 1])
     M.SocialSystem.renewable_energy_knowledge.set_values(social_systems, s_0)
 
+    return model
+
+
+def run(seed, updates, with_social, p_env_friendly):
+    """Run the model."""
+
+    np.random.seed(seed)
+
+    if with_social:
+        filename = "esd_example_with_social_update_rate_{0}_seed_{1}.p".format(updates, seed)
+    else:
+        filename = "esd_example_without_social_seed_{0}.p".format(seed)
+
+    model = build(updates, with_social, p_env_friendly)
+
     # do simulation:
     runner = Runner(model=model)
     starttime = time()
@@ -134,6 +142,19 @@ def save(traj, filename):
     pickle.dump(tosave, open(filename, "wb"))
 
 
+def run_ensemble(seeds, updates, with_social, p_env_friendly, processes):
+    """Run the model for several seeds and update rates on a process pool
+    and save all trajectories into one file."""
+
+    members = [dict(seed=seed, updates=u, with_social=with_social,
+                    p_env_friendly=p_env_friendly)
+               for u in updates for seed in range(seeds)]
+    ensemble = EnsembleRunner(build, processes=processes)
+    results = ensemble.run(members, t_0=2000, t_1=FINAL_TIME, dt=1,
+                           add_to_output=[M.Individual.represented_population])
+    results.save("esd_example_ensemble.p")
+
+
 def main():
 
     parser = argparse.ArgumentParser()
@@ -144,6 +165,10 @@ def main():
     parser.add_argument('-s', '--seed', default=0, type=int)
     parser.add_argument('--with-social', action='store_const', const=True,
                         default=False)
+    parser.add_argument('-e', '--ensemble-seeds', type=int,
+                        help="run seeds 0..N-1 for all 50 update rates "
+                             "(or the one given) on a process pool")
+    parser.add_argument('--processes', type=int)
     args = vars(parser.parse_args())
 
     print(args)
@@ -151,6 +176,17 @@ def main():
     with_social = args["with_social"]
     p_env_friendly = args["initial_share_enviromentally_friendly"]
 
+    if args["ensemble_seeds"]:
+        if args["update_rate"]:
+            updates = [args["update_rate"]]
+        elif with_social:
+            updates = np.logspace(np.log10(1/50), np.log10(12), 50)
+        else:
+            updates = [0]
+        run_ensemble(args["ensemble_seeds"], updates, with_social,
+                     p_env_friendly, args["processes"])
+        return
+
     if args["update_rate"]:
         updates = args["update_rate"]
     elif args["task_id"] is not None:
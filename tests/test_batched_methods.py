@@ -0,0 +1,38 @@
+"""Test batched ODE and Explicit methods against equivalent per-instance
+ones."""
+
+# This file is part of pycopancore.
+#
+# Copyright (C) 2016-2017 by COPAN team at Potsdam Institute for Climate
+# Impact Research
+#
+# URL: <http://www.pik-potsdam.de/copan/software>
+# Contact: core@pik-potsdam.de
+# License: BSD 2-clause license
+
+import numpy as np
+import pytest
+
+from pycopancore.models._testing import engine as M
+from pycopancore.runners import Runner
+
+
+@pytest.mark.parametrize("solver", ["dopri5", "BDF"])
+@pytest.mark.parametrize("columnar", [False, True])
+def test_batched_methods(columnar, solver):
+    """A batched ODE and Explicit give the same trajectories as the
+    equivalent per-instance ones, also for an instance added between two
+    runs."""
+    model, world, cells, individuals = M.populate(columnar=columnar)
+    runner = Runner(model=model)
+    runner.run(t_1=2, dt=0.5, solver=solver)
+    newcomer = M.MIndividual(cell=cells[0], wealth=3., savings=2.,
+                             savings_b=2.)
+    traj = runner.run(t_0=2, t_1=4, dt=0.5, solver=solver)
+    assert newcomer.savings > 2.
+    for inst in individuals + [newcomer]:
+        assert inst.savings_b == pytest.approx(inst.savings, rel=1e-6)
+        for var, var_b in ((M.MIndividual.savings, M.MIndividual.savings_b),
+                           (M.MIndividual.bonus, M.MIndividual.bonus_b)):
+            assert np.allclose(traj[var_b][inst], traj[var][inst],
+                               rtol=1e-6, atol=1e-12, equal_nan=True)
@@ -0,0 +1,32 @@
+"""Test batched Steps against equivalent per-instance Steps."""
+
+# This file is part of pycopancore.
+#
+# Copyright (C) 2016-2017 by COPAN team at Potsdam Institute for Climate
+# Impact Research
+#
+# URL: <http://www.pik-potsdam.de/copan/software>
+# Contact: core@pik-potsdam.de
+# License: BSD 2-clause license
+
+import pytest
+
+from pycopancore.models._testing import engine as M
+from pycopancore.runners import Runner
+
+
+@pytest.mark.parametrize("columnar", [False, True])
+def test_batched_steps(columnar):
+    """A batched Step updates the same instances at the same times as the
+    equivalent per-instance Step, with all instances scheduled together
+    processed in one call."""
+    model, world, cells, individuals = M.populate(8, columnar=columnar)
+    traj = Runner(model=model).run(t_1=6.5, dt=0.25)
+    for i, inst in enumerate(individuals):
+        # (Steps at 1, 2, ..., 6 or at 1.5, 3, 4.5, 6):
+        assert inst.age == (6 if i % 2 == 0 else 4)
+        assert inst.age_b == inst.age
+        assert list(traj[M.MIndividual.age_b][inst]) \
+            == list(traj[M.MIndividual.age][inst])
+    assert set(M.Individual.batch_sizes) == {4}
+    assert sum(M.Individual.batch_sizes) == 4 * 6 + 4 * 4
@@ -0,0 +1,62 @@
+"""Test checkpoints and Runner.resume."""
+
+# This file is part of pycopancore.
+#
+# Copyright (C) 2016-2017 by COPAN team at Potsdam Institute for Climate
+# Impact Research
+#
+# URL: <http://www.pik-potsdam.de/copan/software>
+# Contact: core@pik-potsdam.de
+# License: BSD 2-clause license
+
+import pytest
+
+from pycopancore.models._testing import engine as M
+from pycopancore.private._checkpoint import read_checkpoint
+from pycopancore.runners import Runner
+
+from .test_snapshot import assert_identical
+
+
+@pytest.mark.parametrize("columnar", [False, True])
+@pytest.mark.parametrize("solver", ["dopri5", "BDF"])
+def test_resume(tmp_path, columnar, solver):
+    """A run resumed from a checkpoint (with a freshly set up model) gives a
+    bit-identical trajectory to an uninterrupted one."""
+    kwargs = dict(t_1=6, dt=0.25, solver=solver, checkpoint_interval=1.)
+    model, world, cells, individuals = M.populate(columnar=columnar,
+                                                  kick_rate=0.1)
+    individuals[1].alarm_level = 4.5
+    full = Runner(model=model).run(
+        checkpoint_file=str(tmp_path / "full.ckpt"), **kwargs).to_arrays()
+
+    # an interrupted run:
+    model, world, cells, individuals = M.populate(columnar=columnar,
+                                                  kick_rate=0.1)
+    individuals[1].alarm_level = 4.5
+    filename = str(tmp_path / "run.ckpt")
+    Runner(model=model).run(checkpoint_file=filename,
+                            **dict(kwargs, t_1=3.6))
+
+    # its continuation after setting up the model again:
+    model, world, cells, individuals = M.populate(columnar=columnar,
+                                                  kick_rate=0.1)
+    resumed = Runner(model=model).resume(filename, t_1=6).to_arrays()
+    assert_identical(full, resumed)
+    assert individuals[1].alarms == 1
+
+
+def test_checkpoint_contents(tmp_path):
+    """A checkpoint refers to the entities of the model it is read with."""
+    model, world, cells, individuals = M.populate()
+    filename = str(tmp_path / "run.ckpt")
+    Runner(model=model).run(t_1=2.2, dt=1, checkpoint_file=filename)
+    state = read_checkpoint(filename, model)
+    assert state["t"] == 2.
+    assert state["run_kwargs"]["t_1"] == 2.2
+    scheduled = [item[3] for item in state["scheduler"]._heap
+                 if item[2] is not None]
+    assert individuals[0] in scheduled
+    assert world.level == pytest.approx(2.2)
+    state["snapshot"].restore()
+    assert world.level == pytest.approx(2.)
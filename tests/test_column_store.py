@@ -0,0 +1,68 @@
+"""Test the columnar storage of Variable values."""
+
+# This file is part of pycopancore.
+#
+# Copyright (C) 2016-2017 by COPAN team at Potsdam Institute for Climate
+# Impact Research
+#
+# URL: <http://www.pik-potsdam.de/copan/software>
+# Contact: core@pik-potsdam.de
+# License: BSD 2-clause license
+
+import numpy as np
+
+from pycopancore.models._testing import engine as M
+from pycopancore.runners import Runner
+
+
+def run(columnar):
+    """Run the engine test model with all its process types."""
+    model, world, cells, individuals = M.populate(
+        6, columnar=columnar, kick_rate=0.1)
+    individuals[0].alarm_level = 2.5
+    return Runner(model=model).run(t_1=6, dt=0.5).to_arrays()
+
+
+def test_columnar_trajectories():
+    """Columnar and object storage give the same trajectories, up to the
+    rounding of sums over the Individuals of a Cell, which are added in the
+    order of a set."""
+    by_object = run(columnar=False)
+    by_column = run(columnar=True)
+    assert np.allclose(by_object['t'], by_column['t'], rtol=1e-12)
+    assert sorted(by_object) == sorted(by_column)
+    for key in by_object:
+        if key == 't':
+            continue
+        assert by_object[key]['instances'] == by_column[key]['instances']
+        values = by_object[key]['values']
+        if values.dtype.kind == "f":
+            assert np.allclose(values, by_column[key]['values'], rtol=1e-12,
+                               atol=1e-12, equal_nan=True), key
+        else:
+            assert np.array_equal(values, by_column[key]['values']), key
+
+
+def test_columnar_values():
+    """Values are read from and written to the columns, which grow with
+    the no. of instances."""
+    model, world, cells, individuals = M.populate(20, columnar=True)
+    store = M.MIndividual._column_store
+    assert store is not None and store.capacity >= 20
+    individuals[2].wealth = 7.
+    assert individuals[2].wealth == 7.
+    assert store.columns["wealth"][individuals[2]._index] == 7.
+    M.MIndividual.wealth.set_values(instances=individuals[:2],
+                                    values=[5., 6.])
+    assert list(M.MIndividual.wealth.eval(individuals[:4])) \
+        == [5., 6., 7., 4.]
+
+
+def test_reused_rows():
+    """An instance that gets the row of a forgotten one does not inherit
+    its values."""
+    model, world, cells, individuals = M.populate(columnar=True, age=5.)
+    M.MIndividual._column_store.clear()
+    newcomer = M.MIndividual(cell=cells[0])
+    assert newcomer._index == 0
+    assert newcomer.age == 0. and newcomer.wealth == 1.
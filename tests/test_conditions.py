@@ -0,0 +1,58 @@
+"""Test condition Events and termination conditions."""
+
+# This file is part of pycopancore.
+#
+# Copyright (C) 2016-2017 by COPAN team at Potsdam Institute for Climate
+# Impact Research
+#
+# URL: <http://www.pik-potsdam.de/copan/software>
+# Contact: core@pik-potsdam.de
+# License: BSD 2-clause license
+
+import numpy as np
+import pytest
+
+from pycopancore.models._testing import engine as M
+from pycopancore.runners import Runner
+
+
+@pytest.mark.parametrize("output_times", [None, np.linspace(0, 5, 11)])
+def test_simultaneous_crossings(output_times):
+    """A condition that becomes true for several instances at the same time
+    triggers the Event for all of them."""
+    model, world, cells, individuals = M.populate(alarm_level=2.5)
+    Runner(model=model).run(t_1=5, dt=1, output_times=output_times)
+    for inst in individuals:
+        assert inst.alarms == 1
+        assert inst.alarm_time == pytest.approx(2.5, abs=1e-9)
+
+
+def test_crossing_times():
+    """Each instance's Event occurs once, when its condition becomes
+    true."""
+    model, world, cells, individuals = M.populate(3)
+    for inst, level in zip(individuals, [3.5, 1.25, 2.]):
+        inst.alarm_level = level
+    Runner(model=model).run(t_1=5, dt=1)
+    assert [inst.alarms for inst in individuals] == [1, 1, 1]
+    assert np.allclose([inst.alarm_time for inst in individuals],
+                       [3.5, 1.25, 2.], atol=1e-9)
+
+
+def test_crossings_with_earlier_hazard():
+    """Crossings are not lost when a rate Event with varying rate occurs
+    earlier in the same solver step."""
+    model, world, cells, individuals = M.populate(8, alarm_level=2.5,
+                                                  kick_rate=0.2)
+    Runner(model=model).run(t_1=5, dt=5, max_step=5)
+    assert sum(inst.kicks for inst in individuals) > 0
+    assert [inst.alarms for inst in individuals] == [1] * 8
+
+
+def test_termination_condition():
+    """A run ends when a termination condition becomes true."""
+    model, world, cells, individuals = M.populate()
+    traj = Runner(model=model,
+                  termination_conditions=[M.MWorld.level > 2.25]
+                  ).run(t_1=5, dt=1)
+    assert traj['t'][-1] == pytest.approx(2.25, abs=1e-9)
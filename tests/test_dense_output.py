@@ -0,0 +1,48 @@
+"""Test output at given output_times by dense output."""
+
+# This file is part of pycopancore.
+#
+# Copyright (C) 2016-2017 by COPAN team at Potsdam Institute for Climate
+# Impact Research
+#
+# URL: <http://www.pik-potsdam.de/copan/software>
+# Contact: core@pik-potsdam.de
+# License: BSD 2-clause license
+
+import numpy as np
+import pytest
+
+from pycopancore.models._testing import engine as M
+from pycopancore.runners import Runner
+
+output_times = np.array([0., 0.3, 1., 1.25, 2.5, 2.7, 3.9, 4.])
+
+
+@pytest.mark.parametrize("solver", ["dopri5", "dop853", "RK45", "BDF"])
+def test_output_times(solver):
+    """Output is produced exactly at the output times (those at Steps after
+    the Steps), with interpolated values close to the exact solution."""
+    model, world, cells, individuals = M.populate()
+    traj = Runner(model=model).run(t_1=4, output_times=output_times,
+                                   solver=solver, rtol=1e-8, atol=1e-10)
+    assert np.array_equal(traj['t'], output_times)
+    for i, inst in enumerate(individuals):
+        assert np.allclose(traj[M.MIndividual.wealth][inst],
+                           (1. + i) * np.exp(0.05 * output_times),
+                           rtol=1e-6)
+    assert np.allclose(traj[M.MWorld.level][world], output_times)
+    # (the yearly Steps at 1, 2, 3 but not at t_1 = 4 are reflected):
+    assert list(traj[M.MIndividual.age][individuals[0]]) \
+        == [0, 0, 1, 1, 2, 2, 3, 3]
+
+
+def test_output_times_outside():
+    """Output times outside [t_0, t_1] are ignored, and explicit targets
+    are computed at the output times."""
+    model, world, cells, individuals = M.populate()
+    traj = Runner(model=model).run(t_0=1, t_1=3,
+                                   output_times=[0.5, 1., 1.7, 3., 3.5])
+    assert list(traj['t']) == [1., 1.7, 3.]
+    stock = traj[M.MCell.stock][cells[0]]
+    growth = traj[M.MCell.growth][cells[0]]
+    assert np.allclose(growth, 0.5 * np.sin(stock) + 1)
@@ -0,0 +1,50 @@
+"""Test EnsembleRunner."""
+
+# This file is part of pycopancore.
+#
+# Copyright (C) 2016-2017 by COPAN team at Potsdam Institute for Climate
+# Impact Research
+#
+# URL: <http://www.pik-potsdam.de/copan/software>
+# Contact: core@pik-potsdam.de
+# License: BSD 2-clause license
+
+import numpy as np
+
+from pycopancore.models._testing import engine as M
+from pycopancore.runners import EnsembleRunner, Moments, Runner
+
+
+def build(n_individuals):
+    """build the engine test model with n_individuals Individuals"""
+    model, world, cells, individuals = M.populate(n_individuals)
+    return model
+
+
+def test_ensemble():
+    """Members run with Variables and _DotConstructs passed to Runner.run
+    give the same trajectories as single runs, and feed the reducers."""
+    members = [dict(seed=0, n_individuals=3), dict(seed=1, n_individuals=5)]
+    kwargs = dict(t_1=2, dt=0.5, exclusions=[M.MCell.growth],
+                  add_to_output=[M.MIndividual.step_offset,
+                                 M.MIndividual.cell.stock])
+    times = np.linspace(0, 2, 5)
+    moments = Moments("MIndividual.wealth", times, aggregate="sum")
+    results = EnsembleRunner(build, processes=2).run(
+        members, reducers=[moments], **kwargs)
+    assert results.failed == []
+    for index, member in enumerate(members):
+        arrays = results[index]
+        assert "MIndividual.step_offset" in arrays
+        assert "MCell.growth" not in arrays
+        model = build(member["n_individuals"])
+        single = Runner(model=model).run(**kwargs).to_arrays()
+        assert sorted(arrays) == sorted(single)
+        for key in single:
+            if key != 't':
+                assert np.array_equal(arrays[key]['values'],
+                                      single[key]['values'])
+    # wealth sums of (1 + 2 + 3) exp(0.05 t) and (1 + ... + 5) exp(0.05 t):
+    assert np.all(moments.count == 2)
+    assert np.allclose(moments.mean[:, 0], 10.5 * np.exp(0.05 * times),
+                       rtol=1e-3)
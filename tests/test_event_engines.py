@@ -0,0 +1,64 @@
+"""Test the statistics of rate Events under the different engines."""
+
+# This file is part of pycopancore.
+#
+# Copyright (C) 2016-2017 by COPAN team at Potsdam Institute for Climate
+# Impact Research
+#
+# URL: <http://www.pik-potsdam.de/copan/software>
+# Contact: core@pik-potsdam.de
+# License: BSD 2-clause license
+
+import numpy as np
+import pytest
+
+from pycopancore.models._testing import engine as M
+from pycopancore.runners import Runner
+
+N = 100
+"""no. of Individuals"""
+T = 10
+"""duration of the runs"""
+no_steps = dict(step_offset=T)
+"""(so that the Steps do not occur during the runs)"""
+
+
+@pytest.mark.parametrize("engine", ["instance", "gillespie", "tau-leaping"])
+def test_rate(engine):
+    """Each instance experiences a Poisson-distributed no. of occurrences
+    with mean rate * T (rate 0.5)."""
+    model, world, cells, individuals = M.populate(N, 10, **no_steps)
+    Runner(model=model).run(t_1=T, dt=T, event_engine=engine, tau=0.25)
+    hits = np.array([inst.hits for inst in individuals])
+    mean = 0.5 * T
+    # (tolerances of about 4 standard errors):
+    assert abs(hits.mean() - mean) < 4 * np.sqrt(mean / N)
+    assert abs(hits.var() - mean) < 4 * mean * np.sqrt(2. / N)
+
+
+def test_tau_leaping_times():
+    """Under tau-leaping, the Events occur only every tau."""
+    model, world, cells, individuals = M.populate(N, 10, **no_steps)
+    t = Runner(model=model).run(t_1=T, dt=T, event_engine="tau-leaping",
+                                tau=0.25)['t']
+    # (output is repeated at each discontinuity):
+    discontinuities = np.unique(t[1:][np.diff(t) == 0])
+    assert np.allclose(discontinuities, 0.25 * np.arange(T / 0.25))
+
+
+@pytest.mark.parametrize("columnar", [False, True])
+def test_varying_rate(monkeypatch, columnar):
+    """An Event whose rate (kick_rate * World.level = kick_rate * t) varies
+    with the state occurs on average kick_rate * T**2 / 2 times."""
+    hit = [p for p in M.Individual.processes if p.name == "hit"][0]
+    # (hardly any occurrences of the Event with constant rate):
+    monkeypatch.setattr(hit, "specification",
+                        ["rate", 1e-9, hit.specification[2]])
+    model, world, cells, individuals = M.populate(N, 10, columnar=columnar,
+                                                  kick_rate=0.05,
+                                                  **no_steps)
+    Runner(model=model).run(t_1=T, dt=T)
+    kicks = np.array([inst.kicks for inst in individuals])
+    mean = 0.05 * T ** 2 / 2
+    assert abs(kicks.mean() - mean) < 4 * np.sqrt(mean / N)
+    assert abs(kicks.var() - mean) < 4 * mean * np.sqrt(2. / N)
@@ -0,0 +1,63 @@
+"""Test the compiled expression kernels against _expressions.eval."""
+
+# This file is part of pycopancore.
+#
+# Copyright (C) 2016-2017 by COPAN team at Potsdam Institute for Climate
+# Impact Research
+#
+# URL: <http://www.pik-potsdam.de/copan/software>
+# Contact: core@pik-potsdam.de
+# License: BSD 2-clause license
+
+import numpy as np
+import pytest
+import sympy as sp
+
+from pycopancore.models._testing import engine as M
+from pycopancore.private._expressions import eval
+from pycopancore.private._expression_kernels import _ExpressionKernel, \
+    compile_kernels
+
+W, C, I = M.MWorld, M.MCell, M.MIndividual
+
+expressions = [
+    I.wealth * I.interest + 1,
+    W.sum.cells.stock,
+    W.mean.cells.stock * 2 + 1,
+    C.sum.individuals.wealth,
+    C.max.individuals(I.wealth ** 2),
+    I.cell.stock * I.wealth,
+    I.cell.social_system.world.level + I.wealth,
+    sp.sin(C.stock) / (1 + C.decay_rate),
+    C.stock ** 0.5 + sp.Abs(C.growth - 3),
+    sp.Piecewise((I.wealth, I.wealth > 3), (0, True)),
+    sp.Max(C.stock, C.decay_rate * 110),
+    sp.Min(I.wealth, 2),
+]
+
+
+@pytest.mark.parametrize("columnar", [False, True])
+@pytest.mark.parametrize("expr", expressions, ids=str)
+def test_kernel_equals_eval(expr, columnar):
+    """A kernel returns the same values as eval."""
+    M.populate(7, 3, columnar=columnar)
+    expected = np.array(eval(expr), dtype=float)
+    assert np.allclose(_ExpressionKernel(expr)(), expected, rtol=1e-14)
+
+
+def test_kernel_invalidate():
+    """After invalidate, a kernel takes changed instances into account."""
+    model, world, cells, individuals = M.populate(4)
+    expr = W.sum.cells.stock
+    kernel = _ExpressionKernel(expr)
+    assert np.allclose(kernel(), eval(expr))
+    M.MCell(social_system=cells[0].social_system, stock=100.)
+    kernel.invalidate()
+    assert np.allclose(kernel(), eval(expr))
+    assert np.allclose(kernel(), 10. + 11. + 100.)
+
+
+def test_compile_kernels():
+    """Methods and unsupported expressions are not compiled."""
+    assert compile_kernels(lambda self, t: 0) is None
+    assert len(compile_kernels([C.stock, C.stock * 2])) == 2
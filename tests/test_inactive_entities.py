@@ -0,0 +1,50 @@
+"""Test the scheduling of Steps and Events of deactivated entities."""
+
+# This file is part of pycopancore.
+#
+# Copyright (C) 2016-2017 by COPAN team at Potsdam Institute for Climate
+# Impact Research
+#
+# URL: <http://www.pik-potsdam.de/copan/software>
+# Contact: core@pik-potsdam.de
+# License: BSD 2-clause license
+
+import numpy as np
+import pytest
+
+from pycopancore.models._testing import engine as M
+from pycopancore.runners import Runner
+
+
+@pytest.mark.parametrize("columnar", [False, True])
+def test_reactivation(monkeypatch, columnar):
+    """A Step or Event due while its entity is inactive is dropped, but
+    the entity's other scheduled items still occur after it has been
+    reactivated."""
+    hit = [p for p in M.Individual.processes if p.name == "hit"][0]
+    rewire = [p for p in M.World.processes if p.name == "rewire"][0]
+
+    def next_hit(self, t):
+        return 2. * np.floor(t / 2.) + 2.
+
+    def next_toggle(self, t):
+        return 0.5 if t < 0.5 else 1.2 if t < 1.2 else np.inf
+
+    def toggle(self, t):
+        if individuals[0].is_active:
+            individuals[0].deactivate()
+        else:
+            individuals[0].reactivate()
+
+    # hits at 2, 4, ...; the first Individual inactive from 0.5 to 1.2:
+    monkeypatch.setattr(hit, "specification",
+                        ["time", next_hit, hit.specification[2]])
+    monkeypatch.setattr(rewire, "specification",
+                        ["time", next_toggle, toggle])
+    model, world, cells, individuals = M.populate(columnar=columnar)
+    Runner(model=model).run(t_1=3, dt=0.5)
+    assert individuals[0].is_active
+    # its Step due at 1 was dropped, its Event due at 2 occurred:
+    assert individuals[0].age == 0
+    assert individuals[0].hits == 1
+    assert [inst.hits for inst in individuals[1:]] == [1, 1, 1]
@@ -0,0 +1,54 @@
+"""Test the sparse Jacobian of the ODE system."""
+
+# This file is part of pycopancore.
+#
+# Copyright (C) 2016-2017 by COPAN team at Potsdam Institute for Climate
+# Impact Research
+#
+# URL: <http://www.pik-potsdam.de/copan/software>
+# Contact: core@pik-potsdam.de
+# License: BSD 2-clause license
+
+import numpy as np
+import pytest
+
+from pycopancore.models._testing import engine as M
+from pycopancore.runners import Runner
+
+
+@pytest.mark.parametrize("columnar", [False, True])
+def test_jacobian(monkeypatch, columnar):
+    """The analytic Jacobian agrees with finite differences of
+    get_rhs_array, and its sparsity pattern covers all their nonzeros."""
+    # (no varying-rate Event and no ODEs or Explicits given by methods,
+    # which would prevent the analytic Jacobian):
+    kick = [p for p in M.Individual.processes if p.name == "kick"][0]
+    monkeypatch.setattr(kick, "specification",
+                        ["rate", 1e-9, kick.specification[2]])
+    monkeypatch.setattr(M.Individual, "processes", [
+        p for p in M.Individual.processes
+        if p.name not in ("saving", "batch saving", "bonus", "batch bonus")])
+    model, world, cells, individuals = M.populate(6, 3, columnar=columnar)
+    runner = Runner(model=model)
+    runner.run(t_1=1, dt=1, solver="BDF")
+    builder = runner._jacobian_builder
+    assert builder.analytic
+    target_variables = [M.MWorld.level, M.MCell.stock, M.MIndividual.wealth]
+    state = np.zeros(builder.size)
+    for var in target_variables:
+        state[var._from:var._to] = var.eval(var.owning_class.instances)
+    assert builder.size == 1 + 3 + 6
+
+    t = 1.
+    jacobian = runner.get_jacobian(t, state).toarray()
+    differences = np.zeros_like(jacobian)
+    h = 1e-6
+    for j in range(builder.size):
+        step = np.zeros(builder.size)
+        step[j] = h
+        differences[:, j] = (runner.get_rhs_array(t, state + step)
+                             - runner.get_rhs_array(t, state - step)) / (2 * h)
+    assert np.abs(jacobian - differences).max() < 1e-6
+    # e.g. the stock of a Cell depends on the wealth of its Individuals:
+    assert np.count_nonzero(differences) > builder.size
+    assert np.all(builder.sparsity.toarray()[differences != 0])
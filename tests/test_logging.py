@@ -0,0 +1,108 @@
+"""Test the verbosity levels and the progress bar."""
+
+# This file is part of pycopancore.
+#
+# Copyright (C) 2016-2017 by COPAN team at Potsdam Institute for Climate
+# Impact Research
+#
+# URL: <http://www.pik-potsdam.de/copan/software>
+# Contact: core@pik-potsdam.de
+# License: BSD 2-clause license
+
+import io
+import logging
+
+import pytest
+
+from pycopancore.models._testing import engine as M
+from pycopancore.private._logging import TRACE, _Progress, logger
+from pycopancore.runners import Runner, set_verbosity
+
+
+@pytest.fixture(autouse=True)
+def restore_logger():
+    """undo the changes of set_verbosity to the global logger"""
+    level, handlers, propagate = \
+        logger.level, list(logger.handlers), logger.propagate
+    yield
+    logger.setLevel(level)
+    logger.handlers[:] = handlers
+    logger.propagate = propagate
+
+
+def run(**kwargs):
+    model = M.populate()[0]
+    return Runner(model=model).run(t_1=3, dt=0.5, **kwargs)
+
+
+def records_by_level(caplog):
+    """return a dict mapping levels to the no. of copan:CORE records"""
+    counts = {}
+    for record in caplog.records:
+        if record.name.startswith("pycopancore"):
+            counts[record.levelno] = counts.get(record.levelno, 0) + 1
+    return counts
+
+
+def test_default_is_silent(caplog, capsys):
+    """By default, a run emits no messages and (without a terminal) no
+    progress bar."""
+    # (the root logger has its default level WARNING):
+    run()
+    assert records_by_level(caplog) == {}
+    out, err = capsys.readouterr()
+    assert out == err == ""
+
+
+def test_verbosity_levels(caplog):
+    """Each verbosity level adds the messages of the next finer level."""
+    counts = {}
+    for verbosity in ("quiet", "info", "debug", "trace"):
+        caplog.clear()
+        set_verbosity(verbosity, handler=False)
+        run()
+        counts[verbosity] = records_by_level(caplog)
+    assert counts["quiet"] == {}
+    assert set(counts["info"]) == {logging.INFO}
+    assert set(counts["debug"]) == {logging.INFO, logging.DEBUG}
+    assert set(counts["trace"]) == {logging.INFO, logging.DEBUG, TRACE}
+    assert counts["trace"][TRACE] > 0
+    assert counts["trace"][logging.DEBUG] == counts["debug"][logging.DEBUG]
+
+
+def test_default_handler(capsys):
+    """Runner.run with verbosity writes the messages to sys.stdout."""
+    run(verbosity="info")
+    out, err = capsys.readouterr()
+    assert out.count("\n") == len(out.splitlines()) > 0
+    assert err == ""
+    set_verbosity("quiet")
+    run()
+    assert capsys.readouterr().out == ""
+
+
+def test_progress_rate_limit():
+    """The progress bar is redrawn at most once per interval, and
+    finally at the end of the run."""
+    stream = io.StringIO()
+    progress = _Progress(0, 10, interval=1e9, stream=stream)
+    for t in range(10):
+        progress.update(t)
+    progress.close(10)
+    output = stream.getvalue()
+    assert output.count("\r") == 2
+    assert "100.0% t=10 " in output and output.endswith(" s\n")
+
+    stream = io.StringIO()
+    progress = _Progress(0, 10, interval=0, stream=stream)
+    for t in range(10):
+        progress.update(t)
+    assert stream.getvalue().count("\r") == 10
+
+
+def test_progress_bar(capsys):
+    """Runner.run with progress=True draws the bar on sys.stderr."""
+    run(progress=True)
+    out, err = capsys.readouterr()
+    assert out == ""
+    assert err.startswith("\r  [") and "100.0% t=3 " in err
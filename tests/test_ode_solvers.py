@@ -0,0 +1,32 @@
+"""Test the ODE solver backends of the Runner."""
+
+# This file is part of pycopancore.
+#
+# Copyright (C) 2016-2017 by COPAN team at Potsdam Institute for Climate
+# Impact Research
+#
+# URL: <http://www.pik-potsdam.de/copan/software>
+# Contact: core@pik-potsdam.de
+# License: BSD 2-clause license
+
+import numpy as np
+import pytest
+
+from pycopancore.models._testing import engine as M
+from pycopancore.private._ode_solvers import solvers
+from pycopancore.runners import Runner
+
+
+@pytest.mark.parametrize("solver", sorted(solvers))
+def test_solver(solver):
+    """All solvers follow the exact solution, also with a first step
+    longer than the intervals between the Steps (every 0.5 or 1)."""
+    model, world, cells, individuals = M.populate()
+    traj = Runner(model=model).run(t_1=4, dt=0.5, solver=solver,
+                                   rtol=1e-8, atol=1e-10, first_step=2.)
+    t = traj['t']
+    assert t[-1] == 4
+    for inst in individuals:
+        expected = (1. + individuals.index(inst)) * np.exp(0.05 * t)
+        assert np.allclose(traj[M.MIndividual.wealth][inst], expected,
+                           rtol=1e-6)
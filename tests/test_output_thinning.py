@@ -0,0 +1,90 @@
+"""Test the _OutputThinning policies."""
+
+# This file is part of pycopancore.
+#
+# Copyright (C) 2016-2017 by COPAN team at Potsdam Institute for Climate
+# Impact Research
+#
+# URL: <http://www.pik-potsdam.de/copan/software>
+# Contact: core@pik-potsdam.de
+# License: BSD 2-clause license
+
+import numpy as np
+import pytest
+
+from pycopancore.models._testing import engine as M
+from pycopancore.private._output_thinning import _OutputThinning
+from pycopancore.runners import Runner
+
+times = np.round(np.arange(0, 2.05, 0.1), 10)
+"""0, 0.1, ..., 2"""
+
+
+def kept(policy, parameter, times):
+    """return the time points kept when passing all at once"""
+    return list(times[_OutputThinning(policy, parameter).select(
+        times, final=True)])
+
+
+def test_spacing():
+    """Time points are kept at least the spacing apart, and the last one."""
+    assert kept("spacing", 0.45, times) == [0, 0.5, 1., 1.5, 2.]
+    assert kept("spacing", 0.7, times) == [0, 0.7, 1.4, 2.]
+
+
+def test_grid():
+    """The first time point in each grid cell is kept."""
+    assert kept("grid", 0.5, times) == [0, 0.5, 1., 1.5, 2.]
+    assert kept("grid", [0.25, 1.75], times) == [0, 0.3, 1.8, 2.]
+
+
+def test_every():
+    """Every k-th time point is kept, and the last one."""
+    assert kept("every", 3, times) == list(times[::3]) + [2.]
+
+
+@pytest.mark.parametrize("policy, parameter", [
+    ("spacing", 0.45), ("grid", 0.5), ("every", 4)])
+def test_discontinuities(policy, parameter):
+    """Both time points at a discontinuity are kept."""
+    jumpy = np.sort(np.concatenate((times, [0.7, 1.3])))
+    result = kept(policy, parameter, jumpy)
+    assert result.count(0.7) == 2 and result.count(1.3) == 2
+
+
+@pytest.mark.parametrize("policy, parameter", [
+    ("spacing", 0.45), ("grid", 0.5), ("grid", [0.25, 1.75]),
+    ("every", 3)])
+def test_blocks(policy, parameter):
+    """Passing the time points in blocks keeps the same ones as passing
+    them at once (the last one of each block is passed again)."""
+    thinning = _OutputThinning(policy, parameter)
+    result = []
+    start = 0
+    for stop in (5, 6, 13, len(times)):
+        block = times[start:stop]
+        final = stop == len(times)
+        indices = thinning.select(block, final=final)
+        if not final:
+            # (the undecided last time point:)
+            assert indices[-1] == len(block) - 1
+            indices = indices[:-1]
+            stop -= 1
+        result += list(block[indices])
+        start = stop
+    assert result == kept(policy, parameter, times)
+
+
+def test_run():
+    """A thinned run keeps time points at least the spacing apart, except
+    at discontinuities (Steps at integer times and every 1.5)."""
+    model, world, cells, individuals = M.populate()
+    full = Runner(model=model).run(t_1=5, dt=0.1)['t']
+    model, world, cells, individuals = M.populate()
+    thin = Runner(model=model).run(t_1=5, dt=0.1,
+                                   thinning=("spacing", 0.5))['t']
+    assert len(thin) < len(full)
+    assert set(thin) <= set(full)
+    gaps = np.diff(thin)
+    assert np.all((gaps >= 0.5) | (gaps == 0) | np.isin(thin[1:], full[
+        np.flatnonzero(np.diff(full) == 0)]) | (thin[1:] == 5))
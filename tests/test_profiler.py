@@ -0,0 +1,59 @@
+"""Test the profiling of runs."""
+
+# This file is part of pycopancore.
+#
+# Copyright (C) 2016-2017 by COPAN team at Potsdam Institute for Climate
+# Impact Research
+#
+# URL: <http://www.pik-potsdam.de/copan/software>
+# Contact: core@pik-potsdam.de
+# License: BSD 2-clause license
+
+import json
+
+import pytest
+
+from pycopancore.models._testing import engine as M
+from pycopancore.private import _ode_solvers
+from pycopancore.runners import Runner
+
+
+@pytest.mark.parametrize("solver", ["RK45", "DOP853"])
+def test_profile(monkeypatch, solver):
+    """The no. of RHS evaluations is that counted by the solver, and the
+    report survives a JSON round trip. (Implicit solvers do not count the
+    evaluations for finite-difference Jacobians.)"""
+    solvers = []
+    method = _ode_solvers._SolveIVPSolver.methods[solver]
+
+    class CountingSolver(method):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            solvers.append(self)
+
+    monkeypatch.setitem(_ode_solvers._SolveIVPSolver.methods, solver,
+                        CountingSolver)
+    model, world, cells, individuals = M.populate()
+    traj = Runner(model=model).run(t_1=3, dt=0.5, solver=solver,
+                                   profile=True)
+    profile = traj.profile
+    assert len(solvers) > 1
+    assert profile.rhs_evaluations == sum(s.nfev for s in solvers) > 0
+
+    report = json.loads(profile.to_json())
+    assert report == profile.to_dict()
+    assert report["rhs_evaluations"] == profile.rhs_evaluations
+    assert 0 < report["phases"]["rhs"]["seconds"] <= report["wall_time"]
+    processes = {(p["owning_class"], p["process"]): p
+                 for p in report["processes"]}
+    assert processes[("MIndividual", "aging")]["calls"] \
+        == sum(individual.age for individual in individuals)
+    seconds = [p["seconds"] for p in report["processes"]]
+    assert seconds == sorted(seconds, reverse=True)
+
+
+def test_no_profile():
+    """Without profile=True, the trajectory has no profile."""
+    model = M.populate()[0]
+    traj = Runner(model=model).run(t_1=1, dt=0.5)
+    assert getattr(traj, "profile", None) is None
@@ -0,0 +1,100 @@
+"""Test the online reducers for ensembles."""
+
+# This file is part of pycopancore.
+#
+# Copyright (C) 2016-2017 by COPAN team at Potsdam Institute for Climate
+# Impact Research
+#
+# URL: <http://www.pik-potsdam.de/copan/software>
+# Contact: core@pik-potsdam.de
+# License: BSD 2-clause license
+
+import numpy as np
+import pytest
+
+from pycopancore.runners.reducers import Moments, Quantiles, _on_grid
+
+TIMES = np.array([0., 1., 2.])
+INSTANCES = ["Individual[UID=1]", "Individual[UID=2]"]
+
+
+def arrays(values, active=None):
+    """return a run in the format of _TrajectoryDictionary.to_arrays with
+    output at TIMES and the given values of Individual.wealth"""
+    values = np.asarray(values, dtype=float)
+    if active is None:
+        active = np.ones(values.shape, dtype=bool)
+    return {'t': TIMES.copy(),
+            "Individual.wealth": {'instances': INSTANCES, 'values': values,
+                                  'active': active}}
+
+
+def test_on_grid():
+    """Values are interpolated linearly, the later value is used at a
+    discontinuity, and NaN only spreads to the adjacent intervals."""
+    t = np.array([0., 1., 1., 2., 3.])
+    values = np.array([[0.], [1.], [5.], [np.nan], [7.]])
+    times = np.array([-1., 0., 0.5, 1., 1.5, 2., 2.5, 3., 4.])
+    result = _on_grid(t, values, times)[:, 0]
+    assert np.array_equal(
+        result, [np.nan, 0., 0.5, 5., np.nan, np.nan, np.nan, 7., np.nan],
+        equal_nan=True)
+    assert np.array_equal(_on_grid(t, values[:, [0, 0]], times[3:4]),
+                          [[5., 5.]])
+
+
+def test_moments():
+    """Moments agree with np.mean and np.var, skipping inactive
+    instances."""
+    rng = np.random.default_rng(0)
+    runs = rng.normal(size=(50, len(TIMES), 2))
+    active = rng.random(runs.shape) > 0.2
+    reducer = Moments("Individual.wealth", TIMES)
+    for values, act in zip(runs, active):
+        reducer.update(arrays(values, act))
+    assert reducer.columns == INSTANCES
+    samples = np.where(active, runs, np.nan)
+    assert np.array_equal(reducer.count, active.sum(axis=0))
+    assert np.allclose(reducer.mean, np.nanmean(samples, axis=0))
+    assert np.allclose(reducer.variance,
+                       np.nanvar(samples, axis=0, ddof=1))
+
+
+def test_moments_aggregate():
+    """The values of all active instances are aggregated before the
+    statistics are computed."""
+    reducer = Moments("Individual.wealth", TIMES, aggregate="mean")
+    reducer.update(arrays([[1., 3.], [2., 4.], [3., 5.]],
+                          [[True, True], [True, False], [False, False]]))
+    reducer.update(arrays([[3., 5.], [4., 4.], [5., 5.]]))
+    assert reducer.columns == ["mean"]
+    assert np.array_equal(reducer.count[:, 0], [2, 2, 1])
+    assert np.array_equal(reducer.mean[:, 0], [3., 3., 5.])
+    assert np.array_equal(reducer.variance[:, 0], [2., 2., np.nan],
+                          equal_nan=True)
+
+
+@pytest.mark.parametrize("n_runs", [1, 3, 5])
+def test_quantiles_exact(n_runs):
+    """Up to five runs, the quantiles are those of np.quantile."""
+    runs = np.random.default_rng(1).normal(size=(n_runs, len(TIMES), 2))
+    reducer = Quantiles("Individual.wealth", TIMES,
+                        probabilities=(0.1, 0.5, 0.9))
+    for values in runs:
+        reducer.update(arrays(values))
+    assert np.allclose(reducer.quantiles,
+                       np.quantile(runs, (0.1, 0.5, 0.9), axis=0))
+
+
+def test_quantiles_approximate():
+    """For many runs, the estimates approach np.quantile, and NaN values
+    are skipped."""
+    rng = np.random.default_rng(2)
+    runs = rng.normal(size=(2000, len(TIMES), 2))
+    runs[::2, 0, 0] = np.nan
+    reducer = Quantiles("Individual.wealth", TIMES)
+    for values in runs:
+        reducer.update(arrays(values))
+    assert reducer.count[0, 0] == 1000 and reducer.count[1, 0] == 2000
+    expected = np.nanquantile(runs, (0.05, 0.5, 0.95), axis=0)
+    assert np.abs(reducer.quantiles - expected).max() < 0.1
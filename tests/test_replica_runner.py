@@ -0,0 +1,74 @@
+"""Test the ReplicaRunner against separate single runs."""
+
+# This file is part of pycopancore.
+#
+# Copyright (C) 2016-2017 by COPAN team at Potsdam Institute for Climate
+# Impact Research
+#
+# URL: <http://www.pik-potsdam.de/copan/software>
+# Contact: core@pik-potsdam.de
+# License: BSD 2-clause license
+
+import numpy as np
+import pytest
+
+from pycopancore.model_components import base
+from pycopancore.model_components.base import interface as B
+from pycopancore.models._testing import engine as M
+from pycopancore.process_types import Explicit
+from pycopancore.runners import Runner
+from pycopancore.runners.replica_runner import ReplicaRunner
+
+VARIABLES = ["MWorld.level", "MWorld.favourite_wealth", "MCell.stock",
+             "MIndividual.wealth", "MIndividual.acquaintance_wealth"]
+"""Variables not affected by random Events"""
+
+
+def build(interest, n_individuals=4, n_cells=2):
+    """create the entities of one replica as populate does"""
+    world = M.MWorld(culture=M.MCulture.instances[0])
+    social_system = M.MSocialSystem(world=world)
+    cells = [M.MCell(social_system=social_system, stock=10. + i)
+             for i in range(n_cells)]
+    individuals = [
+        M.MIndividual(cell=cells[i % n_cells], wealth=1. + i,
+                      step_offset=0.5 * (i % 2), interest=interest)
+        for i in range(n_individuals)]
+    world.culture.acquaintance_network.add_edges_from(
+        zip(individuals, individuals[1:] + individuals[:1]))
+    world.favourites = set(individuals[:1])
+
+
+@pytest.mark.parametrize("columnar", [False, True])
+def test_replicas(columnar):
+    """Each replica ends in the same state as a single run with its
+    parameters."""
+    interests = [0.05, 0.1, -0.02]
+    singles = []
+    for interest in interests:
+        model = M.populate(columnar=columnar, interest=interest)[0]
+        singles.append(Runner(model=model).run(t_1=3, dt=1).to_arrays())
+
+    model, world, cells, individuals = M.populate(0, 0, columnar=columnar)
+    for entity in (world, world.social_systems.pop()):
+        entity.deactivate()
+    results = ReplicaRunner(model, build).run(
+        [{"interest": interest} for interest in interests], t_1=3, dt=1)
+    assert results.failed == []
+    for single, replica in zip(singles, results.trajectories):
+        assert replica['t'][-1] == single['t'][-1] == 3
+        for var in VARIABLES:
+            values = replica[var]['values'][-1][replica[var]['active'][-1]]
+            expected = single[var]['values'][-1]
+            assert len(values) == len(expected)
+            assert np.allclose(values, expected, rtol=1e-5), var
+
+
+def test_process_taxa_with_processes(monkeypatch):
+    """Models whose process taxa have processes are rejected."""
+    monkeypatch.setattr(base.Culture, "processes", [
+        Explicit("network", [B.Culture.acquaintance_network],
+                 lambda self, t: None)])
+    model = M.populate()[0]
+    with pytest.raises(AssertionError, match="replicas would share"):
+        ReplicaRunner(model, build)
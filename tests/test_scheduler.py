@@ -0,0 +1,103 @@
+"""Test the _Scheduler priority queue."""
+
+# This file is part of pycopancore.
+#
+# Copyright (C) 2016-2017 by COPAN team at Potsdam Institute for Climate
+# Impact Research
+#
+# URL: <http://www.pik-potsdam.de/copan/software>
+# Contact: core@pik-potsdam.de
+# License: BSD 2-clause license
+
+import pickle
+
+import numpy as np
+
+from pycopancore.private._scheduler import _Scheduler
+
+
+class Thing(object):
+    """Stand-in for an entity or process (compared by identity)."""
+
+    def __init__(self, name):
+        self.name = name
+
+    def __repr__(self):
+        return self.name
+
+
+step, event = Thing("step"), Thing("event")
+a, b, c = Thing("a"), Thing("b"), Thing("c")
+
+
+def test_order():
+    """Items are returned by time, those with equal times together in the
+    order in which they were pushed."""
+    scheduler = _Scheduler()
+    scheduler.push(2., step, a)
+    scheduler.push(1., event, b)
+    scheduler.push(2., event, c)
+    scheduler.push(1., step, a)
+    assert len(scheduler) == 4
+    assert scheduler.next_time() == 1.
+    assert scheduler.pop() == [(event, b), (step, a)]
+    assert scheduler.pop() == [(step, a), (event, c)]
+    assert len(scheduler) == 0
+    assert scheduler.next_time() is None
+
+
+def test_random_order():
+    """Many items come out sorted by time."""
+    np.random.seed(0)
+    times = np.random.randint(0, 50, 500).astype(float)
+    scheduler = _Scheduler()
+    for i, time in enumerate(times):
+        scheduler.push(time, step, Thing(str(i)))
+    popped = []
+    while len(scheduler) > 0:
+        time = scheduler.next_time()
+        popped += [time] * len(scheduler.pop())
+    assert popped == sorted(times)
+
+
+def test_cancel():
+    """Cancelled items are skipped, either all of an instance or only
+    those of one process."""
+    scheduler = _Scheduler()
+    scheduler.push(1., step, a)
+    scheduler.push(2., event, a)
+    scheduler.push(2., step, b)
+    scheduler.push(3., step, a)
+    scheduler.cancel(a, event)
+    assert len(scheduler) == 3
+    assert scheduler.pop() == [(step, a)]
+    assert scheduler.pop() == [(step, b)]
+    scheduler.cancel(a)
+    scheduler.cancel(c)  # (nothing scheduled)
+    assert len(scheduler) == 0
+    assert scheduler.next_time() is None
+
+
+def test_cancel_earliest():
+    """next_time skips cancelled items at the front."""
+    scheduler = _Scheduler()
+    scheduler.push(1., step, a)
+    scheduler.push(2., step, b)
+    scheduler.cancel(a)
+    assert scheduler.next_time() == 2.
+    assert scheduler.pop() == [(step, b)]
+
+
+def test_pickle():
+    """A pickled scheduler keeps its items and can still cancel them."""
+    scheduler = _Scheduler()
+    scheduler.push(1., step, a)
+    scheduler.push(2., step, b)
+    scheduler.push(3., event, b)
+    scheduler.cancel(a)
+    copy = pickle.loads(pickle.dumps(scheduler))
+    assert len(copy) == 2
+    items = copy.pop()
+    assert [process.name for process, inst in items] == ["step"]
+    copy.cancel(items[0][1])
+    assert len(copy) == 0
@@ -0,0 +1,52 @@
+"""Test Model.snapshot and Model.restore."""
+
+# This file is part of pycopancore.
+#
+# Copyright (C) 2016-2017 by COPAN team at Potsdam Institute for Climate
+# Impact Research
+#
+# URL: <http://www.pik-potsdam.de/copan/software>
+# Contact: core@pik-potsdam.de
+# License: BSD 2-clause license
+
+import numpy as np
+import pytest
+
+from pycopancore.models._testing import engine as M
+from pycopancore.runners import Runner
+
+
+def assert_identical(a, b):
+    """assert that two trajectories (as returned by to_arrays) are equal"""
+    assert np.array_equal(a['t'], b['t'])
+    assert sorted(a) == sorted(b)
+    for key in a:
+        if key != 't':
+            assert a[key]['instances'] == b[key]['instances']
+            values = a[key]['values']
+            assert np.array_equal(values, b[key]['values'],
+                                  equal_nan=values.dtype.kind == "f"), key
+
+
+@pytest.mark.parametrize("columnar", [False, True])
+def test_restore(columnar):
+    """Runs from a restored snapshot are identical, including the random
+    Events, entities created in between, and changed references."""
+    model, world, cells, individuals = M.populate(columnar=columnar,
+                                                  kick_rate=0.1)
+    Runner(model=model).run(t_1=2, dt=0.5)
+    snapshot = model.snapshot()
+    runs = []
+    for repetition in range(2):
+        if repetition:
+            model.restore(snapshot)
+        newcomer = M.MIndividual(cell=cells[0])
+        individuals[0].cell = cells[1]
+        runs.append(Runner(model=model).run(t_0=2, t_1=5, dt=0.5)
+                    .to_arrays())
+        assert len(M.MIndividual.instances) == len(individuals) + 1
+    assert_identical(*runs)
+    model.restore(snapshot)
+    assert len(M.MIndividual.instances) == len(individuals)
+    assert individuals[0].cell is cells[0]
+    assert newcomer not in cells[0].individuals
@@ -0,0 +1,72 @@
+"""Test that the runner notices changes of the entity structure."""
+
+# This file is part of pycopancore.
+#
+# Copyright (C) 2016-2017 by COPAN team at Potsdam Institute for Climate
+# Impact Research
+#
+# URL: <http://www.pik-potsdam.de/copan/software>
+# Contact: core@pik-potsdam.de
+# License: BSD 2-clause license
+
+import numpy as np
+import pytest
+
+from pycopancore.models._testing import engine as M
+from pycopancore.runners import Runner
+
+
+@pytest.mark.parametrize("columnar", [False, True])
+def test_rewiring(columnar):
+    """Aggregations over acquaintances follow an Event that rewires the
+    acquaintance network without calling _structure_changed."""
+    model, world, cells, individuals = M.populate(5, columnar=columnar,
+                                                  step_offset=10)
+    world.rewiring_time = 1.5
+    traj = Runner(model=model).run(t_1=3, dt=0.5)
+    t = traj['t']
+    wealth = traj[M.MIndividual.wealth]
+    acquaintance_wealth = traj[M.MIndividual.acquaintance_wealth]
+    # Individual 1 is acquainted with 0 and 2 before, with 3 and 4 after:
+    before, after = t < 1.5, t > 1.5
+    assert np.allclose(acquaintance_wealth[individuals[1]][before],
+                       (wealth[individuals[0]] + wealth[individuals[2]])
+                       [before])
+    assert np.allclose(acquaintance_wealth[individuals[1]][after],
+                       (wealth[individuals[3]] + wealth[individuals[4]])
+                       [after])
+
+
+def test_set_mutation():
+    """Aggregations over a set-valued attribute follow in-place changes of
+    the set."""
+    model, world, cells, individuals = M.populate(4, step_offset=10)
+    world.rewiring_time = 1.5
+    traj = Runner(model=model).run(t_1=3, dt=0.5)
+    t = traj['t']
+    wealth = traj[M.MIndividual.wealth]
+    favourite_wealth = traj[M.MWorld.favourite_wealth][world]
+    # the last Individual becomes a favourite at the rewiring:
+    before, after = t < 1.5, t > 1.5
+    assert np.allclose(favourite_wealth[before],
+                       wealth[individuals[0]][before])
+    assert np.allclose(favourite_wealth[after],
+                       (wealth[individuals[0]] + wealth[individuals[3]])
+                       [after])
+
+
+def test_fingerprinted_attributes():
+    """Only networks and sets not derived via properties are part of the
+    fingerprint, and entities without a Culture can still be created."""
+    model, world, cells, individuals = M.populate()
+    runner = Runner(model=model)
+    runner.structure_fingerprint()
+    assert sorted((cls.__name__, codename)
+                  for cls, codename in runner._structure_attributes) \
+        == [("MCulture", "acquaintance_network"),
+            ("MCulture", "group_membership_network"),
+            ("MWorld", "favourites")]
+    lonely_world = M.MWorld()
+    social_system = M.MSocialSystem(world=lonely_world)
+    M.MIndividual(cell=M.MCell(social_system=social_system))
+    runner.structure_fingerprint()
@@ -0,0 +1,78 @@
+"""Test the array-based _TrajectoryDictionary."""
+
+# This file is part of pycopancore.
+#
+# Copyright (C) 2016-2017 by COPAN team at Potsdam Institute for Climate
+# Impact Research
+#
+# URL: <http://www.pik-potsdam.de/copan/software>
+# Contact: core@pik-potsdam.de
+# License: BSD 2-clause license
+
+import numpy as np
+
+from pycopancore.data_model import Variable
+from pycopancore.models._testing import engine as M
+from pycopancore.private._trajectory_dictionary import _TrajectoryDictionary
+from pycopancore.runners import Runner
+
+
+class Thing(object):
+    """Stand-in for an instance."""
+
+
+def test_growth():
+    """Time points and instances beyond the initial capacity are kept, and
+    values before an instance was recorded are NaN."""
+    var = Variable("x", "")
+    traj = _TrajectoryDictionary(capacity=2)
+    traj.add_variable(var)
+    things = [Thing() for i in range(5)]
+    for row in range(10):
+        traj.append_time(row / 2)
+        instances = things[:1 + row // 2]
+        traj.record(var, instances, [10. * row + i
+                                     for i in range(len(instances))])
+    assert np.array_equal(traj['t'], np.arange(10) / 2)
+    assert np.array_equal(traj[var][things[0]], 10. * np.arange(10))
+    values = traj[var][things[4]]
+    assert np.all(np.isnan(values[:8]))
+    assert list(values[8:]) == [84., 94.]
+    assert traj[var].tolist(things[4])[7:] == [None, 84., 94.]
+    assert traj[var].as_array().shape == (10, 5)
+
+
+def test_objects():
+    """Non-numeric values switch the storage to objects."""
+    var = Variable("x", "")
+    traj = _TrajectoryDictionary()
+    traj.add_variable(var)
+    things = [Thing(), Thing()]
+    traj.append_time(0.)
+    traj.record(var, things, [1., 2.])
+    traj.append_time(1.)
+    traj.record(var, things[1:], ["a"])
+    assert traj[var].tolist(things[0]) == [1., None]
+    assert traj[var].tolist(things[1]) == [2., "a"]
+    arrays = traj.to_arrays()
+    assert arrays[str(var)]['values'].tolist() == [["1.0", "2.0"],
+                                                  ["", "a"]]
+
+
+def test_run():
+    """The trajectory of a run has one value per time point and instance,
+    and to_arrays copies it."""
+    model, world, cells, individuals = M.populate()
+    traj = Runner(model=model).run(t_1=3, dt=0.5)
+    n = len(traj['t'])
+    assert n > 6 and traj['t'][0] == 0 and traj['t'][-1] == 3
+    assert np.all(np.diff(traj['t']) >= 0)
+    wealth = traj[M.MIndividual.wealth]
+    assert list(wealth) == individuals
+    assert wealth.as_array().shape == (n, len(individuals))
+    assert wealth[individuals[1]][0] == 2.
+    arrays = traj.to_arrays()
+    assert np.array_equal(arrays[str(M.MIndividual.wealth)]['values'],
+                          wealth.as_array())
+    assert arrays[str(M.MIndividual.wealth)]['values'] \
+        is not wealth.as_array()
@@ -0,0 +1,87 @@
+"""Test writing trajectories to HDF5 files while running."""
+
+# This file is part of pycopancore.
+#
+# Copyright (C) 2016-2017 by COPAN team at Potsdam Institute for Climate
+# Impact Research
+#
+# URL: <http://www.pik-potsdam.de/copan/software>
+# Contact: core@pik-potsdam.de
+# License: BSD 2-clause license
+
+import numpy as np
+import pytest
+
+from pycopancore.models._testing import engine as M
+from pycopancore.runners import Runner
+
+h5py = pytest.importorskip("h5py")
+
+
+def assert_file_matches(filename, arrays):
+    """assert that an output file contains the trajectory arrays (in the
+    format of _TrajectoryDictionary.to_arrays)"""
+    with h5py.File(filename, "r") as f:
+        assert np.array_equal(f["t"][:], arrays['t'])
+        # (Variables without recorded values have empty groups):
+        assert set(arrays) <= set(f)
+        assert all(f[key]["instances"].shape == (0,)
+                   for key in f if key not in arrays)
+        for key, item in arrays.items():
+            if key == 't':
+                continue
+            group = f[key]
+            assert list(group["instances"].asstr()[:]) == item['instances']
+            active = group["active"][:]
+            assert np.array_equal(active, item['active']), key
+            if item['values'].dtype.kind == "U":
+                values = group["strings"].asstr()[:]
+            else:
+                values = group["values"][:]
+            assert np.array_equal(values[active], item['values'][active]), \
+                key
+
+
+def setup(columnar=False):
+    model, world, cells, individuals = M.populate(columnar=columnar,
+                                                  kick_rate=0.1)
+    individuals[1].alarm_level = 4.5
+    return model
+
+
+@pytest.mark.parametrize("thinning", [None, ("every", 2)])
+@pytest.mark.parametrize("columnar", [False, True])
+def test_output_file(tmp_path, columnar, thinning):
+    """The file contains the same (thinned) trajectory as memory, also if
+    the trajectory is not kept in memory, and is written in chunks."""
+    filename = str(tmp_path / "run.h5")
+    kwargs = dict(t_1=6, dt=0.01, thinning=thinning)
+    runner = Runner(model=setup(columnar))
+    arrays = runner.run(output_file=filename, **kwargs).to_arrays()
+    # (more than one chunk of 256 time points):
+    assert len(arrays['t']) > 256
+    assert_file_matches(filename, arrays)
+
+    runner = Runner(model=setup(columnar))
+    traj = runner.run(output_file=filename, keep_trajectory=False,
+                      **kwargs)
+    assert len(traj['t']) < len(arrays['t'])
+    assert_file_matches(filename, arrays)
+
+
+@pytest.mark.parametrize("thinning", [None, ("every", 3)])
+def test_resumed_output_file(tmp_path, thinning):
+    """A run resumed from a checkpoint continues the file of the original
+    run, dropping the time points written after the checkpoint."""
+    kwargs = dict(t_1=6, dt=0.25, thinning=thinning, checkpoint_interval=1.)
+    full = Runner(model=setup()).run(
+        checkpoint_file=str(tmp_path / "full.ckpt"),
+        output_file=str(tmp_path / "full.h5"), **kwargs).to_arrays()
+
+    filename = str(tmp_path / "run.h5")
+    checkpoint = str(tmp_path / "run.ckpt")
+    Runner(model=setup()).run(checkpoint_file=checkpoint,
+                              output_file=filename,
+                              **dict(kwargs, t_1=3.6))
+    Runner(model=setup()).resume(checkpoint, t_1=6)
+    assert_file_matches(filename, full)